@@ -1,4 +1,11 @@
-"""FastAPI dependencies for dependency injection."""
+"""FastAPI dependencies for dependency injection.
+
+The Gemini and TTS services are built on first use and then shared for the
+life of the process, so their API clients and gRPC channels are reused
+across requests.
+"""
+from functools import lru_cache
+
 from app.core.config import settings
 from app.services.youtube import YouTubeService
 from app.services.gemini import GeminiService
@@ -6,15 +13,17 @@ from app.services.google_tts import GoogleTTSService
 
 
 def get_youtube_service() -> YouTubeService:
-    """Get YouTube service instance."""
+    """Get YouTube service instance (per request: the API discovery client isn't thread-safe)."""
     return YouTubeService(api_key=settings.youtube_api_key)
 
 
+@lru_cache
 def get_gemini_service() -> GeminiService:
     """Get Gemini service instance."""
     return GeminiService(api_key=settings.gemini_api_key)
 
 
+@lru_cache
 def get_google_tts_service() -> GoogleTTSService:
     """Get Google TTS service instance."""
     return GoogleTTSService(api_key=settings.google_tts_api_key)
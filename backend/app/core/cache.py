@@ -5,17 +5,44 @@ Persists search results and transcripts across server restarts.
 import json
 import hashlib
 import logging
+import time
 from pathlib import Path
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, Iterable, Tuple
 from datetime import datetime
 import threading
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
+def _read_json(path: Path) -> Any:
+    """Load a JSON file, using orjson when it's installed."""
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _write_json(path: Path, data: Any):
+    """Write a JSON file (indented), using orjson when it's installed."""
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        return
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
 class FileCache:
     """Thread-safe file-based cache with hash-based keys."""
     
+    # Video metadata changes (view counts etc.), so it's only kept in memory for a while
+    VIDEO_DETAILS_TTL = 3600
+    VIDEO_DETAILS_MAX_ENTRIES = 2048
+    
     def __init__(self, cache_dir: str = "cache"):
         # Make cache_dir relative to the app/core directory if not absolute
         if not Path(cache_dir).is_absolute():
@@ -46,6 +73,10 @@ class FileCache:
         self.search_lock = threading.Lock()
         self.transcript_lock = threading.Lock()
         
+        # In-memory video details: video_id -> (expires_at, details)
+        self.video_details: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self.video_details_lock = threading.Lock()
+        
         # Load existing hashmaps from disk
         self._load_hashmaps()
         
@@ -57,16 +88,14 @@ class FileCache:
         """Load hashmaps from disk on startup."""
         try:
             if self.search_hashmap_file.exists():
-                with open(self.search_hashmap_file, 'r') as f:
-                    self.search_hashmap = json.load(f)
+                self.search_hashmap = _read_json(self.search_hashmap_file)
         except Exception as e:
             logger.error(f"Error loading search hashmap: {e}")
             self.search_hashmap = {}
         
         try:
             if self.transcript_hashmap_file.exists():
-                with open(self.transcript_hashmap_file, 'r') as f:
-                    self.transcript_hashmap = json.load(f)
+                self.transcript_hashmap = _read_json(self.transcript_hashmap_file)
         except Exception as e:
             logger.error(f"Error loading transcript hashmap: {e}")
             self.transcript_hashmap = {}
@@ -74,16 +103,14 @@ class FileCache:
     def _save_search_hashmap(self):
         """Save search hashmap to disk."""
         try:
-            with open(self.search_hashmap_file, 'w') as f:
-                json.dump(self.search_hashmap, f, indent=2)
+            _write_json(self.search_hashmap_file, self.search_hashmap)
         except Exception as e:
             logger.error(f"Error saving search hashmap: {e}")
     
     def _save_transcript_hashmap(self):
         """Save transcript hashmap to disk."""
         try:
-            with open(self.transcript_hashmap_file, 'w') as f:
-                json.dump(self.transcript_hashmap, f, indent=2)
+            _write_json(self.transcript_hashmap_file, self.transcript_hashmap)
         except Exception as e:
             logger.error(f"Error saving transcript hashmap: {e}")
     
@@ -110,8 +137,7 @@ class FileCache:
                 cache_file = self.search_cache_dir / f"{file_hash}.json"
                 if cache_file.exists():
                     try:
-                        with open(cache_file, 'r') as f:
-                            cached_data = json.load(f)
+                        cached_data = _read_json(cache_file)
                         logger.info(f"Cache HIT for search: '{query}' (max_results={max_results})")
                         return cached_data['results']
                     except Exception as e:
@@ -143,8 +169,7 @@ class FileCache:
                     "results": results
                 }
                 
-                with open(cache_file, 'w') as f:
-                    json.dump(cache_data, f, indent=2)
+                _write_json(cache_file, cache_data)
                 
                 self.search_hashmap[cache_key] = file_hash
                 self._save_search_hashmap()
@@ -170,8 +195,7 @@ class FileCache:
                 cache_file = self.transcript_cache_dir / f"{file_hash}.json"
                 if cache_file.exists():
                     try:
-                        with open(cache_file, 'r') as f:
-                            cached_data = json.load(f)
+                        cached_data = _read_json(cache_file)
                         logger.info(f"Cache HIT for transcript: {video_id}")
                         return cached_data['transcript']
                     except Exception as e:
@@ -200,8 +224,7 @@ class FileCache:
                     "transcript": transcript
                 }
                 
-                with open(cache_file, 'w') as f:
-                    json.dump(cache_data, f, indent=2)
+                _write_json(cache_file, cache_data)
                 
                 self.transcript_hashmap[video_id] = file_hash
                 self._save_transcript_hashmap()
@@ -210,6 +233,48 @@ class FileCache:
             except Exception as e:
                 logger.error(f"Error caching transcript: {e}")
     
+    def get_video_details(self, video_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get cached details for the given videos.
+        
+        Args:
+            video_ids: YouTube video IDs
+        
+        Returns:
+            Mapping of video ID to details for the IDs that are cached and fresh
+        """
+        now = time.monotonic()
+        found = {}
+        with self.video_details_lock:
+            for video_id in video_ids:
+                entry = self.video_details.get(video_id)
+                if entry is None:
+                    continue
+                expires_at, details = entry
+                if expires_at < now:
+                    del self.video_details[video_id]
+                    continue
+                found[video_id] = details
+        return found
+    
+    def set_video_details(self, details: Dict[str, Dict[str, Any]]):
+        """
+        Cache details (title, description, duration) for videos.
+        
+        Args:
+            details: Mapping of video ID to details
+        """
+        expires_at = time.monotonic() + self.VIDEO_DETAILS_TTL
+        with self.video_details_lock:
+            for video_id, video_details in details.items():
+                self.video_details.pop(video_id, None)
+                self.video_details[video_id] = (expires_at, video_details)
+            
+            # Evict oldest entries (dicts keep insertion order)
+            overflow = len(self.video_details) - self.VIDEO_DETAILS_MAX_ENTRIES
+            for video_id in list(self.video_details)[:max(overflow, 0)]:
+                del self.video_details[video_id]
+    
     def clear_search_cache(self):
         """Clear all search cache data."""
         with self.search_lock:
@@ -238,6 +303,8 @@ class FileCache:
         """Clear all cache data."""
         self.clear_search_cache()
         self.clear_transcript_cache()
+        with self.video_details_lock:
+            self.video_details.clear()
         logger.info("All cache cleared")
     
     def get_stats(self) -> Dict[str, Any]:
@@ -245,6 +312,7 @@ class FileCache:
         return {
             "search_entries": len(self.search_hashmap),
             "transcript_entries": len(self.transcript_hashmap),
+            "video_details_entries": len(self.video_details),
             "cache_dir": str(self.cache_dir.absolute()),
             "search_cache_size_mb": sum(
                 f.stat().st_size for f in self.search_cache_dir.glob("*.json")
@@ -1,5 +1,6 @@
 """Application configuration using Pydantic settings."""
 
+from functools import cached_property
 from pathlib import Path
 from typing import List
 
@@ -34,10 +35,21 @@ class Settings(BaseSettings):
     
     # Video Generation Settings
     max_scene_duration: int = 8  # seconds (Veo max)
+    hw_accel: bool = True  # Use NVENC for encoding when the GPU/ffmpeg build supports it
+    encoder_preset: str = "veryfast"  # libx264 preset for stitched output
+    encoder_tune: str = "stillimage"  # libx264 tune (empty to disable); podcast clips are low-motion
+    stitch_cache_max_bytes: int = 50 * 2**30  # Evict least recently used cached stitches past this total size
     
-    @property
+    # Text-to-Speech
+    tts_concurrency: int = 8  # Max concurrent Google TTS requests per service
+    tts_cache_dir: str = "./tts_cache"  # Synthesized audio cache (empty to disable)
+    
+    # Gemini
+    llm_cache_dir: str = "./llm_cache"  # Parsed snippet/scene responses cache (empty to disable)
+    
+    @cached_property
     def cors_origins_list(self) -> List[str]:
-        """Parse CORS origins string into list."""
+        """Parse CORS origins string into list (computed once)."""
         return [origin.strip() for origin in self.cors_origins.split(",")]
 
 
@@ -1,11 +1,13 @@
 """Service for synchronizing audio with video."""
 
+import asyncio
 import logging
+import os
+import tempfile
 from pathlib import Path
-from moviepy import VideoFileClip, AudioFileClip, concatenate_audioclips
 from app.models.schemas import AudioSyncRequest, AudioSyncResponse
 from app.core.config import settings
-from app.utils.video_utils import ensure_directory, get_output_path
+from app.utils.video_utils import ensure_directory, get_output_path, probe_duration, run_ffmpeg
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +28,8 @@ class AudioSync:
         """
         Add audio to video, ensuring perfect synchronization.
         
+        The video stream is copied as-is; only the audio is encoded.
+        
         Args:
             video_path: Path to video file (should be silent)
             audio_path: Path to audio file
@@ -48,49 +52,21 @@ class AudioSync:
             logger.debug(f"Video: {video_path}")
             logger.debug(f"Audio: {audio_path}")
             
-            # Load video and audio
-            video_clip = VideoFileClip(video_path)
-            audio_clip = AudioFileClip(audio_path)
-            
-            # Get durations
-            video_duration = video_clip.duration
-            audio_duration = audio_clip.duration
-            
-            logger.debug(f"Video duration: {video_duration}s, Audio duration: {audio_duration}s")
-            
-            # Handle duration mismatch
-            if audio_duration > video_duration:
-                # Trim audio to match video
-                logger.warning(f"Audio ({audio_duration}s) is longer than video ({video_duration}s). Trimming audio.")
-                audio_clip = audio_clip.subclip(0, video_duration)
-            elif audio_duration < video_duration:
-                # Loop audio or extend with silence
-                logger.warning(f"Audio ({audio_duration}s) is shorter than video ({video_duration}s). Extending audio.")
-                # For now, we'll just use the audio as-is and let video play silently after
-                # In production, you might want to loop the audio or add silence
-                pass
-            
-            # Set audio to video (this replaces any existing audio)
-            final_clip = video_clip.set_audio(audio_clip)
+            duration = await asyncio.to_thread(probe_duration, video_path)
             
-            # Write output file
+            # Video is already H.264, so it is stream-copied and only the narration is
+            # encoded; the narration is padded with silence or cut to the video's length
             logger.info(f"Writing final video with audio to {output_path}...")
-            final_clip.write_videofile(
+            await run_ffmpeg([
+                "-i", video_path,
+                "-i", audio_path,
+                "-map", "0:v:0", "-map", "1:a:0",
+                "-af", f"apad,atrim=duration={duration:.3f}",
+                "-c:v", "copy",
+                "-c:a", "aac", "-b:a", "192k",
+                "-movflags", "+faststart",
                 output_path,
-                codec='libx264',
-                audio_codec='aac',
-                fps=30,
-                preset='medium',
-                threads=4
-            )
-            
-            # Get final duration
-            duration = final_clip.duration
-            
-            # Clean up
-            final_clip.close()
-            video_clip.close()
-            audio_clip.close()
+            ])
             
             logger.info(f"Final video with audio saved: {output_path} (duration: {duration}s)")
             
@@ -121,60 +97,48 @@ class AudioSync:
             AudioSyncResponse with final video path
         """
         try:
-            if output_path is None:
-                output_path = get_output_path(self.output_dir, "final_video_with_audio.mp4")
-            
-            logger.info(f"Combining {len(audio_paths)} audio clips with video...")
-            
-            # Load video
-            video_clip = VideoFileClip(video_path)
-            
-            # Load and concatenate audio clips
-            audio_clips = []
-            for audio_path in audio_paths:
-                if not Path(audio_path).exists():
+            # Reused scenes repeat paths; stat each distinct file once
+            found = {path: Path(path).exists() for path in dict.fromkeys(audio_paths)}
+            for audio_path, exists in found.items():
+                if not exists:
                     logger.warning(f"Audio file not found: {audio_path}, skipping")
-                    continue
-                audio_clips.append(AudioFileClip(audio_path))
+            existing_audio = [path for path in audio_paths if found[path]]
             
-            if not audio_clips:
+            if not existing_audio:
                 raise ValueError("No valid audio clips found")
             
-            # Concatenate audio clips
-            combined_audio = concatenate_audioclips(audio_clips)
-            
-            # Get durations
-            video_duration = video_clip.duration
-            audio_duration = combined_audio.duration
+            if output_path is None:
+                output_path = get_output_path(self.output_dir, "final_video_with_audio.mp4")
             
-            # Handle duration mismatch
-            if audio_duration > video_duration:
-                combined_audio = combined_audio.subclip(0, video_duration)
-            elif audio_duration < video_duration:
-                logger.warning(f"Audio ({audio_duration}s) is shorter than video ({video_duration}s)")
+            logger.info(f"Combining {len(existing_audio)} audio clips with video...")
             
-            # Set audio to video
-            final_clip = video_clip.set_audio(combined_audio)
+            duration = await asyncio.to_thread(probe_duration, video_path)
             
-            # Write output file
-            logger.info(f"Writing final video with audio to {output_path}...")
-            final_clip.write_videofile(
-                output_path,
-                codec='libx264',
-                audio_codec='aac',
-                fps=30,
-                preset='medium',
-                threads=4
+            # The narration clips come from one TTS voice, so the concat demuxer can
+            # join them; the result is padded or cut to the video's length and the
+            # video stream is copied
+            list_file = tempfile.NamedTemporaryFile(
+                "w", suffix=".txt", dir=Path(output_path).parent, delete=False
             )
-            
-            duration = final_clip.duration
-            
-            # Clean up
-            final_clip.close()
-            video_clip.close()
-            combined_audio.close()
-            for clip in audio_clips:
-                clip.close()
+            try:
+                with list_file:
+                    for path in existing_audio:
+                        escaped = str(Path(path).resolve()).replace("'", "'\\''")
+                        list_file.write(f"file '{escaped}'\n")
+                
+                logger.info(f"Writing final video with audio to {output_path}...")
+                await run_ffmpeg([
+                    "-i", video_path,
+                    "-f", "concat", "-safe", "0", "-i", list_file.name,
+                    "-map", "0:v:0", "-map", "1:a:0",
+                    "-af", f"apad,atrim=duration={duration:.3f}",
+                    "-c:v", "copy",
+                    "-c:a", "aac", "-b:a", "192k",
+                    "-movflags", "+faststart",
+                    output_path,
+                ])
+            finally:
+                os.unlink(list_file.name)
             
             logger.info(f"Final video with audio saved: {output_path} (duration: {duration}s)")
             
@@ -0,0 +1,99 @@
+"""Content-addressed on-disk cache shared by the LLM and TTS caches."""
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _link_or_copy(src: Path, dst: Path):
+    """Place src at dst atomically, hard-linking when both are on the same filesystem."""
+    tmp = dst.with_name(f".{dst.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        try:
+            os.link(src, tmp)
+        except OSError:
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+class DiskCache:
+    """
+    Stores entries at ``<cache_dir>/<key[:2]>/<key><suffix>``.
+
+    Sharding by key prefix keeps any single directory small. Every write is
+    atomic, so readers never see partial entries. I/O errors are logged and
+    treated as misses. Subclasses set ``suffix`` and ``label`` and add a
+    typed make_key/get/put.
+    """
+
+    suffix = ""
+    label = "disk"
+
+    def __init__(self, cache_dir: str):
+        """Initialize the cache rooted at cache_dir (created lazily)."""
+        self.cache_dir = Path(cache_dir)
+
+    @staticmethod
+    def hash_key(*parts: bytes) -> str:
+        """Hex BLAKE2b digest of the NUL-separated parts."""
+        return hashlib.blake2b(b"\x00".join(parts), digest_size=32).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}{self.suffix}"
+
+    def read_bytes(self, key: str) -> Optional[bytes]:
+        """Return the entry for key, or None on a miss."""
+        try:
+            return self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Error reading {self.label} cache entry {key}: {e}")
+            return None
+
+    def write_bytes(self, key: str, data: bytes):
+        """Store data for key."""
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning(f"Error writing {self.label} cache entry {key}: {e}")
+
+    def fetch_file(self, key: str, output_path: str) -> bool:
+        """Place the entry for key at output_path (hard-linked where possible); returns False on a miss."""
+        path = self._path(key)
+        if not path.is_file():
+            return False
+        try:
+            _link_or_copy(path, Path(output_path))
+            return True
+        except OSError as e:
+            logger.warning(f"Error reading {self.label} cache entry {key}: {e}")
+            return False
+
+    def store_file(self, key: str, file_path: str):
+        """Store the file at file_path for key (hard-linked where possible)."""
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _link_or_copy(Path(file_path), path)
+        except OSError as e:
+            logger.warning(f"Error writing {self.label} cache entry {key}: {e}")
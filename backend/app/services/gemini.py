@@ -1,6 +1,6 @@
 """Gemini service for AI-powered content analysis and generation."""
+import asyncio
 import logging
-import json
 from typing import List, Optional
 from pathlib import Path
 import google.generativeai as genai
@@ -25,6 +25,8 @@ from app.prompts.analysis import ANALYSIS_PROMPT
 from app.prompts.outline import OUTLINE_PROMPT
 from app.prompts.script import SCRIPT_SINGLE_HOST_PROMPT, SCRIPT_MULTI_HOST_PROMPT
 from app.prompts.graphon import GRAPHON_PROMPT
+from app.utils.json_utils import parse_json_response
+from app.utils.retry import with_retries
 
 logger = logging.getLogger(__name__)
 
@@ -40,23 +42,7 @@ class GeminiService:
     
     def _parse_json_response(self, response_text: str) -> dict:
         """Extract and parse JSON from model response."""
-        # Try to find JSON in code blocks first
-        if "```json" in response_text:
-            start = response_text.find("```json") + 7
-            end = response_text.find("```", start)
-            json_str = response_text[start:end].strip()
-        elif "```" in response_text:
-            start = response_text.find("```") + 3
-            end = response_text.find("```", start)
-            json_str = response_text[start:end].strip()
-        else:
-            json_str = response_text.strip()
-        
-        try:
-            return json.loads(json_str)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON: {e}\nResponse: {json_str[:500]}")
-            raise ValueError(f"Invalid JSON response from model: {str(e)}")
+        return parse_json_response(response_text)
     
     async def analyze_content(
         self,
@@ -82,7 +68,10 @@ class GeminiService:
             )
             
             # Generate response
-            response = self.model.generate_content(prompt)
+            response = await with_retries(
+                lambda: asyncio.to_thread(self.model.generate_content, prompt),
+                description="Gemini content analysis"
+            )
             result = self._parse_json_response(response.text)
             
             # Parse into structured response
@@ -137,7 +126,10 @@ class GeminiService:
             )
             
             # Generate response
-            response = self.model.generate_content(prompt)
+            response = await with_retries(
+                lambda: asyncio.to_thread(self.model.generate_content, prompt),
+                description="Gemini outline generation"
+            )
             result = self._parse_json_response(response.text)
             
             # Parse into structured response
@@ -205,12 +197,16 @@ class GeminiService:
             # Pass prompt + files as multi-part content
             parts = [prompt] + [uf for (_, uf) in uploaded_files]
 
-            response = self.model.generate_content(
-                parts,
-                generation_config=genai.GenerationConfig(
-                    max_output_tokens=4000,
-                    temperature=0.4,
+            response = await with_retries(
+                lambda: asyncio.to_thread(
+                    self.model.generate_content,
+                    parts,
+                    generation_config=genai.GenerationConfig(
+                        max_output_tokens=4000,
+                        temperature=0.4,
+                    ),
                 ),
+                description="Gemini graph context"
             )
             result = self._parse_json_response(response.text)
 
@@ -284,12 +280,16 @@ class GeminiService:
             )
             
             # Generate response with higher token limit
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.GenerationConfig(
-                    max_output_tokens=8000,
-                    temperature=0.9,
-                )
+            response = await with_retries(
+                lambda: asyncio.to_thread(
+                    self.model.generate_content,
+                    prompt,
+                    generation_config=genai.GenerationConfig(
+                        max_output_tokens=8000,
+                        temperature=0.9,
+                    )
+                ),
+                description="Gemini script generation"
             )
             result = self._parse_json_response(response.text)
             
@@ -1,12 +1,18 @@
 """Google Cloud Text-to-Speech service for text-to-speech conversion."""
+import asyncio
 import logging
+import re
 from typing import Optional, List
 from google.cloud import texttospeech
 from google.api_core import client_options as client_options_lib
 from app.models.schemas import ScriptResponse, ScriptSegment, PodcastFormat
+from app.utils.retry import with_retries
 
 logger = logging.getLogger(__name__)
 
+# Sentence boundaries: whitespace following ., ! or ?
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
 
 class GoogleTTSService:
     """Service for converting text to speech using Google Cloud Text-to-Speech."""
@@ -49,10 +55,14 @@ class GoogleTTSService:
             if script.format == PodcastFormat.SINGLE_HOST:
                 # Single host - generate entire script at once
                 logger.info("Generating single-host audio...")
-                audio_data = self._generate_speech(
-                    text=script.full_script,
-                    voice_name=voice1,
-                    output_format=output_format
+                audio_data = await with_retries(
+                    lambda: asyncio.to_thread(
+                        self._generate_speech,
+                        text=script.full_script,
+                        voice_name=voice1,
+                        output_format=output_format
+                    ),
+                    description="Google TTS request"
                 )
                 return audio_data
             
@@ -66,10 +76,14 @@ class GoogleTTSService:
                     
                     logger.debug(f"Generating segment {i+1}/{len(script.segments)} ({segment.speaker})")
                     
-                    audio_data = self._generate_speech(
-                        text=segment.text,
-                        voice_name=voice_name,
-                        output_format=output_format
+                    audio_data = await with_retries(
+                        lambda: asyncio.to_thread(
+                            self._generate_speech,
+                            text=segment.text,
+                            voice_name=voice_name,
+                            output_format=output_format
+                        ),
+                        description=f"Google TTS request for segment {i+1}"
                     )
                     audio_segments.append(audio_data)
                 
@@ -96,29 +110,33 @@ class GoogleTTSService:
             return [text]
         
         # Split by sentences
-        sentences = text.replace('! ', '!|').replace('? ', '?|').replace('. ', '.|').split('|')
+        sentences = _SENTENCE_SPLIT_RE.split(text)
         
         chunks = []
-        current_chunk = ""
+        current_sentences: List[str] = []
+        current_bytes = 0
         
         for sentence in sentences:
             sentence = sentence.strip()
             if not sentence:
                 continue
             
-            # Check if adding this sentence would exceed limit
-            test_chunk = current_chunk + " " + sentence if current_chunk else sentence
-            if len(test_chunk.encode('utf-8')) <= max_bytes:
-                current_chunk = test_chunk
+            # Check if adding this sentence (plus the joining space) would exceed limit
+            sentence_bytes = len(sentence.encode('utf-8'))
+            added_bytes = sentence_bytes + 1 if current_sentences else sentence_bytes
+            if current_bytes + added_bytes <= max_bytes:
+                current_sentences.append(sentence)
+                current_bytes += added_bytes
             else:
                 # Save current chunk and start new one
-                if current_chunk:
-                    chunks.append(current_chunk)
-                current_chunk = sentence
+                if current_sentences:
+                    chunks.append(" ".join(current_sentences))
+                current_sentences = [sentence]
+                current_bytes = sentence_bytes
         
         # Add remaining chunk
-        if current_chunk:
-            chunks.append(current_chunk)
+        if current_sentences:
+            chunks.append(" ".join(current_sentences))
         
         return chunks
     
@@ -1,13 +1,72 @@
 """Service for generating 8-second scene descriptions for Veo."""
 
+import asyncio
 import logging
 import json
 from typing import List
 import google.generativeai as genai
 from app.models.schemas import Snippet, SceneDescription, SceneGenerationResponse
+from app.core.config import settings
+from app.services.llm_cache import LLMCache
+from app.utils.json_utils import extract_json_text, parse_json_response
+from app.utils.retry import with_retries
 
 logger = logging.getLogger(__name__)
 
+# Static instructions, sent as the model's system instruction so every request shares
+# the same prefix (eligible for Gemini's implicit context caching); only the tail varies
+_SCENE_PROMPT_HEAD = """
+You are an expert AI Cinematographer and Visual Director. Your goal is to translate podcast transcript snippets into detailed, photorealistic video generation prompts optimized for Google Veo 3.1.
+
+**YOUR OBJECTIVE:**
+Convert each of the transcript snippets in the request into a detailed visual scene description for video generation. Each scene will be exactly the SCENE DURATION given in the request and will be SILENT (no audio). The audio will be added separately later.
+
+**CRITICAL CONSTRAINTS:**
+1. Each scene must be exactly the SCENE DURATION given in the request
+2. NO audio, vocals, speech, or sound effects in the video description
+3. NO visible people speaking, singing, or facing the camera
+4. NO lip movement of any kind
+5. NO on-screen text, subtitles, or captions
+6. NO podcast studios, microphones, or interview setups
+7. Visualize the STORY being told, not people talking
+
+**PROMPT FORMAT:**
+Each visual prompt must start with:
+"Cinematic lighting, photorealistic 4k, vertical 9:16 aspect ratio."
+
+Then add:
+- [Camera Movement/Angle] + [Subject Description] + [Action/Movement] + [Environment/Lighting] + [Film Style/Aesthetics]
+
+**GUIDELINES:**
+- Use specific camera terms: "Low-angle dolly shot," "Aerial drone view," "Close-up macro shot"
+- Describe lighting: "Golden hour sunlight," "Neon cyberpunk lighting," "Soft cinematic diffusion"
+- Specify style: "35mm film grain," "4k sharp digital," "Cinematic documentary style"
+- Translate abstract concepts into visual metaphors
+- Make scenes visually engaging and cinematic
+"""
+
+_SCENE_PROMPT_TAIL = """
+SCENE DURATION: {scene_duration} seconds
+
+TRANSCRIPT SNIPPETS:
+{snippets_text}
+
+**OUTPUT FORMAT (JSON):**
+{{
+  "scenes": [
+    {{
+      "scene_number": 1,
+      "transcript_text": "original snippet text",
+      "visual_prompt": "Cinematic lighting, photorealistic 4k, vertical 9:16 aspect ratio. [detailed visual description]",
+      "duration": {scene_duration},
+      "start_time": 0.0
+    }}
+  ]
+}}
+
+Return ONLY valid JSON, no additional text.
+"""
+
 
 class SceneGenerator:
     """Service for generating scene descriptions from snippets."""
@@ -15,27 +74,20 @@ class SceneGenerator:
     def __init__(self, api_key: str):
         """Initialize scene generator with Gemini API key."""
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model_name = 'gemini-2.5-flash'
+        self.model = genai.GenerativeModel(
+            self.model_name,
+            system_instruction=_SCENE_PROMPT_HEAD
+        )
+        self.llm_cache = LLMCache(settings.llm_cache_dir) if settings.llm_cache_dir else None
         self.scene_duration = 8.0  # Veo max duration
     
     def _parse_json_response(self, response_text: str) -> dict:
         """Extract and parse JSON from model response."""
-        if "```json" in response_text:
-            start = response_text.find("```json") + 7
-            end = response_text.find("```", start)
-            json_str = response_text[start:end].strip()
-        elif "```" in response_text:
-            start = response_text.find("```") + 3
-            end = response_text.find("```", start)
-            json_str = response_text[start:end].strip()
-        else:
-            json_str = response_text.strip()
-        
         try:
-            parsed = json.loads(json_str)
-            return parsed
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON: {e}\nResponse: {json_str[:500]}")
+            return parse_json_response(response_text)
+        except ValueError as e:
+            json_str = extract_json_text(response_text)
             
             # Try to fix common JSON issues
             try:
@@ -52,7 +104,35 @@ class SceneGenerator:
                 logger.info("Successfully recovered from malformed JSON")
                 return parsed
             except:
-                raise ValueError(f"Invalid JSON response from model: {str(e)}")
+                raise e
+    
+    async def _generate_json(self, prompt: str, generation_config: dict) -> dict:
+        """Call Gemini and parse its JSON reply, using the LLM cache when enabled."""
+        cache_key = None
+        if self.llm_cache is not None:
+            cache_key = LLMCache.make_key(
+                self.model_name, generation_config, prompt, _SCENE_PROMPT_HEAD
+            )
+            cached = await asyncio.to_thread(self.llm_cache.get, cache_key)
+            if cached is not None:
+                logger.info(f"LLM cache hit for {cache_key[:12]}")
+                return cached
+        
+        response = await with_retries(
+            lambda: asyncio.to_thread(
+                self.model.generate_content,
+                prompt,
+                generation_config=genai.GenerationConfig(**generation_config)
+            ),
+            description="Gemini scene generation"
+        )
+        
+        # With response_schema, the response should already be valid JSON
+        result = parse_json_response(response.text)
+        
+        if cache_key is not None:
+            await asyncio.to_thread(self.llm_cache.put, cache_key, result)
+        return result
     
     async def generate_scenes(
         self,
@@ -75,61 +155,18 @@ class SceneGenerator:
                 for i, snippet in enumerate(snippets)
             ])
             
-            prompt = f"""
-You are an expert AI Cinematographer and Visual Director. Your goal is to translate podcast transcript snippets into detailed, photorealistic video generation prompts optimized for Google Veo 3.1.
-
-TRANSCRIPT SNIPPETS:
-{snippets_text}
-
-**YOUR OBJECTIVE:**
-Convert each snippet into a detailed visual scene description for video generation. Each scene will be exactly {scene_duration} seconds long and will be SILENT (no audio). The audio will be added separately later.
-
-**CRITICAL CONSTRAINTS:**
-1. Each scene must be exactly {scene_duration} seconds
-2. NO audio, vocals, speech, or sound effects in the video description
-3. NO visible people speaking, singing, or facing the camera
-4. NO lip movement of any kind
-5. NO on-screen text, subtitles, or captions
-6. NO podcast studios, microphones, or interview setups
-7. Visualize the STORY being told, not people talking
-
-**PROMPT FORMAT:**
-Each visual prompt must start with:
-"Cinematic lighting, photorealistic 4k, vertical 9:16 aspect ratio."
-
-Then add:
-- [Camera Movement/Angle] + [Subject Description] + [Action/Movement] + [Environment/Lighting] + [Film Style/Aesthetics]
-
-**GUIDELINES:**
-- Use specific camera terms: "Low-angle dolly shot," "Aerial drone view," "Close-up macro shot"
-- Describe lighting: "Golden hour sunlight," "Neon cyberpunk lighting," "Soft cinematic diffusion"
-- Specify style: "35mm film grain," "4k sharp digital," "Cinematic documentary style"
-- Translate abstract concepts into visual metaphors
-- Make scenes visually engaging and cinematic
-
-**OUTPUT FORMAT (JSON):**
-{{
-  "scenes": [
-    {{
-      "scene_number": 1,
-      "transcript_text": "original snippet text",
-      "visual_prompt": "Cinematic lighting, photorealistic 4k, vertical 9:16 aspect ratio. [detailed visual description]",
-      "duration": {scene_duration},
-      "start_time": 0.0
-    }}
-  ]
-}}
-
-Return ONLY valid JSON, no additional text.
-"""
+            prompt = _SCENE_PROMPT_TAIL.format(
+                scene_duration=scene_duration,
+                snippets_text=snippets_text
+            )
             
-            response = self.model.generate_content(
+            result = await self._generate_json(
                 prompt,
-                generation_config=genai.GenerationConfig(
-                    temperature=0.8,
-                    max_output_tokens=8000,
-                    response_mime_type="application/json",
-                    response_schema={
+                {
+                    "temperature": 0.8,
+                    "max_output_tokens": 8000,
+                    "response_mime_type": "application/json",
+                    "response_schema": {
                         "type": "object",
                         "properties": {
                             "scenes": {
@@ -148,12 +185,9 @@ Return ONLY valid JSON, no additional text.
                         },
                         "required": ["scenes"]
                     }
-                )
+                }
             )
             
-            # With response_schema, the response should already be valid JSON
-            result = json.loads(response.text)
-            
             scenes = [
                 SceneDescription(**scene) for scene in result.get('scenes', [])
             ]
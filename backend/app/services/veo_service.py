@@ -1,14 +1,17 @@
 """Service for generating videos using Veo 3.1."""
 
 import logging
+import os
 import time
 import asyncio
+from functools import partial
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from google import genai
 from google.genai import types
 from app.models.schemas import SceneDescription, VideoScene, VideoGenerationResponse
 from app.core.config import settings
+from app.utils.retry import is_submit_retryable, with_retries
 from app.utils.video_utils import ensure_directory, get_output_path
 
 logger = logging.getLogger(__name__)
@@ -23,22 +26,17 @@ class VeoService:
             self.client = genai.Client(api_key=api_key)
             self.model_name = "veo-3.1-generate-preview"
             self.output_dir = settings.video_output_dir
-            logger.info(f"VeoService initialized with model: {self.model_name}")
-            
-            # Test API access
-            try:
-                models = self.client.models.list()
-                logger.info(f"API client initialized successfully. Available models: {len(list(models))}")
-            except Exception as e:
-                logger.warning(f"Could not list models (this may be normal): {str(e)}")
+            logger.info("VeoService initialized with model: %s", self.model_name)
         except Exception as e:
-            logger.error(f"Failed to initialize Veo client: {str(e)}")
+            logger.error("Failed to initialize Veo client: %s", e)
             raise
     
-    def _poll_operation(self, operation, max_wait_time: int = 600) -> genai.types.Operation:
+    async def _poll_operation(self, operation, max_wait_time: int = 600) -> genai.types.Operation:
         """
         Poll operation until complete.
         
+        The interval backs off from 5s to 30s, since renders are rarely done early.
+        
         Args:
             operation: Veo operation object
             max_wait_time: Maximum time to wait in seconds
@@ -46,23 +44,27 @@ class VeoService:
         Returns:
             Completed operation
         """
-        start_time = time.time()
-        poll_interval = 10  # seconds
+        start_time = time.monotonic()
+        poll_interval = 5.0  # seconds
         
         while not operation.done:
-            elapsed = time.time() - start_time
+            elapsed = time.monotonic() - start_time
             if elapsed > max_wait_time:
                 raise TimeoutError(f"Video generation timed out after {max_wait_time} seconds")
             
-            logger.info(f"Waiting for video generation... ({elapsed:.0f}s elapsed)")
-            time.sleep(poll_interval)
-            operation = self.client.operations.get(operation)
+            logger.info("Waiting for video generation... (%.0fs elapsed)", elapsed)
+            await asyncio.sleep(poll_interval)
+            operation = await with_retries(
+                lambda: asyncio.to_thread(self.client.operations.get, operation),
+                description="Veo polling"
+            )
+            poll_interval = min(poll_interval * 1.5, 30.0)
         
-        logger.info(f"Operation completed after {time.time() - start_time:.1f}s")
+        logger.info("Operation completed after %.1fs", time.monotonic() - start_time)
         
         # Check if operation has an error
         if hasattr(operation, 'error') and operation.error:
-            logger.error(f"Operation completed with error: {operation.error}")
+            logger.error("Operation completed with error: %s", operation.error)
             raise RuntimeError(f"Video generation failed: {operation.error}")
         
         return operation
@@ -79,10 +81,10 @@ class VeoService:
         """
         try:
             uploaded_file = self.client.files.upload(path=video_path)
-            logger.info(f"Uploaded video {video_path} to GenAI")
+            logger.info("Uploaded video %s to GenAI", video_path)
             return uploaded_file
         except Exception as e:
-            logger.error(f"Error uploading video to GenAI: {str(e)}")
+            logger.error("Error uploading video to GenAI: %s", e)
             raise
     
     def _get_video_file_from_operation(self, operation) -> genai.types.File:
@@ -96,24 +98,25 @@ class VeoService:
             GenAI file reference to the generated video
         """
         try:
-            logger.info(f"Operation done: {operation.done}")
-            logger.info(f"Operation has response: {hasattr(operation, 'response')}")
+            logger.info("Operation done: %s", operation.done)
+            logger.info("Operation has response: %s", hasattr(operation, 'response'))
             
             if not operation.response:
                 logger.error("Operation response is None or missing")
-                logger.error(f"Operation error: {operation.error if hasattr(operation, 'error') else 'No error attr'}")
-                logger.error(f"Operation metadata: {operation.metadata if hasattr(operation, 'metadata') else 'No metadata'}")
+                logger.error("Operation error: %s", getattr(operation, 'error', 'No error attr'))
+                logger.error("Operation metadata: %s", getattr(operation, 'metadata', 'No metadata'))
                 raise ValueError("Operation response is None")
             
-            logger.info(f"Response type: {type(operation.response)}")
-            logger.info(f"Response has generated_videos: {hasattr(operation.response, 'generated_videos')}")
+            logger.info("Response type: %s", type(operation.response))
+            logger.info("Response has generated_videos: %s", hasattr(operation.response, 'generated_videos'))
             
             if not hasattr(operation.response, 'generated_videos'):
-                logger.error(f"Response attributes: {dir(operation.response)}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Response attributes: %s", dir(operation.response))
                 raise ValueError("Operation response does not contain generated_videos")
             
             videos = operation.response.generated_videos
-            logger.info(f"Generated videos count: {len(videos) if videos else 0}")
+            logger.info("Generated videos count: %d", len(videos) if videos else 0)
             
             if not videos or len(videos) == 0:
                 logger.error("⚠️  VEO API ACCESS REQUIRED ⚠️")
@@ -125,11 +128,11 @@ class VeoService:
                 raise ValueError("Veo API access required: No generated videos returned. Please apply for Veo 3.1 access at https://ai.google.dev/gemini-api/docs/video-generation")
             
             generated_video = videos[0]
-            logger.info(f"Video file retrieved successfully")
+            logger.info("Video file retrieved successfully")
             return generated_video.video
             
         except Exception as e:
-            logger.error(f"Error getting video file from operation: {str(e)}")
+            logger.error("Error getting video file from operation: %s", e)
             raise
     
     def _download_video(self, operation, output_path: str) -> str:
@@ -152,50 +155,30 @@ class VeoService:
             
             generated_video = operation.response.generated_videos[0]
             
-            # Download the video file (returns bytes)
-            logger.info(f"Downloading video from Veo...")
-            video_bytes = self.client.files.download(file=generated_video.video)
-            
-            # Save bytes to output path
             output_file = Path(output_path)
             output_file.parent.mkdir(parents=True, exist_ok=True)
             
-            # Write bytes directly to file
-            with open(output_file, 'wb') as f:
-                f.write(video_bytes)
+            # Stream to a temp file in chunks instead of holding the whole clip in memory;
+            # the rename means a failed download never leaves a truncated clip behind
+            logger.info("Downloading video from Veo...")
+            part_file = output_file.with_name(output_file.name + ".part")
+            try:
+                self.client.files.download(file=generated_video.video, destination=str(part_file))
+                os.replace(part_file, output_file)
+            except BaseException:
+                part_file.unlink(missing_ok=True)
+                raise
             
-            logger.info(f"Video saved to {output_path} ({len(video_bytes)} bytes)")
+            logger.info("Video saved to %s (%d bytes)", output_path, output_file.stat().st_size)
             return str(output_file)
             
         except Exception as e:
-            logger.error(f"Error downloading video: {str(e)}")
+            logger.error("Error downloading video: %s", e)
             raise
     
-    async def generate_video(
-        self,
-        scene: SceneDescription,
-        output_filename: str = None,
-        previous_video_file: Optional[genai.types.File] = None
-    ) -> VideoScene:
-        """
-        Generate a single video clip from scene description.
-        
-        Args:
-            scene: Scene description with visual prompt
-            output_filename: Optional output filename
-            previous_video_file: Optional GenAI file reference to previous video to extend from
-            
-        Returns:
-            VideoScene with file path and metadata
-        """
-        try:
-            if output_filename is None:
-                output_filename = f"scene_{scene.scene_number}.mp4"
-            
-            output_path = get_output_path(self.output_dir, output_filename)
-            
-            # Create Veo prompt with constraints
-            veo_prompt = f"""
+    def _build_prompt(self, scene: SceneDescription) -> str:
+        """Create the Veo prompt for a scene, including the silent-video constraints."""
+        return f"""
 You are generating a short-form video clip to accompany an EXISTING audio track.
 
 CRITICAL AUDIO CONSTRAINT (MUST FOLLOW):
@@ -236,75 +219,130 @@ OUTPUT REQUIREMENT:
 - One continuous, silent video clip.
 - The video must align temporally with the transcript audio when the audio is added externally.
 """
+    
+    async def _render_scene(
+        self,
+        scene: SceneDescription,
+        previous_video_file: Optional[genai.types.File] = None
+    ) -> Tuple[genai.types.Operation, genai.types.File]:
+        """
+        Submit a scene to Veo and wait for the operation to complete.
+        
+        The generated video is not downloaded here, so callers can start the
+        next generation as soon as the file reference is available.
+        
+        Args:
+            scene: Scene description with visual prompt
+            previous_video_file: Optional GenAI file reference to previous video to extend from
             
-            logger.info(f"Generating video for scene {scene.scene_number}...")
-            logger.info(f"Prompt length: {len(veo_prompt)} characters")
-            logger.info(f"Using model: {self.model_name}")
-            
-            # Generate video (this is a blocking operation, so we run it in executor)
-            loop = asyncio.get_event_loop()
+        Returns:
+            Tuple of (completed operation, GenAI file reference to the generated video)
+        """
+        veo_prompt = self._build_prompt(scene)
+        
+        logger.info("Generating video for scene %d...", scene.scene_number)
+        logger.info("Prompt length: %d characters", len(veo_prompt))
+        logger.info("Using model: %s", self.model_name)
+        
+        # Generate video (this is a blocking call, so it runs in a worker thread).
+        # Submitting is not idempotent, so it is only retried when the request
+        # never reached Veo (rate limits, connect errors).
+        try:
+            # If we have a previous video file, extend from it
+            if previous_video_file:
+                logger.info("Extending from previous video file...")
+                operation = await with_retries(
+                    lambda: asyncio.to_thread(
+                        self.client.models.generate_videos,
+                        model=self.model_name,
+                        video=previous_video_file,
+                        prompt=veo_prompt,
+                    ),
+                    retry_if=is_submit_retryable,
+                    description=f"Veo request for scene {scene.scene_number}"
+                )
+            else:
+                # Generate new video - match notebook exactly (no config)
+                logger.info("Calling Veo API to generate new video (no config, matching notebook)...")
+                operation = await with_retries(
+                    lambda: asyncio.to_thread(
+                        self.client.models.generate_videos,
+                        model=self.model_name,
+                        prompt=veo_prompt,
+                    ),
+                    retry_if=is_submit_retryable,
+                    description=f"Veo request for scene {scene.scene_number}"
+                )
+                logger.info("Veo API call successful, operation created: %s", getattr(operation, 'name', 'unknown'))
+        except Exception as api_error:
+            logger.error("Veo API call failed: %s: %s", type(api_error).__name__, api_error)
+            raise
+        
+        # Poll for completion
+        operation = await self._poll_operation(operation)
+        
+        # Get video file reference from operation (for potential extension)
+        video_file = await asyncio.to_thread(self._get_video_file_from_operation, operation)
+        
+        return operation, video_file
+    
+    def _build_video_scene(
+        self,
+        scene: SceneDescription,
+        video_path: str,
+        video_file: Optional[genai.types.File]
+    ) -> VideoScene:
+        """Create the VideoScene for a generated clip."""
+        # Get actual video duration (we'll use the expected duration for now)
+        video_scene = VideoScene(
+            scene_number=scene.scene_number,
+            file_path=video_path,
+            duration=scene.duration,
+            transcript_text=scene.transcript_text
+        )
+        
+        # Store video file reference for potential extension
+        video_scene.video_file = video_file
+        return video_scene
+    
+    async def generate_video(
+        self,
+        scene: SceneDescription,
+        output_filename: str = None,
+        previous_video_file: Optional[genai.types.File] = None
+    ) -> VideoScene:
+        """
+        Generate a single video clip from scene description.
+        
+        Args:
+            scene: Scene description with visual prompt
+            output_filename: Optional output filename
+            previous_video_file: Optional GenAI file reference to previous video to extend from
             
-            try:
-                # If we have a previous video file, extend from it
-                if previous_video_file:
-                    logger.info(f"Extending from previous video file...")
-                    operation = await loop.run_in_executor(
-                        None,
-                        lambda: self.client.models.generate_videos(
-                            model=self.model_name,
-                            video=previous_video_file,
-                            prompt=veo_prompt,
-                        )
-                    )
-                else:
-                    # Generate new video - match notebook exactly (no config)
-                    logger.info(f"Calling Veo API to generate new video (no config, matching notebook)...")
-                    operation = await loop.run_in_executor(
-                        None,
-                        lambda: self.client.models.generate_videos(
-                            model=self.model_name,
-                            prompt=veo_prompt,
-                        )
-                    )
-                    logger.info(f"Veo API call successful, operation created: {operation.name if hasattr(operation, 'name') else 'unknown'}")
-            except Exception as api_error:
-                logger.error(f"Veo API call failed: {type(api_error).__name__}: {str(api_error)}")
-                raise
+        Returns:
+            VideoScene with file path and metadata
+        """
+        try:
+            if output_filename is None:
+                output_filename = f"scene_{scene.scene_number}.mp4"
             
-            # Poll for completion
-            operation = await loop.run_in_executor(
-                None,
-                lambda: self._poll_operation(operation)
-            )
+            output_path = get_output_path(self.output_dir, output_filename)
             
-            # Get video file reference from operation (for potential extension)
-            video_file = await loop.run_in_executor(
-                None,
-                lambda: self._get_video_file_from_operation(operation)
-            )
+            operation, video_file = await self._render_scene(scene, previous_video_file)
             
             # Download video
-            video_path = await loop.run_in_executor(
-                None,
-                lambda: self._download_video(operation, output_path)
-            )
-            
-            # Get actual video duration (we'll use the expected duration for now)
-            video_scene = VideoScene(
-                scene_number=scene.scene_number,
-                file_path=video_path,
-                duration=scene.duration,
-                transcript_text=scene.transcript_text
+            video_path = await with_retries(
+                lambda: asyncio.to_thread(self._download_video, operation, output_path),
+                description=f"Veo download for scene {scene.scene_number}"
             )
             
-            # Store video file reference for potential extension
-            video_scene.video_file = video_file
+            video_scene = self._build_video_scene(scene, video_path, video_file)
             
-            logger.info(f"Video generated for scene {scene.scene_number}: {video_path}")
+            logger.info("Video generated for scene %d: %s", scene.scene_number, video_path)
             return video_scene
             
         except Exception as e:
-            logger.error(f"Error generating video for scene {scene.scene_number}: {str(e)}")
+            logger.error("Error generating video for scene %d: %s", scene.scene_number, e)
             raise
     
     async def generate_videos(
@@ -328,42 +366,59 @@ OUTPUT REQUIREMENT:
             if not scenes:
                 raise ValueError("No scenes provided")
             
-            logger.info(f"Generating extended video from {len(scenes)} scenes...")
+            logger.info("Generating extended video from %d scenes...", len(scenes))
             
-            # Generate first video normally
-            first_scene = scenes[0]
-            logger.info(f"Generating initial video for scene {first_scene.scene_number}...")
-            first_video = await self.generate_video(first_scene)
-            current_video_file = getattr(first_video, 'video_file', None)
-            video_scenes = [first_video]
-            total_duration = first_video.duration
+            # Each extension only needs the file reference of the previous
+            # clip, so downloads run in the background while the next scene
+            # is already being generated.
+            pending_downloads: List[asyncio.Task] = []
+            video_scenes = []
+            total_duration = 0.0
+            current_video_file = None
             
-            # For subsequent scenes, extend the video using the previous video file
-            for i, scene in enumerate(scenes[1:], start=2):
-                logger.info(f"Extending video for scene {scene.scene_number} ({i}/{len(scenes)})...")
-                
-                if not current_video_file:
-                    raise ValueError(f"No video file reference available from previous video for scene {scene.scene_number}")
-                
-                # Generate extended video using the previous video file reference
-                # This extends the video seamlessly using Veo's extension feature
-                extended_video = await self.generate_video(
-                    scene,
-                    previous_video_file=current_video_file,
-                    output_filename=f"extended_scene_{scene.scene_number}.mp4"
-                )
-                
-                # The extended video continues from where the previous one left off
-                video_scenes.append(extended_video)
-                total_duration += extended_video.duration
+            try:
+                for i, scene in enumerate(scenes, start=1):
+                    if i == 1:
+                        logger.info("Generating initial video for scene %d...", scene.scene_number)
+                        output_filename = f"scene_{scene.scene_number}.mp4"
+                    else:
+                        logger.info("Extending video for scene %d (%d/%d)...", scene.scene_number, i, len(scenes))
+                        if not current_video_file:
+                            raise ValueError(f"No video file reference available from previous video for scene {scene.scene_number}")
+                        output_filename = f"extended_scene_{scene.scene_number}.mp4"
+                    
+                    output_path = get_output_path(self.output_dir, output_filename)
+                    
+                    # Generate (or extend) the video using the previous video file reference
+                    operation, video_file = await self._render_scene(
+                        scene,
+                        previous_video_file=current_video_file
+                    )
+                    pending_downloads.append(
+                        asyncio.create_task(
+                            with_retries(
+                                partial(asyncio.to_thread, self._download_video, operation, output_path),
+                                description=f"Veo download for scene {scene.scene_number}"
+                            )
+                        )
+                    )
+                    
+                    video_scenes.append(self._build_video_scene(scene, output_path, video_file))
+                    total_duration += scene.duration
+                    
+                    # Update current video file reference for next iteration
+                    current_video_file = video_file
                 
-                # Update current video file reference for next iteration
-                current_video_file = getattr(extended_video, 'video_file', None)
+                await asyncio.gather(*pending_downloads)
+            except Exception:
+                # Let in-flight downloads settle before propagating the error
+                await asyncio.gather(*pending_downloads, return_exceptions=True)
+                raise
             
             # When extending videos, the final video contains all previous content
             # So we only return the final extended video to avoid duplication
             if len(video_scenes) > 1:
-                logger.info(f"Extended video created with {len(scenes)} scenes. Using final extended video only.")
+                logger.info("Extended video created with %d scenes. Using final extended video only.", len(scenes))
                 final_video = video_scenes[-1]
                 # Update the scene number to reflect it's the complete video
                 final_video.scene_number = 1
@@ -372,13 +427,13 @@ OUTPUT REQUIREMENT:
                     total_duration=total_duration
                 )
             else:
-                logger.info(f"Generated video with duration: {total_duration}s")
+                logger.info("Generated video with duration: %ss", total_duration)
                 return VideoGenerationResponse(
                     video_scenes=video_scenes,
                     total_duration=total_duration
                 )
             
         except Exception as e:
-            logger.error(f"Error generating videos: {str(e)}")
+            logger.error("Error generating videos: %s", e)
             raise
 
@@ -1,40 +1,183 @@
 """Service for stitching video clips together."""
 
+import asyncio
+import hashlib
+import json
 import logging
+import os
+import shutil
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import List
-
-# MoviePy API differs across major versions:
-# - MoviePy 1.x: clip.resize(...), clip.crop(...)
-# - MoviePy 2.x: clip.resized(...), clip.cropped(...)
-# Imports also differ depending on install.
-try:
-    # MoviePy 1.x common import path
-    from moviepy.editor import VideoFileClip, concatenate_videoclips  # type: ignore
-except Exception:  # pragma: no cover
-    from moviepy import VideoFileClip, concatenate_videoclips  # type: ignore
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
 
 from app.models.schemas import VideoStitchRequest, VideoStitchResponse
 from app.core.config import settings
-from app.utils.video_utils import ensure_directory, get_output_path
+from app.utils.video_utils import (
+    get_output_path,
+    nvenc_available,
+    cuda_pipeline_available,
+    probe_media,
+    run_ffmpeg,
+)
 
 logger = logging.getLogger(__name__)
 
-def _resize_clip(clip, **kwargs):
-    """Version-tolerant resize helper for MoviePy."""
-    if hasattr(clip, "resize"):
-        return clip.resize(**kwargs)
-    if hasattr(clip, "resized"):
-        return clip.resized(**kwargs)
-    raise AttributeError("MoviePy clip has neither resize() nor resized()")
+# Target: 1080x1920 for vertical format (9:16 aspect ratio)
+TARGET_WIDTH = 1080
+TARGET_HEIGHT = 1920
+
+# Finished stitches are kept under <video_output_dir>/.stitch_cache, keyed by
+# the input clips and encoder settings, so repeat requests skip the encode
+STITCH_CACHE_DIRNAME = ".stitch_cache"
+_HASH_BLOCK_BYTES = 1 << 20
+
+# MoviePy concatenate/encode blocks for the whole render, so it runs here rather
+# than on the event loop. Two workers bound concurrent CPU encodes.
+_STITCH_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="moviepy-stitch")
+
+@lru_cache(maxsize=1)
+def _moviepy() -> SimpleNamespace:
+    """
+    Import MoviePy on first use; only the fallback stitch path needs it.
+
+    The API differs across major versions:
+    - MoviePy 1.x: clip.crop(...), target_resolution=(height, width)
+    - MoviePy 2.x: clip.cropped(...), target_resolution=(width, height)
+    Imports also differ depending on install.
+    """
+    try:
+        # MoviePy 1.x common import path
+        from moviepy.editor import VideoFileClip, concatenate_videoclips  # type: ignore
+        v1 = True
+    except Exception:  # pragma: no cover
+        from moviepy import VideoFileClip, concatenate_videoclips  # type: ignore
+        v1 = False
+    return SimpleNamespace(
+        VideoFileClip=VideoFileClip,
+        concatenate_videoclips=concatenate_videoclips,
+        # Have ffmpeg scale frames to the target height while decoding (width follows the aspect ratio)
+        decode_resolution=(TARGET_HEIGHT, None) if v1 else (None, TARGET_HEIGHT),
+        crop_method="crop" if hasattr(VideoFileClip, "crop") else "cropped",
+    )
 
 def _crop_clip(clip, **kwargs):
     """Version-tolerant crop helper for MoviePy."""
-    if hasattr(clip, "crop"):
-        return clip.crop(**kwargs)
-    if hasattr(clip, "cropped"):
-        return clip.cropped(**kwargs)
-    raise AttributeError("MoviePy clip has neither crop() nor cropped()")
+    return getattr(clip, _moviepy().crop_method)(**kwargs)
+
+def _encoder_options() -> dict:
+    """Pick write_videofile encoder options, preferring NVENC when enabled and available."""
+    if settings.hw_accel and nvenc_available():
+        return {
+            "codec": "h264_nvenc",
+            "preset": "p4",
+            "ffmpeg_params": ["-rc", "vbr", "-cq", "24", "-b:v", "0"],
+        }
+    ffmpeg_params = ["-movflags", "+faststart"]
+    if settings.encoder_tune:
+        ffmpeg_params = ["-tune", settings.encoder_tune] + ffmpeg_params
+    return {
+        "codec": "libx264",
+        "preset": settings.encoder_preset,
+        "threads": os.cpu_count() or 4,
+        "ffmpeg_params": ffmpeg_params,
+    }
+
+def _ffmpeg_encoder_args() -> List[str]:
+    """ffmpeg video encoder arguments, preferring NVENC when enabled and available."""
+    if settings.hw_accel and nvenc_available():
+        return ["-c:v", "h264_nvenc", "-preset", "p4", "-rc", "vbr", "-cq", "24", "-b:v", "0"]
+    args = ["-c:v", "libx264", "-preset", settings.encoder_preset, "-crf", "23"]
+    if settings.encoder_tune:
+        args += ["-tune", settings.encoder_tune]
+    return args
+
+def _cover_size(width: int, height: int) -> Tuple[int, int]:
+    """Size a clip must be scaled to so that it covers the target frame (even dimensions)."""
+    scale = max(TARGET_WIDTH / width, TARGET_HEIGHT / height)
+    return (
+        max(TARGET_WIDTH, int(round(width * scale / 2)) * 2),
+        max(TARGET_HEIGHT, int(round(height * scale / 2)) * 2),
+    )
+
+def _streams(info: Dict[str, Any], codec_type: str) -> List[Dict[str, Any]]:
+    """Streams of a given type ("video"/"audio") from ffprobe output."""
+    return [stream for stream in info["streams"] if stream.get("codec_type") == codec_type]
+
+def _can_stream_copy(infos: List[Dict[str, Any]]) -> bool:
+    """
+    Check whether clips can be concatenated without re-encoding.
+    
+    Requires every clip to already be 1080x1920 and to share video codec,
+    pixel format, frame rate and time base, plus identical audio parameters
+    (or no audio at all).
+    """
+    signatures = set()
+    for info in infos:
+        video = _streams(info, "video")
+        if len(video) != 1:
+            return False
+        video = video[0]
+        if (video.get("width"), video.get("height")) != (TARGET_WIDTH, TARGET_HEIGHT):
+            return False
+        audio = tuple(
+            (a.get("codec_name"), a.get("sample_rate"), a.get("channels"))
+            for a in _streams(info, "audio")
+        )
+        signatures.add((
+            video.get("codec_name"),
+            video.get("pix_fmt"),
+            video.get("r_frame_rate"),
+            video.get("time_base"),
+            audio,
+        ))
+    return len(signatures) == 1
+
+def _clips_have_audio(infos: List[Dict[str, Any]]) -> bool:
+    """Whether the clips carry audio; the concat filter can't mix audio and silent inputs."""
+    has_audio = [bool(_streams(info, "audio")) for info in infos]
+    if any(has_audio) and not all(has_audio):
+        raise ValueError("Clips mix audio and silent streams")
+    return all(has_audio)
+
+def _stitch_cache_key(video_paths: List[str]) -> str:
+    """
+    Hash the inputs of a stitch: output format, encoder settings and the full
+    content of each clip, in order.
+    """
+    digest = hashlib.sha256(repr((
+        TARGET_WIDTH,
+        TARGET_HEIGHT,
+        settings.hw_accel,
+        settings.encoder_preset,
+        settings.encoder_tune,
+    )).encode())
+    for path in video_paths:
+        clip_digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while block := f.read(_HASH_BLOCK_BYTES):
+                clip_digest.update(block)
+        digest.update(clip_digest.digest())
+    return digest.hexdigest()
+
+def _link_or_copy(src: Path, dst: Path):
+    """
+    Place src at dst atomically (replacing dst), hard-linking when both are on
+    the same filesystem. An interrupted copy never leaves a truncated dst.
+    """
+    tmp = dst.with_name(f".{dst.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        try:
+            os.link(src, tmp)
+        except OSError:
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
 
 
 class VideoStitcher:
@@ -43,6 +186,7 @@ class VideoStitcher:
     def __init__(self):
         """Initialize video stitcher."""
         self.output_dir = settings.video_output_dir
+        self.cache_dir = Path(self.output_dir) / STITCH_CACHE_DIRNAME
     
     async def stitch_videos(
         self,
@@ -66,57 +210,63 @@ class VideoStitcher:
             if output_path is None:
                 output_path = get_output_path(self.output_dir, "stitched_video.mp4")
             
-            logger.info(f"Stitching {len(video_paths)} video clips...")
-            
-            # Load all video clips
-            clips = []
-            for i, video_path in enumerate(video_paths):
+            for video_path in video_paths:
                 if not Path(video_path).exists():
                     raise FileNotFoundError(f"Video file not found: {video_path}")
-                
-                logger.debug(f"Loading clip {i+1}/{len(video_paths)}: {video_path}")
-                clip = VideoFileClip(video_path)
-                
-                # Resize to ensure consistent dimensions (9:16 aspect ratio)
-                # Target: 1080x1920 for vertical format
-                target_width = 1080
-                target_height = 1920
-                
-                if clip.w != target_width or clip.h != target_height:
-                    # Resize maintaining aspect ratio, then crop to exact size
-                    clip = _resize_clip(clip, height=target_height)
-                    if clip.w != target_width:
-                        # Crop horizontally to center
-                        x_center = clip.w / 2
-                        clip = _crop_clip(clip, x_center=x_center, width=target_width)
-                
-                clips.append(clip)
             
-            # Concatenate clips
-            logger.info("Concatenating video clips...")
-            final_clip = concatenate_videoclips(clips, method="compose")
+            cache_key = None
+            try:
+                cache_key = await asyncio.to_thread(_stitch_cache_key, video_paths)
+                cached_duration = await asyncio.to_thread(
+                    self._load_cached_stitch, cache_key, output_path
+                )
+                if cached_duration is not None:
+                    logger.info(f"Reused cached stitch for {output_path} (duration: {cached_duration}s)")
+                    return VideoStitchResponse(
+                        stitched_video_path=output_path,
+                        duration=cached_duration
+                    )
+            except Exception as e:
+                logger.warning(f"Stitch cache lookup failed: {e}")
             
-            # Write output file
-            logger.info(f"Writing stitched video to {output_path}...")
-            final_clip.write_videofile(
-                output_path,
-                codec='libx264',
-                audio_codec='aac',
-                fps=30,
-                preset='medium',
-                threads=4
-            )
+            logger.info(f"Stitching {len(video_paths)} video clips...")
             
-            # Get actual duration
-            duration = final_clip.duration
+            # The old file may be hardlinked into the stitch cache; writing over
+            # it in place would corrupt the cached copy
+            Path(output_path).unlink(missing_ok=True)
             
-            # Clean up
-            final_clip.close()
-            for clip in clips:
-                clip.close()
+            infos = await self._probe_clips(video_paths)
+            
+            duration = None
+            if infos is not None and _can_stream_copy(infos):
+                try:
+                    duration = await self._stitch_stream_copy(video_paths, infos, output_path)
+                except Exception as e:
+                    logger.warning(f"Stream-copy stitching failed, re-encoding instead: {e}")
+            
+            if duration is None and infos is not None and settings.hw_accel and cuda_pipeline_available():
+                try:
+                    duration = await self._stitch_on_gpu(video_paths, infos, output_path)
+                except Exception as e:
+                    logger.warning(f"GPU stitching failed, falling back to CPU: {e}")
+            
+            if duration is None and infos is not None:
+                try:
+                    duration = await self._stitch_with_ffmpeg(video_paths, infos, output_path)
+                except Exception as e:
+                    logger.warning(f"ffmpeg stitching failed, falling back to MoviePy: {e}")
+            
+            if duration is None:
+                duration = await self._stitch_with_moviepy(video_paths, output_path)
             
             logger.info(f"Stitched video saved: {output_path} (duration: {duration}s)")
             
+            if cache_key is not None:
+                try:
+                    await asyncio.to_thread(self._store_stitch, cache_key, output_path, duration)
+                except Exception as e:
+                    logger.warning(f"Failed to cache stitched video: {e}")
+            
             return VideoStitchResponse(
                 stitched_video_path=output_path,
                 duration=duration
@@ -126,3 +276,288 @@ class VideoStitcher:
             logger.error(f"Error stitching videos: {str(e)}")
             raise
 
+    def _load_cached_stitch(self, key: str, output_path: str) -> Optional[float]:
+        """Place a cached stitch at output_path; returns its duration, or None on a miss."""
+        video_file = self.cache_dir / f"{key}.mp4"
+        meta_file = self.cache_dir / f"{key}.json"
+        if not (video_file.exists() and meta_file.exists()):
+            return None
+        
+        with open(meta_file, "r") as f:
+            duration = json.load(f)["duration"]
+        
+        if Path(output_path).resolve() != video_file.resolve():
+            _link_or_copy(video_file, Path(output_path))
+        # Refresh mtime so eviction drops least recently used entries first
+        os.utime(video_file)
+        return duration
+    
+    def _store_stitch(self, key: str, output_path: str, duration: float):
+        """Add a finished stitch to the cache, evicting old entries past the size limit."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        _link_or_copy(Path(output_path), self.cache_dir / f"{key}.mp4")
+        with open(self.cache_dir / f"{key}.json", "w") as f:
+            json.dump({"duration": duration}, f)
+        
+        self._evict_stitch_cache()
+    
+    def _evict_stitch_cache(self):
+        """Delete least recently used cached stitches until under settings.stitch_cache_max_bytes."""
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".mp4"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+                    total += stat.st_size
+        
+        for _, size, path in sorted(entries):
+            if total <= settings.stitch_cache_max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            path.with_suffix(".json").unlink(missing_ok=True)
+            total -= size
+    
+    async def _probe_clips(self, video_paths: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """Probe all clips concurrently with ffprobe; None if probing isn't possible."""
+        try:
+            return list(await asyncio.gather(
+                *(asyncio.to_thread(probe_media, path) for path in video_paths)
+            ))
+        except Exception as e:
+            logger.debug(f"Could not probe clips, using MoviePy: {e}")
+            return None
+    
+    async def _stitch_stream_copy(
+        self,
+        video_paths: List[str],
+        infos: List[Dict[str, Any]],
+        output_path: str
+    ) -> float:
+        """
+        Concatenate already-normalized clips with ffmpeg's concat demuxer (-c copy).
+        
+        Args:
+            video_paths: List of paths to video files
+            infos: ffprobe output for each clip
+            output_path: Path to write the stitched video to
+            
+        Returns:
+            Duration of the stitched video in seconds
+        """
+        list_file = tempfile.NamedTemporaryFile(
+            "w", suffix=".txt", dir=Path(output_path).parent, delete=False
+        )
+        try:
+            with list_file:
+                for path in video_paths:
+                    escaped = str(Path(path).resolve()).replace("'", "'\\''")
+                    list_file.write(f"file '{escaped}'\n")
+            
+            logger.info("Clips share format and size; concatenating without re-encoding...")
+            await run_ffmpeg([
+                "-f", "concat", "-safe", "0", "-i", list_file.name,
+                "-c", "copy", "-movflags", "+faststart", output_path,
+            ])
+        finally:
+            os.unlink(list_file.name)
+        
+        return sum(float(info["format"]["duration"]) for info in infos)
+    
+    async def _stitch_on_gpu(
+        self,
+        video_paths: List[str],
+        infos: List[Dict[str, Any]],
+        output_path: str
+    ) -> float:
+        """
+        Stitch clips with a single ffmpeg run that keeps frames in GPU memory.
+        
+        Clips are decoded with NVDEC, resized with scale_cuda, concatenated and
+        encoded with NVENC. Only clips whose aspect ratio differs from 9:16
+        take a round trip to system memory for the crop.
+        
+        Args:
+            video_paths: List of paths to video files
+            infos: ffprobe output for each clip
+            output_path: Path to write the stitched video to
+            
+        Returns:
+            Duration of the stitched video in seconds
+        """
+        with_audio = _clips_have_audio(infos)
+        
+        input_args: List[str] = []
+        filters: List[str] = []
+        concat_inputs = ""
+        duration = 0.0
+        for i, (path, info) in enumerate(zip(video_paths, infos)):
+            video_stream = _streams(info, "video")[0]
+            width, height = int(video_stream["width"]), int(video_stream["height"])
+            duration += float(info["format"]["duration"])
+            
+            input_args += ["-hwaccel", "cuda", "-hwaccel_output_format", "cuda", "-i", path]
+            
+            scaled_width, scaled_height = _cover_size(width, height)
+            chain = f"[{i}:v]scale_cuda={scaled_width}:{scaled_height}"
+            if (scaled_width, scaled_height) != (TARGET_WIDTH, TARGET_HEIGHT):
+                # crop has no CUDA implementation
+                chain += f",hwdownload,format=nv12,crop={TARGET_WIDTH}:{TARGET_HEIGHT},hwupload_cuda"
+            filters.append(f"{chain},setsar=1[v{i}]")
+            concat_inputs += f"[v{i}][{i}:a]" if with_audio else f"[v{i}]"
+        
+        filters.append(
+            f"{concat_inputs}concat=n={len(video_paths)}:v=1:a={int(with_audio)}"
+            + ("[v][a]" if with_audio else "[v]")
+        )
+        
+        args = input_args + ["-filter_complex", ";".join(filters), "-map", "[v]"]
+        if with_audio:
+            args += ["-map", "[a]", "-c:a", "aac"]
+        args += [
+            "-c:v", "h264_nvenc", "-preset", "p4", "-rc", "vbr", "-cq", "24", "-b:v", "0",
+            "-r", "30", "-movflags", "+faststart", output_path,
+        ]
+        
+        logger.info("Stitching on GPU with a single ffmpeg pass...")
+        await run_ffmpeg(args)
+        return duration
+    
+    async def _stitch_with_ffmpeg(
+        self,
+        video_paths: List[str],
+        infos: List[Dict[str, Any]],
+        output_path: str
+    ) -> float:
+        """
+        Stitch clips with a single ffmpeg run using the concat filter.
+        
+        Decoding, scale/crop to 1080x1920 and encoding all happen inside
+        ffmpeg, so no frames pass through Python.
+        
+        Args:
+            video_paths: List of paths to video files
+            infos: ffprobe output for each clip
+            output_path: Path to write the stitched video to
+            
+        Returns:
+            Duration of the stitched video in seconds
+        """
+        with_audio = _clips_have_audio(infos)
+        
+        input_args: List[str] = []
+        filters: List[str] = []
+        concat_inputs = ""
+        for i, path in enumerate(video_paths):
+            input_args += ["-i", path]
+            filters.append(
+                f"[{i}:v]scale={TARGET_WIDTH}:{TARGET_HEIGHT}:force_original_aspect_ratio=increase,"
+                f"crop={TARGET_WIDTH}:{TARGET_HEIGHT},setsar=1,fps=30[v{i}]"
+            )
+            concat_inputs += f"[v{i}][{i}:a]" if with_audio else f"[v{i}]"
+        
+        filters.append(
+            f"{concat_inputs}concat=n={len(video_paths)}:v=1:a={int(with_audio)}"
+            + ("[v][a]" if with_audio else "[v]")
+        )
+        
+        args = input_args + ["-filter_complex", ";".join(filters), "-map", "[v]"]
+        if with_audio:
+            args += ["-map", "[a]", "-c:a", "aac"]
+        args += _ffmpeg_encoder_args() + [
+            "-pix_fmt", "yuv420p", "-movflags", "+faststart", output_path,
+        ]
+        
+        logger.info("Stitching with a single ffmpeg pass...")
+        await run_ffmpeg(args)
+        return sum(float(info["format"]["duration"]) for info in infos)
+    
+    def _prepare_clip(self, video_path: str):
+        """Open a clip with MoviePy and normalize it to the target frame size."""
+        # Resized by the ffmpeg decoder, so full-resolution frames never reach Python
+        moviepy = _moviepy()
+        clip = moviepy.VideoFileClip(
+            video_path,
+            target_resolution=moviepy.decode_resolution,
+            resize_algorithm="bilinear"
+        )
+        
+        if clip.w != TARGET_WIDTH:
+            # Crop horizontally to center
+            x_center = clip.w / 2
+            clip = _crop_clip(clip, x_center=x_center, width=TARGET_WIDTH)
+        
+        return clip
+    
+    async def _load_clips(self, video_paths: List[str]) -> list:
+        """
+        Open and normalize all clips concurrently, preserving input order.
+        
+        Each distinct path is opened once; repeats (reused scenes) share that clip.
+        """
+        unique_paths = list(dict.fromkeys(video_paths))
+        # Bound concurrency so large batches don't exhaust file descriptors/memory
+        semaphore = asyncio.Semaphore(min(len(unique_paths), os.cpu_count() or 1))
+        
+        async def load(i: int, video_path: str):
+            async with semaphore:
+                logger.debug(f"Loading clip {i+1}/{len(unique_paths)}: {video_path}")
+                return await asyncio.to_thread(self._prepare_clip, video_path)
+        
+        results = await asyncio.gather(
+            *(load(i, path) for i, path in enumerate(unique_paths)),
+            return_exceptions=True
+        )
+        
+        clips = [r for r in results if not isinstance(r, BaseException)]
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            for clip in clips:
+                clip.close()
+            raise errors[0]
+        by_path = dict(zip(unique_paths, clips))
+        return [by_path[path] for path in video_paths]
+    
+    async def _stitch_with_moviepy(self, video_paths: List[str], output_path: str) -> float:
+        """
+        Stitch clips by decoding, resizing and re-encoding them with MoviePy.
+        
+        Args:
+            video_paths: List of paths to video files
+            output_path: Path to write the stitched video to
+            
+        Returns:
+            Duration of the stitched video in seconds
+        """
+        clips = await self._load_clips(video_paths)
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_STITCH_POOL, self._write_clips, clips, output_path)
+    
+    def _write_clips(self, clips: list, output_path: str) -> float:
+        """Concatenate loaded clips and encode them to output_path (blocking); closes the clips."""
+        try:
+            # Concatenate clips
+            # "chain" skips the compositor; only safe when every clip has the same size
+            logger.info("Concatenating video clips...")
+            uniform = all((clip.w, clip.h) == (TARGET_WIDTH, TARGET_HEIGHT) for clip in clips)
+            final_clip = _moviepy().concatenate_videoclips(clips, method="chain" if uniform else "compose")
+            
+            # Write output file
+            logger.info(f"Writing stitched video to {output_path}...")
+            final_clip.write_videofile(
+                output_path,
+                audio_codec='aac',
+                fps=30,
+                **_encoder_options()
+            )
+            
+            # Get actual duration
+            duration = final_clip.duration
+            final_clip.close()
+            return duration
+        finally:
+            # Clean up (clips shared by repeated paths are closed once)
+            for clip in {id(clip): clip for clip in clips}.values():
+                clip.close()
@@ -1,8 +1,15 @@
 """YouTube service for searching videos and retrieving transcripts."""
+import asyncio
+import html
+import json
 import logging
 import re
+import threading
+import time
+import xml.etree.ElementTree as ET
 import requests
-from typing import List, Optional
+from requests.adapters import HTTPAdapter
+from typing import Any, Dict, List, Optional, Tuple
 from googleapiclient.discovery import build
 from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound
@@ -11,6 +18,55 @@ from app.core.cache import cache
 
 logger = logging.getLogger(__name__)
 
+# Max transcript fetches in flight per batch; higher values start drawing 429s from YouTube
+TRANSCRIPT_CONCURRENCY = 8
+
+# videos.list accepts at most 50 IDs per call
+VIDEOS_LIST_MAX_IDS = 50
+
+# Patterns for the timedtext fallback, matched against raw bytes so the multi-MB
+# watch page never has to be decoded as a whole.
+_CAPTION_TRACKS_KEY_RE = re.compile(rb'"captionTracks":\s*')
+# Bytes after the key decoded per attempt; the array is usually a few KiB
+_CAPTION_TRACKS_WINDOW = 64 * 1024
+
+# Shared session so timedtext fallbacks reuse TLS connections to youtube.com
+_SESSION = requests.Session()
+_SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9'
+})
+_SESSION.mount('https://', HTTPAdapter(pool_connections=32, pool_maxsize=32))
+_REQUEST_TIMEOUT = 10
+
+# Parsed caption tracks ({languageCode: baseUrl}) per video, so retries in another
+# language don't re-download the watch page: video_id -> (expires_at, tracks)
+_CAPTION_TRACKS_TTL = 600
+_CAPTION_TRACKS_MAX_ENTRIES = 256
+_caption_tracks_cache: Dict[str, Tuple[float, Dict[str, str]]] = {}
+_caption_tracks_lock = threading.Lock()
+
+
+def _decode_json_at(content: bytes, start: int) -> Any:
+    """
+    Decode the JSON value starting at content[start:] without decoding the rest.
+
+    Only a bounded window is decoded, and it is grown only if the value does
+    not fit in it.
+    """
+    decoder = json.JSONDecoder()
+    window = _CAPTION_TRACKS_WINDOW
+    while True:
+        end = start + window
+        text = content[start:end].decode('utf-8', errors='replace')
+        try:
+            value, _ = decoder.raw_decode(text)
+            return value
+        except json.JSONDecodeError:
+            if end >= len(content):
+                raise
+            window *= 4
+
 
 class YouTubeService:
     """Service for interacting with YouTube API and transcripts."""
@@ -42,7 +98,9 @@ class YouTubeService:
         cached_results = cache.get_search_results(query, max_results)
         if cached_results is not None:
             # Convert cached dict back to VideoInfo objects
-            return [VideoInfo(**video) for video in cached_results]
+            videos = [VideoInfo(**video) for video in cached_results]
+            self._remember_video_details(videos)
+            return videos
         
         try:
             # Search for videos with podcast-related keywords
@@ -90,6 +148,9 @@ class YouTubeService:
             
             logger.info(f"Found {len(videos)} videos for query: {query}")
             
+            # Let a follow-up transcript request skip its own videos.list call
+            self._remember_video_details(videos)
+            
             # Cache the results (convert VideoInfo to dict for JSON serialization)
             cache.set_search_results(
                 query, 
@@ -103,54 +164,148 @@ class YouTubeService:
             logger.error(f"Error searching YouTube: {str(e)}")
             raise
     
-    def _get_transcript_via_timedtext(self, video_id: str) -> Optional[str]:
+    def _remember_video_details(self, videos: List[VideoInfo]):
+        """Store search result details in the shared video details cache."""
+        cache.set_video_details({
+            video.video_id: {
+                'title': video.title,
+                'description': video.description,
+                'duration': video.duration
+            }
+            for video in videos
+        })
+    
+    def _list_video_details(self, video_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch details for up to 50 videos with a single videos.list call."""
+        videos_response = self.youtube.videos().list(
+            part='snippet,contentDetails',
+            id=','.join(video_ids)
+        ).execute()
+        
+        return {
+            item['id']: {
+                'title': item['snippet']['title'],
+                'description': item['snippet'].get('description', ''),
+                'duration': item['contentDetails']['duration']
+            }
+            for item in videos_response.get('items', [])
+        }
+    
+    async def _get_video_details(self, video_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get title/description/duration for videos.
+        
+        Served from the cache where possible; misses are fetched in chunks of
+        50 IDs, one after another in a single worker thread (the discovery
+        client is not thread-safe, so chunks can't share it concurrently).
+        
+        Args:
+            video_ids: YouTube video IDs
+            
+        Returns:
+            Mapping of video ID to details (missing IDs are omitted)
+        """
+        video_details = cache.get_video_details(video_ids)
+        missing = [video_id for video_id in dict.fromkeys(video_ids) if video_id not in video_details]
+        if not missing:
+            return video_details
+        
+        chunks = [
+            missing[i:i + VIDEOS_LIST_MAX_IDS]
+            for i in range(0, len(missing), VIDEOS_LIST_MAX_IDS)
+        ]
+        fetched = await asyncio.to_thread(self._list_video_details_chunks, chunks)
+        cache.set_video_details(fetched)
+        video_details.update(fetched)
+        
+        return video_details
+    
+    def _list_video_details_chunks(self, chunks: List[List[str]]) -> Dict[str, Dict[str, Any]]:
+        """Fetch details for each chunk of IDs in turn, skipping chunks that fail."""
+        fetched = {}
+        for chunk in chunks:
+            try:
+                fetched.update(self._list_video_details(chunk))
+            except Exception as e:
+                logger.error(f"Error fetching video details: {str(e)}")
+        return fetched
+    
+    def _get_caption_tracks(self, video_id: str) -> Optional[Dict[str, str]]:
+        """
+        Get the caption tracks listed on a video's watch page.
+        
+        Results are cached briefly per video.
+        
+        Returns:
+            Mapping of language code to timedtext URL (in page order), or
+            None if the page couldn't be fetched
+        """
+        now = time.monotonic()
+        with _caption_tracks_lock:
+            entry = _caption_tracks_cache.get(video_id)
+            if entry is not None and entry[0] >= now:
+                return entry[1]
+        
+        # Get the video page to extract caption track info
+        video_url = f"https://www.youtube.com/watch?v={video_id}"
+        response = _SESSION.get(video_url, timeout=_REQUEST_TIMEOUT)
+        
+        if response.status_code != 200:
+            return None
+        
+        tracks = {}
+        key_match = _CAPTION_TRACKS_KEY_RE.search(response.content)
+        if key_match:
+            # Parse the JSON array in place; the decoder stops at its closing bracket
+            caption_tracks = _decode_json_at(response.content, key_match.end())
+            for track in caption_tracks:
+                if 'baseUrl' in track and 'languageCode' in track:
+                    tracks.setdefault(track['languageCode'], track['baseUrl'])
+        
+        with _caption_tracks_lock:
+            _caption_tracks_cache.pop(video_id, None)
+            _caption_tracks_cache[video_id] = (now + _CAPTION_TRACKS_TTL, tracks)
+            while len(_caption_tracks_cache) > _CAPTION_TRACKS_MAX_ENTRIES:
+                del _caption_tracks_cache[next(iter(_caption_tracks_cache))]
+        
+        return tracks
+    
+    def _get_transcript_via_timedtext(
+        self,
+        video_id: str,
+        languages: Optional[List[str]] = None
+    ) -> Optional[str]:
         """
         Alternative method to get transcript using YouTube's timedtext API.
         This doesn't require cookies and often works when the main API is blocked.
+        
+        Uses the first track matching ``languages``, else the page's first track.
         """
         try:
-            # Get the video page to extract caption track info
-            video_url = f"https://www.youtube.com/watch?v={video_id}"
-            response = requests.get(video_url, headers={
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept-Language': 'en-US,en;q=0.9'
-            })
-            
-            if response.status_code != 200:
+            tracks = self._get_caption_tracks(video_id)
+            if not tracks:
                 return None
             
-            # Look for caption tracks in the page
-            # Find the timedtext URL pattern
-            patterns = [
-                r'"captionTracks":\s*\[(.*?)\]',
-                r'timedtext.*?lang=en',
-            ]
-            
-            html = response.text
+            caption_url = next(
+                (tracks[lang] for lang in (languages or ['en']) if lang in tracks),
+                next(iter(tracks.values()))
+            )
             
-            # Try to find and extract captions URL
-            caption_match = re.search(r'"captionTracks":\s*(\[.*?\])', html)
-            if caption_match:
-                import json
-                try:
-                    # This is a simplified extraction - may need adjustment
-                    caption_data = caption_match.group(1)
-                    # Find baseUrl
-                    url_match = re.search(r'"baseUrl":\s*"([^"]+)"', caption_data)
-                    if url_match:
-                        caption_url = url_match.group(1).replace('\\u0026', '&')
-                        # Fetch the actual captions
-                        caption_response = requests.get(caption_url)
-                        if caption_response.status_code == 200:
-                            # Parse XML captions
-                            text_matches = re.findall(r'<text[^>]*>([^<]*)</text>', caption_response.text)
-                            if text_matches:
-                                transcript = ' '.join(text_matches)
-                                # Clean up HTML entities
-                                transcript = transcript.replace('&#39;', "'").replace('&quot;', '"').replace('&amp;', '&')
-                                return transcript
-                except Exception as e:
-                    logger.debug(f"Caption extraction error: {e}")
+            try:
+                # Fetch the actual captions, parsing the XML as it streams in
+                with _SESSION.get(caption_url, timeout=_REQUEST_TIMEOUT, stream=True) as caption_response:
+                    if caption_response.status_code == 200:
+                        caption_response.raw.decode_content = True
+                        parts = []
+                        for _, elem in ET.iterparse(caption_response.raw):
+                            if elem.tag == 'text':
+                                parts.append(elem.text or '')
+                                elem.clear()
+                        if parts:
+                            # Caption text is entity-escaped a second time inside the XML
+                            return html.unescape(' '.join(parts))
+            except Exception as e:
+                logger.debug(f"Caption extraction error: {e}")
             
             return None
             
@@ -185,8 +340,8 @@ class YouTubeService:
         # Method 1: Try the youtube-transcript-api
         try:
             api = YouTubeTranscriptApi()
-            transcript_obj = api.fetch(video_id, languages=languages)
-            transcript_text = ' '.join([item.text for item in transcript_obj])
+            transcript_obj = await asyncio.to_thread(api.fetch, video_id, languages=languages)
+            transcript_text = ' '.join(item.text for item in transcript_obj)
             logger.info(f"Retrieved transcript for video {video_id} via API")
             
             # Cache the transcript
@@ -201,7 +356,9 @@ class YouTubeService:
             
             # Method 2: Try the timedtext fallback
             logger.info(f"Trying timedtext fallback for {video_id}")
-            transcript = self._get_transcript_via_timedtext(video_id)
+            transcript = await asyncio.to_thread(
+                self._get_transcript_via_timedtext, video_id, languages
+            )
             if transcript:
                 logger.info(f"Retrieved transcript for video {video_id} via timedtext fallback")
                 
@@ -255,29 +412,26 @@ class YouTubeService:
         """
         transcripts = []
         
-        # Get video details first
-        video_details = {}
-        try:
-            videos_response = self.youtube.videos().list(
-                part='snippet,contentDetails',
-                id=','.join(video_ids)
-            ).execute()
-            
-            video_details = {
-                item['id']: {
-                    'title': item['snippet']['title'],
-                    'description': item['snippet'].get('description', ''),
-                    'duration': item['contentDetails']['duration']
-                }
-                for item in videos_response.get('items', [])
-            }
-        except Exception as e:
-            logger.error(f"Error fetching video details: {str(e)}")
+        # Get video details first (usually cached by the preceding search)
+        video_details = await self._get_video_details(video_ids)
+        
+        # Fetch transcripts concurrently, bounded to stay under YouTube's rate limits
+        semaphore = asyncio.Semaphore(TRANSCRIPT_CONCURRENCY)
+        
+        async def fetch(video_id: str) -> Optional[str]:
+            async with semaphore:
+                return await self.get_transcript(video_id, languages)
+        
+        results = await asyncio.gather(
+            *(fetch(video_id) for video_id in video_ids),
+            return_exceptions=True
+        )
         
-        # Fetch transcripts for each video
         failed_count = 0
-        for video_id in video_ids:
-            transcript_text = await self.get_transcript(video_id, languages)
+        for video_id, transcript_text in zip(video_ids, results):
+            if isinstance(transcript_text, Exception):
+                logger.warning(f"Transcript fetch failed for {video_id}: {str(transcript_text)}")
+                transcript_text = None
             
             if not transcript_text:
                 failed_count += 1
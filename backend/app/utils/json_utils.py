@@ -0,0 +1,55 @@
+"""Helpers for parsing JSON out of LLM responses."""
+
+import json
+import logging
+import re
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# First fenced code block (```json ... ``` or ``` ... ```)
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+_DECODER = json.JSONDecoder()
+
+
+def extract_json_text(response_text: str) -> str:
+    """Return the contents of the first code fence, or the whole response if there is none."""
+    match = _FENCE_RE.search(response_text)
+    return (match.group(1) if match else response_text).strip()
+
+
+def parse_json_response(response_text: str) -> Any:
+    """
+    Extract and parse JSON from a model response.
+
+    Parsed with orjson when it's installed. Text after the JSON value
+    (e.g. trailing prose) is ignored.
+
+    Raises:
+        ValueError: If the response does not start with valid JSON
+    """
+    if orjson is not None:
+        # Schema-constrained replies are bare JSON; parse them without looking for
+        # fences (which a string value could legitimately contain)
+        try:
+            return orjson.loads(response_text)
+        except orjson.JSONDecodeError:
+            pass
+    json_str = extract_json_text(response_text)
+    if orjson is not None:
+        try:
+            return orjson.loads(json_str)
+        except orjson.JSONDecodeError:
+            pass  # Possibly trailing prose; raw_decode stops at the end of the value
+    try:
+        result, _ = _DECODER.raw_decode(json_str)
+        return result
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse JSON: {e}\nResponse: {json_str[:500]}")
+        raise ValueError(f"Invalid JSON response from model: {str(e)}")
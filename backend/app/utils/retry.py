@@ -0,0 +1,98 @@
+"""Retry helper for transient failures from external APIs."""
+
+import logging
+from typing import Awaitable, Callable, TypeVar
+import httpx
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential,
+    wait_random,
+)
+from google.api_core import exceptions as api_exceptions
+from google.genai import errors as genai_errors
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Rate limits, 5xx and deadline errors from the Google SDKs (gRPC/REST) and network errors.
+# Plain TimeoutError is left out: VeoService raises it when a render exceeds its wait budget.
+RETRYABLE_EXCEPTIONS = (
+    api_exceptions.TooManyRequests,
+    api_exceptions.InternalServerError,
+    api_exceptions.BadGateway,
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.GatewayTimeout,
+    genai_errors.ServerError,
+    httpx.TransportError,
+    ConnectionError,
+)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Check whether an error is transient and worth retrying."""
+    if isinstance(error, genai_errors.ClientError):
+        return error.code == 429
+    return isinstance(error, RETRYABLE_EXCEPTIONS)
+
+
+# Errors raised before a request reached the server, so a retry cannot duplicate it
+NOT_SENT_EXCEPTIONS = (
+    api_exceptions.TooManyRequests,
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    ConnectionRefusedError,
+)
+
+
+def is_submit_retryable(error: Exception) -> bool:
+    """
+    Check whether a non-idempotent request (e.g. starting a Veo render) is safe to retry.
+
+    Only rate limits and connect-phase errors qualify; a 5xx or a dropped
+    connection may come after the server already accepted the request.
+    """
+    if isinstance(error, genai_errors.ClientError):
+        return error.code == 429
+    return isinstance(error, NOT_SENT_EXCEPTIONS)
+
+
+async def with_retries(
+    fn: Callable[[], Awaitable[T]],
+    *,
+    retries: int = 2,
+    base_delay: float = 1.0,
+    retry_if: Callable[[Exception], bool] = is_retryable,
+    description: str = "API call"
+) -> T:
+    """
+    Await fn(), retrying transient errors with exponential backoff and jitter.
+
+    Args:
+        fn: Zero-argument callable returning a fresh awaitable on each call
+        retries: Retries after the first attempt
+        base_delay: Delay before the first retry in seconds (doubles each retry)
+        retry_if: Predicate deciding whether an error is worth retrying
+        description: Name of the call, used in log messages
+
+    Returns:
+        Result of fn()
+    """
+    def log_retry(state: RetryCallState):
+        error = state.outcome.exception()
+        logger.warning(
+            f"{description} failed ({type(error).__name__}: {error}); "
+            f"retry {state.attempt_number}/{retries} in {state.next_action.sleep:.1f}s"
+        )
+
+    retrying = AsyncRetrying(
+        stop=stop_after_attempt(retries + 1),
+        wait=wait_exponential(multiplier=base_delay) + wait_random(0, 0.5 * base_delay),
+        retry=retry_if_exception(retry_if),
+        before_sleep=log_retry,
+        reraise=True,
+    )
+    return await retrying(fn)
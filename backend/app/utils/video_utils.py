@@ -1,29 +1,52 @@
 """Video processing utilities."""
 
+import asyncio
+import json
 import os
+import re
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, List
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=64)
 def ensure_directory(path: str) -> Path:
-    """Ensure directory exists, create if it doesn't."""
+    """
+    Ensure directory exists, create if it doesn't.
+
+    Cached per path, so repeated calls skip the mkdir. Call
+    ensure_directory.cache_clear() if a directory is removed at runtime.
+    """
     dir_path = Path(path)
     dir_path.mkdir(parents=True, exist_ok=True)
     return dir_path
 
 
+def _remove_temp_file(file_path: str) -> None:
+    """Remove one temporary file, ignoring files that are already gone."""
+    try:
+        os.unlink(file_path)
+        logger.debug(f"Cleaned up temporary file: {file_path}")
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Failed to clean up {file_path}: {e}")
+
+
 def clean_temp_files(file_paths: List[str]) -> None:
-    """Clean up temporary files."""
-    for file_path in file_paths:
-        try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                logger.debug(f"Cleaned up temporary file: {file_path}")
-        except Exception as e:
-            logger.warning(f"Failed to clean up {file_path}: {e}")
+    """Clean up temporary files (in parallel, which helps on slow/network storage)."""
+    if len(file_paths) <= 1:
+        for file_path in file_paths:
+            _remove_temp_file(file_path)
+        return
+    with ThreadPoolExecutor(max_workers=min(8, len(file_paths))) as executor:
+        list(executor.map(_remove_temp_file, file_paths))
 
 
 def get_output_path(output_dir: str, filename: str, ensure_exists: bool = True) -> str:
@@ -32,3 +55,138 @@ def get_output_path(output_dir: str, filename: str, ensure_exists: bool = True)
         ensure_directory(output_dir)
     return str(Path(output_dir) / filename)
 
+
+
+def get_ffmpeg_binary() -> str:
+    """Get the ffmpeg executable used by MoviePy (bundled with imageio-ffmpeg)."""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return "ffmpeg"
+
+
+@lru_cache(maxsize=1)
+def nvenc_available() -> bool:
+    """
+    Check whether ffmpeg can encode with NVIDIA NVENC (h264_nvenc).
+
+    The encoder being compiled in is not enough (there may be no GPU), so a
+    tiny test encode is run. The result is cached for the process lifetime.
+    """
+    cmd = [
+        get_ffmpeg_binary(), "-hide_banner", "-loglevel", "error",
+        "-f", "lavfi", "-i", "color=black:s=256x256:d=0.1",
+        "-c:v", "h264_nvenc", "-f", "null", "-",
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, timeout=15)
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.debug(f"NVENC probe failed: {e}")
+        return False
+    available = result.returncode == 0
+    logger.info(f"NVENC hardware encoding {'available' if available else 'not available'}")
+    return available
+
+
+def get_ffprobe_binary() -> str:
+    """Get the ffprobe executable (imageio-ffmpeg does not bundle one)."""
+    return shutil.which("ffprobe") or "ffprobe"
+
+
+@lru_cache(maxsize=1)
+def cuda_pipeline_available() -> bool:
+    """
+    Check whether ffmpeg can scale frames on the GPU (scale_cuda) and encode with NVENC.
+
+    The result is cached for the process lifetime.
+    """
+    cmd = [
+        get_ffmpeg_binary(), "-hide_banner", "-loglevel", "error",
+        "-init_hw_device", "cuda=gpu", "-filter_hw_device", "gpu",
+        "-f", "lavfi", "-i", "color=black:s=256x256:d=0.1",
+        "-vf", "format=nv12,hwupload_cuda,scale_cuda=128:128",
+        "-c:v", "h264_nvenc", "-f", "null", "-",
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, timeout=15)
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.debug(f"CUDA pipeline probe failed: {e}")
+        return False
+    available = result.returncode == 0
+    logger.info(f"CUDA decode/scale pipeline {'available' if available else 'not available'}")
+    return available
+
+
+def probe_media(path: str) -> Dict[str, Any]:
+    """Return ffprobe's stream and format information for a media file."""
+    output = subprocess.check_output(
+        [
+            get_ffprobe_binary(), "-v", "error",
+            "-show_streams", "-show_format",
+            "-of", "json", path,
+        ],
+        timeout=30,
+    )
+    return json.loads(output)
+
+
+# "Duration: 00:01:02.35" in ffmpeg's header dump
+_DURATION_RE = re.compile(rb"Duration: (\d+):(\d{2}):(\d{2}(?:\.\d+)?)")
+
+
+@lru_cache(maxsize=512)
+def _probe_duration(path: str, mtime_ns: int, size: int) -> float:
+    try:
+        output = subprocess.check_output(
+            [
+                get_ffprobe_binary(), "-v", "error",
+                "-show_entries", "format=duration",
+                "-of", "csv=p=0", path,
+            ],
+            timeout=30,
+        )
+        return float(output)
+    except (OSError, subprocess.SubprocessError, ValueError) as e:
+        logger.debug(f"Could not probe {path} with ffprobe, parsing ffmpeg output: {e}")
+    # ffmpeg with no output file prints the header dump and exits non-zero
+    result = subprocess.run(
+        [get_ffmpeg_binary(), "-hide_banner", "-i", path],
+        capture_output=True,
+        timeout=30,
+    )
+    match = _DURATION_RE.search(result.stderr)
+    if match is None:
+        raise ValueError(f"Could not determine duration of {path}")
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def probe_duration(path: str) -> float:
+    """
+    Get a media file's duration in seconds from its container header.
+
+    Uses ffprobe when installed, otherwise the duration line of ffmpeg's
+    header dump. No decoder is set up. Results are cached per file version
+    (path, mtime, size), so re-probing an unchanged clip is free.
+    """
+    stat = os.stat(path)
+    return _probe_duration(path, stat.st_mtime_ns, stat.st_size)
+
+
+async def run_ffmpeg(args: List[str]) -> None:
+    """
+    Run ffmpeg with the given arguments without blocking the event loop.
+
+    Raises:
+        RuntimeError: If ffmpeg exits with a non-zero status
+    """
+    process = await asyncio.create_subprocess_exec(
+        get_ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-y", *args,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    _, stderr = await process.communicate()
+    if process.returncode != 0:
+        message = stderr.decode(errors="replace").strip()[-2000:]
+        raise RuntimeError(f"ffmpeg exited with status {process.returncode}: {message}")
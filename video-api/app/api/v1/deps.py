@@ -0,0 +1,101 @@
+"""FastAPI dependencies for dependency injection.
+
+Services are built lazily on first use and then shared for the life of the
+process, so their API clients and connection pools are reused across requests.
+"""
+import importlib.util
+from functools import lru_cache
+
+import httpx
+
+from app.core.config import settings
+from app.services.snippet_extractor import SnippetExtractor
+from app.services.scene_generator import SceneGenerator
+from app.services.veo_service import VeoService
+from app.services.audio_service import AudioService
+from app.services.video_stitcher import VideoStitcher
+from app.services.audio_sync import AudioSync
+from app.services.hls_service import HLSService
+from app.services.pipeline_jobs import PipelineJobRegistry
+
+
+@lru_cache
+def get_http_client() -> httpx.Client:
+    """
+    Get the process-wide HTTP client.
+    
+    One keep-alive pool for REST calls to Google APIs; HTTP/2 is used when
+    the h2 package is installed.
+    """
+    return httpx.Client(
+        http2=importlib.util.find_spec("h2") is not None,
+        timeout=httpx.Timeout(720.0, connect=10.0),
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+    )
+
+
+def close_http_client() -> None:
+    """Close the shared HTTP client if it was created."""
+    if get_http_client.cache_info().currsize:
+        get_http_client().close()
+        get_http_client.cache_clear()
+
+
+@lru_cache
+def get_snippet_extractor() -> SnippetExtractor:
+    """Get snippet extractor instance."""
+    return SnippetExtractor(settings.gemini_api_key)
+
+
+@lru_cache
+def get_scene_generator() -> SceneGenerator:
+    """Get scene generator instance."""
+    return SceneGenerator(settings.gemini_api_key)
+
+
+@lru_cache
+def get_veo_service() -> VeoService:
+    """Get Veo service instance."""
+    return VeoService(settings.gemini_api_key, http_client=get_http_client())
+
+
+@lru_cache
+def get_audio_service() -> AudioService:
+    """Get Google TTS audio service instance."""
+    return AudioService(settings.google_tts_api_key)
+
+
+@lru_cache
+def get_video_stitcher() -> VideoStitcher:
+    """Get video stitcher instance."""
+    return VideoStitcher()
+
+
+@lru_cache
+def get_audio_sync() -> AudioSync:
+    """Get audio sync instance."""
+    return AudioSync()
+
+
+@lru_cache
+def get_hls_service() -> HLSService:
+    """Get HLS service instance (holds the registry of streamed jobs)."""
+    return HLSService()
+
+
+@lru_cache
+def get_pipeline_jobs() -> PipelineJobRegistry:
+    """Get the registry of running SSE pipeline jobs."""
+    return PipelineJobRegistry()
+
+
+def warm_up_services() -> None:
+    """Build every service up front so the first request doesn't pay init cost."""
+    get_snippet_extractor()
+    get_scene_generator()
+    get_veo_service()
+    get_audio_service()
+    get_video_stitcher()
+    get_audio_sync()
+    get_hls_service()
+    get_pipeline_jobs()
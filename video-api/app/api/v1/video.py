@@ -1,9 +1,14 @@
 """Video generation API endpoints."""
 
+import asyncio
+import json
 import logging
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-from app.core.config import settings
+import time
+import uuid
+from contextlib import aclosing
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import FileResponse, StreamingResponse
+from typing import Any, Callable, Dict, List, Optional
 from app.models.schemas import (
     TranscriptInput,
     SnippetExtractionResponse,
@@ -16,6 +21,8 @@ from app.models.schemas import (
     AudioSyncResponse,
     VideoGenerationRequest,
     VideoGenerationFullResponse,
+    VideoStreamResponse,
+    JobCancelResponse,
     Snippet,
     SceneDescription,
 )
@@ -25,24 +32,29 @@ from app.services.veo_service import VeoService
 from app.services.audio_service import AudioService
 from app.services.video_stitcher import VideoStitcher
 from app.services.audio_sync import AudioSync
+from app.services.hls_service import HLSService, HLSStream, PLAYLIST_NAME
+from app.services.pipeline_jobs import PipelineJob, PipelineJobRegistry
+from app.api.v1.deps import (
+    get_snippet_extractor,
+    get_scene_generator,
+    get_veo_service,
+    get_audio_service,
+    get_video_stitcher,
+    get_audio_sync,
+    get_hls_service,
+    get_pipeline_jobs,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Initialize services
-snippet_extractor = SnippetExtractor(settings.gemini_api_key)
-scene_generator = SceneGenerator(settings.gemini_api_key)
-veo_service = VeoService(settings.gemini_api_key)
-audio_service = AudioService(settings.elevenlabs_api_key)
-video_stitcher = VideoStitcher()
-audio_sync = AudioSync()
-
 
 @router.post("/extract-snippets", response_model=SnippetExtractionResponse)
 async def extract_snippets(
     transcript_input: TranscriptInput,
-    max_snippets: int = 5
+    max_snippets: int = 5,
+    snippet_extractor: SnippetExtractor = Depends(get_snippet_extractor)
 ):
     """
     Extract interesting snippets from transcript.
@@ -66,7 +78,10 @@ async def extract_snippets(
 
 
 @router.post("/generate-scenes", response_model=SceneGenerationResponse)
-async def generate_scenes(snippets: List[Snippet]):
+async def generate_scenes(
+    snippets: List[Snippet],
+    scene_generator: SceneGenerator = Depends(get_scene_generator)
+):
     """
     Generate 8-second scene descriptions from snippets.
     
@@ -85,7 +100,10 @@ async def generate_scenes(snippets: List[Snippet]):
 
 
 @router.post("/generate-videos", response_model=VideoGenerationResponse)
-async def generate_videos(scenes: List[SceneDescription]):
+async def generate_videos(
+    scenes: List[SceneDescription],
+    veo_service: VeoService = Depends(get_veo_service)
+):
     """
     Generate video clips using Veo 3.1.
     
@@ -106,7 +124,8 @@ async def generate_videos(scenes: List[SceneDescription]):
 @router.post("/generate-audio", response_model=AudioGenerationResponse)
 async def generate_audio(
     scenes: List[SceneDescription],
-    voice_id: str = None
+    voice_id: str = None,
+    audio_service: AudioService = Depends(get_audio_service)
 ):
     """
     Generate audio clips using ElevenLabs.
@@ -127,7 +146,10 @@ async def generate_audio(
 
 
 @router.post("/stitch-videos", response_model=VideoStitchResponse)
-async def stitch_videos(request: VideoStitchRequest):
+async def stitch_videos(
+    request: VideoStitchRequest,
+    video_stitcher: VideoStitcher = Depends(get_video_stitcher)
+):
     """
     Stitch multiple video clips into a single video.
     
@@ -149,7 +171,10 @@ async def stitch_videos(request: VideoStitchRequest):
 
 
 @router.post("/add-audio", response_model=AudioSyncResponse)
-async def add_audio(request: AudioSyncRequest):
+async def add_audio(
+    request: AudioSyncRequest,
+    audio_sync: AudioSync = Depends(get_audio_sync)
+):
     """
     Add audio to video, ensuring perfect synchronization.
     
@@ -171,10 +196,128 @@ async def add_audio(request: AudioSyncRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _run_pipeline(
+    request: VideoGenerationRequest,
+    snippet_extractor: SnippetExtractor,
+    scene_generator: SceneGenerator,
+    veo_service: VeoService,
+    audio_service: AudioService,
+    video_stitcher: VideoStitcher,
+    audio_sync: AudioSync,
+    emit: Callable[[str, Dict[str, Any]], None] = lambda event, data: None,
+    run_id: Optional[str] = None
+) -> VideoGenerationFullResponse:
+    """
+    Run the full pipeline, reporting each finished stage through emit.
+    
+    Every file the run writes is prefixed with its run ID, since concurrent
+    runs share the services' output directories.
+    
+    Args:
+        request: VideoGenerationRequest with transcript
+        emit: Callback receiving (event name, JSON-serializable payload)
+        run_id: Prefix for output filenames (a fresh ID if not given)
+        
+    Returns:
+        VideoGenerationFullResponse with complete pipeline results
+    """
+    filename_prefix = f"{run_id or uuid.uuid4().hex}_"
+    logger.info(f"Starting full video generation pipeline {filename_prefix[:-1]}...")
+    
+    # Step 1: Extract snippets
+    transcript_input = TranscriptInput(
+        transcript=request.transcript,
+        format=request.transcript_format
+    )
+    snippets_response = await snippet_extractor.extract_snippets(
+        transcript_input,
+        max_snippets=request.max_snippets or 5
+    )
+    snippets = snippets_response.snippets
+    logger.info(f"Extracted {len(snippets)} snippets")
+    emit("snippets_ready", snippets_response.model_dump(mode="json"))
+    
+    # Step 2: Generate scenes. They stream out of Gemini and each one goes to Veo
+    # as soon as it is parsed, so rendering starts while later scenes are written.
+    scenes: List[SceneDescription] = []
+    audio_task: Optional[asyncio.Task] = None
+    
+    async def scene_feed():
+        nonlocal audio_task
+        async with aclosing(scene_generator.iter_scenes(snippets)) as generated:
+            async for scene in generated:
+                scenes.append(scene)
+                yield scene
+        logger.info(f"Generated {len(scenes)} scenes")
+        scenes_response = SceneGenerationResponse(
+            scenes=scenes,
+            total_duration=sum(scene.duration for scene in scenes)
+        )
+        emit("scenes_ready", scenes_response.model_dump(mode="json"))
+        
+        # Step 4: Narration only depends on the scenes, so it runs while clips render
+        audio_task = asyncio.create_task(
+            audio_service.generate_audio_clips(
+                scenes,
+                voice_id=request.voice_id,
+                on_scene_done=lambda scene: emit("audio_scene_done", scene.model_dump(mode="json")),
+                filename_prefix=filename_prefix
+            )
+        )
+    
+    # Step 3: Generate videos. Each clip is normalized into the stitch as soon as
+    # it is ready, while later clips render.
+    session = video_stitcher.start_session()
+    try:
+        video_scenes = []
+        try:
+            async with aclosing(veo_service.iter_completed(scene_feed(), filename_prefix=filename_prefix)) as completed:
+                async for video_scene in completed:
+                    emit("video_scene_done", video_scene.model_dump(mode="json"))
+                    await video_stitcher.append(session, video_scene.file_path)
+                    video_scenes.append(video_scene)
+        except BaseException:
+            if audio_task is not None:
+                audio_task.cancel()
+            raise
+        logger.info(f"Generated and stitched {len(video_scenes)} video clips")
+        
+        audio_response = await audio_task
+        audio_scenes = audio_response.audio_scenes
+        logger.info(f"Generated {len(audio_scenes)} audio clips")
+        
+        # Step 5: Lay the narration over the stitched clips (video is stream-copied)
+        audio_paths = [as_.file_path for as_ in audio_scenes]
+        final_response = await audio_sync.assemble_session(
+            session, audio_paths, filename_prefix=filename_prefix
+        )
+    finally:
+        video_stitcher.close_session(session)
+    final_video_path = final_response.final_video_path
+    logger.info(f"Final video with audio: {final_video_path}")
+    
+    return VideoGenerationFullResponse(
+        snippets=snippets,
+        scenes=scenes,
+        video_scenes=video_scenes,
+        audio_scenes=audio_scenes,
+        final_video_path=final_video_path,
+        total_duration=final_response.duration
+    )
+
+
 @router.post("/generate-video", response_model=VideoGenerationFullResponse)
-async def generate_video(request: VideoGenerationRequest):
+async def generate_video(
+    request: VideoGenerationRequest,
+    snippet_extractor: SnippetExtractor = Depends(get_snippet_extractor),
+    scene_generator: SceneGenerator = Depends(get_scene_generator),
+    veo_service: VeoService = Depends(get_veo_service),
+    audio_service: AudioService = Depends(get_audio_service),
+    video_stitcher: VideoStitcher = Depends(get_video_stitcher),
+    audio_sync: AudioSync = Depends(get_audio_sync)
+):
     """
-    Full pipeline: Extract snippets, generate scenes, create videos and audio, stitch, and sync.
+    Full pipeline: Extract snippets, generate scenes, create videos and audio, stitching clips as they finish, then sync.
     
     Args:
         request: VideoGenerationRequest with transcript
@@ -183,9 +326,144 @@ async def generate_video(request: VideoGenerationRequest):
         VideoGenerationFullResponse with complete pipeline results
     """
     try:
-        logger.info("Starting full video generation pipeline...")
+        return await _run_pipeline(
+            request,
+            snippet_extractor,
+            scene_generator,
+            veo_service,
+            audio_service,
+            video_stitcher,
+            audio_sync
+        )
+    except Exception as e:
+        logger.error(f"Error in full pipeline: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _run_pipeline_job(job: PipelineJob, request: VideoGenerationRequest, *services):
+    """Run the pipeline for an SSE job, ending the event stream with final, error, or cancelled."""
+    try:
+        result = await _run_pipeline(request, *services, emit=job.emit, run_id=job.job_id)
+        job.emit("final", result.model_dump(mode="json"))
+    except asyncio.CancelledError:
+        logger.info(f"Pipeline job {job.job_id} cancelled")
+        job.emit("cancelled", {"job_id": job.job_id})
+    except Exception as e:
+        logger.error(f"Error in pipeline job {job.job_id}: {str(e)}")
+        job.emit("error", {"detail": str(e)})
+
+
+@router.post("/generate-video/events")
+async def generate_video_events(
+    request: VideoGenerationRequest,
+    snippet_extractor: SnippetExtractor = Depends(get_snippet_extractor),
+    scene_generator: SceneGenerator = Depends(get_scene_generator),
+    veo_service: VeoService = Depends(get_veo_service),
+    audio_service: AudioService = Depends(get_audio_service),
+    video_stitcher: VideoStitcher = Depends(get_video_stitcher),
+    audio_sync: AudioSync = Depends(get_audio_sync),
+    pipeline_jobs: PipelineJobRegistry = Depends(get_pipeline_jobs)
+):
+    """
+    Full pipeline with progress streamed as Server-Sent Events.
+    
+    The first event is `job` (carrying the job ID for /generate-video/cancel),
+    followed by `snippets_ready`, `scenes_ready`, `video_scene_done` and
+    `audio_scene_done` per scene, and finally one of `final`, `error` or
+    `cancelled`. Disconnecting cancels the pipeline.
+    
+    Args:
+        request: VideoGenerationRequest with transcript
+        
+    Returns:
+        text/event-stream response
+    """
+    job = pipeline_jobs.create()
+    job.task = asyncio.create_task(_run_pipeline_job(
+        job,
+        request,
+        snippet_extractor,
+        scene_generator,
+        veo_service,
+        audio_service,
+        video_stitcher,
+        audio_sync
+    ))
+    
+    async def event_stream():
+        try:
+            yield _sse("job", {"job_id": job.job_id})
+            while True:
+                event, data = await job.events.get()
+                yield _sse(event, data)
+                if event in ("final", "error", "cancelled"):
+                    break
+        finally:
+            job.cancel()
+            pipeline_jobs.remove(job.job_id)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/generate-video/cancel/{job_id}", response_model=JobCancelResponse)
+async def cancel_video_job(
+    job_id: str,
+    pipeline_jobs: PipelineJobRegistry = Depends(get_pipeline_jobs),
+    hls_service: HLSService = Depends(get_hls_service)
+):
+    """
+    Cancel a running SSE or HLS pipeline job.
+    
+    Args:
+        job_id: Job ID from /generate-video/events or /generate-video/stream
+        
+    Returns:
+        JobCancelResponse with the job's new status
+    """
+    job = pipeline_jobs.get(job_id)
+    if job is not None:
+        job.cancel()
+        return JobCancelResponse(job_id=job_id, status="cancelling")
+    
+    stream = hls_service.get_stream(job_id)
+    if stream is not None:
+        if stream.task is not None and not stream.task.done():
+            stream.task.cancel()
+            return JobCancelResponse(job_id=job_id, status="cancelling")
+        return JobCancelResponse(job_id=job_id, status=stream.status)
+    
+    raise HTTPException(status_code=404, detail="Job not found")
+
+async def _run_video_stream(
+    request: VideoGenerationRequest,
+    stream: HLSStream,
+    snippet_extractor: SnippetExtractor,
+    scene_generator: SceneGenerator,
+    veo_service: VeoService,
+    audio_service: AudioService,
+    hls_service: HLSService
+):
+    """
+    Run the pipeline in the background, publishing each scene to the HLS stream as it is ready.
+    
+    Args:
+        request: VideoGenerationRequest with transcript
+        stream: HLS stream to publish scenes to
+    """
+    audio_tasks: List[asyncio.Task] = []
+    package_tasks: List[asyncio.Task] = []
+    try:
+        stream.status = "processing"
         
-        # Step 1: Extract snippets
         transcript_input = TranscriptInput(
             transcript=request.transcript,
             format=request.transcript_format
@@ -194,53 +472,122 @@ async def generate_video(request: VideoGenerationRequest):
             transcript_input,
             max_snippets=request.max_snippets or 5
         )
-        snippets = snippets_response.snippets
-        logger.info(f"Extracted {len(snippets)} snippets")
         
-        # Step 2: Generate scenes
-        scenes_response = await scene_generator.generate_scenes(snippets)
-        scenes = scenes_response.scenes
-        logger.info(f"Generated {len(scenes)} scenes")
+        # Scenes stream out of Gemini; each one starts its narration and goes to Veo as soon as it is parsed
+        async def scene_feed():
+            async with aclosing(scene_generator.iter_scenes(snippets_response.snippets)) as generated:
+                async for scene in generated:
+                    audio_tasks.append(asyncio.create_task(audio_service.generate_audio(
+                        scene,
+                        voice_id=request.voice_id,
+                        output_filename=f"{stream.job_id}_audio_scene_{scene.scene_number}.mp3"
+                    )))
+                    yield scene
+            logger.info(f"Streaming {len(audio_tasks)} scenes to HLS job {stream.job_id}")
         
-        # Step 3: Generate videos (parallel with audio)
-        videos_response = await veo_service.generate_videos(scenes)
-        video_scenes = videos_response.video_scenes
-        logger.info(f"Generated {len(video_scenes)} video clips")
+        # Clips render concurrently and arrive in scene order; each is packaged while later ones render
+        index = 0
+        async with aclosing(veo_service.iter_completed(
+            scene_feed(), filename_prefix=f"{stream.job_id}_"
+        )) as completed:
+            async for video_scene in completed:
+                audio_scene = await audio_tasks[index]
+                package_tasks.append(asyncio.create_task(hls_service.add_scene(
+                    stream, index, video_scene.file_path, audio_scene.file_path
+                )))
+                index += 1
         
-        # Step 4: Generate audio
-        audio_response = await audio_service.generate_audio_clips(
-            scenes,
-            voice_id=request.voice_id
-        )
-        audio_scenes = audio_response.audio_scenes
-        logger.info(f"Generated {len(audio_scenes)} audio clips")
+        await asyncio.gather(*package_tasks)
+        hls_service.finish(stream)
+        logger.info(f"HLS job {stream.job_id} completed")
         
-        # Step 5: Stitch videos
-        video_paths = [vs.file_path for vs in video_scenes]
-        stitched_response = await video_stitcher.stitch_videos(video_paths)
-        stitched_video_path = stitched_response.stitched_video_path
-        logger.info(f"Stitched videos: {stitched_video_path}")
+    except asyncio.CancelledError:
+        for task in audio_tasks + package_tasks:
+            task.cancel()
+        stream.status = "cancelled"
+        logger.info(f"HLS job {stream.job_id} cancelled")
+    except Exception as e:
+        for task in audio_tasks + package_tasks:
+            task.cancel()
+        stream.status = "failed"
+        stream.error = str(e)
+        logger.error(f"Error in streamed pipeline {stream.job_id}: {str(e)}")
+    finally:
+        stream.finished_at = time.monotonic()
+
+
+@router.post("/generate-video/stream", response_model=VideoStreamResponse)
+async def generate_video_stream(
+    request: VideoGenerationRequest,
+    http_request: Request,
+    snippet_extractor: SnippetExtractor = Depends(get_snippet_extractor),
+    scene_generator: SceneGenerator = Depends(get_scene_generator),
+    veo_service: VeoService = Depends(get_veo_service),
+    audio_service: AudioService = Depends(get_audio_service),
+    hls_service: HLSService = Depends(get_hls_service)
+):
+    """
+    Full pipeline served as HLS: returns a playlist URL immediately.
+    
+    Each scene is appended to the playlist as soon as its video and audio are
+    ready, so playback can start before later scenes have rendered.
+    
+    Args:
+        request: VideoGenerationRequest with transcript
         
-        # Step 6: Combine audio clips and sync with video
-        audio_paths = [as_.file_path for as_ in audio_scenes]
-        final_response = await audio_sync.sync_multiple_audio(
-            stitched_video_path,
-            audio_paths
-        )
-        final_video_path = final_response.final_video_path
-        logger.info(f"Final video with audio: {final_video_path}")
+    Returns:
+        VideoStreamResponse with job ID and playlist URL
+    """
+    stream = hls_service.create_stream()
+    stream.task = asyncio.create_task(_run_video_stream(
+        request,
+        stream,
+        snippet_extractor,
+        scene_generator,
+        veo_service,
+        audio_service,
+        hls_service
+    ))
+    
+    playlist_url = http_request.url_for(
+        "get_video_stream_file", job_id=stream.job_id, filename=PLAYLIST_NAME
+    )
+    return VideoStreamResponse(
+        job_id=stream.job_id,
+        playlist_url=str(playlist_url),
+        status=stream.status
+    )
+
+
+@router.get("/generate-video/stream/{job_id}/{filename}")
+async def get_video_stream_file(
+    job_id: str,
+    filename: str,
+    hls_service: HLSService = Depends(get_hls_service)
+):
+    """
+    Serve the HLS playlist or one of its segments.
+    
+    Args:
+        job_id: Job ID returned by /generate-video/stream
+        filename: playlist.m3u8 or a segment name listed in it
         
-        return VideoGenerationFullResponse(
-            snippets=snippets,
-            scenes=scenes,
-            video_scenes=video_scenes,
-            audio_scenes=audio_scenes,
-            stitched_video_path=stitched_video_path,
-            final_video_path=final_video_path,
-            total_duration=final_response.duration
+    Returns:
+        The requested file
+    """
+    stream = hls_service.get_stream(job_id)
+    if stream is None:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    
+    path = stream.file_path(filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    if filename == PLAYLIST_NAME:
+        # The playlist grows while the job runs, so players must re-fetch it
+        return FileResponse(
+            path,
+            media_type="application/vnd.apple.mpegurl",
+            headers={"Cache-Control": "no-cache"}
         )
-        
-    except Exception as e:
-        logger.error(f"Error in full pipeline: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
+    return FileResponse(path, media_type="video/mp2t")
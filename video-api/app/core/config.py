@@ -1,9 +1,13 @@
 """Application configuration using Pydantic settings."""
 
+from functools import cached_property
 from pathlib import Path
 from typing import List
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# Linux RAM-backed filesystem used for intermediates when use_tmpfs is set
+TMPFS_ROOT = Path("/dev/shm")
+
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
@@ -29,12 +33,44 @@ class Settings(BaseSettings):
     video_output_dir: str = "./video_output"
     audio_output_dir: str = "./audio_output"
     
+    # Intermediate files (scene clips, narration, stitched-but-silent video)
+    use_tmpfs: bool = False  # Keep intermediates in /dev/shm instead of on disk (Linux)
+    tmpfs_ttl_seconds: int = 3600  # Delete tmpfs intermediates older than this
+    hls_ttl_seconds: int = 3600  # Forget finished HLS streams and delete their segments after this
+    
     # Video Generation Settings
     max_scene_duration: int = 8  # seconds (Veo max)
+    hw_accel: bool = True  # Use NVENC for encoding when the GPU/ffmpeg build supports it
+    veo_concurrency: int = 3  # Max Veo renders in flight across all requests
+    encoder_preset: str = "veryfast"  # libx264 preset when re-encoding (slower = smaller files)
+    veo_cache_dir: str = "./veo_cache"  # Rendered clips keyed by prompt (empty to disable)
+    
+    # Text-to-Speech
+    tts_concurrency: int = 8  # Max concurrent Google TTS requests per service
+    tts_cache_dir: str = "./tts_cache"  # Synthesized audio cache (empty to disable)
+    
+    # Gemini
+    llm_concurrency: int = 4  # Max concurrent Gemini requests per service
+    llm_cache_dir: str = "./llm_cache"  # Parsed snippet/scene responses cache (empty to disable)
     
     @property
+    def tmpfs_enabled(self) -> bool:
+        """Whether intermediates go to tmpfs (requested and available)."""
+        return self.use_tmpfs and TMPFS_ROOT.is_dir()
+    
+    @property
+    def scratch_video_dir(self) -> str:
+        """Directory for intermediate video files."""
+        return str(TMPFS_ROOT / "agi_video") if self.tmpfs_enabled else self.video_output_dir
+    
+    @property
+    def scratch_audio_dir(self) -> str:
+        """Directory for intermediate audio files."""
+        return str(TMPFS_ROOT / "agi_audio") if self.tmpfs_enabled else self.audio_output_dir
+    
+    @cached_property
     def cors_origins_list(self) -> List[str]:
-        """Parse CORS origins string into list."""
+        """Parse CORS origins string into list (computed once)."""
         return [origin.strip() for origin in self.cors_origins.split(",")]
 
 
@@ -1,10 +1,15 @@
 """FastAPI application entry point."""
 
+import asyncio
 import logging
+import sys
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.v1 import video
+from app.api.v1.deps import warm_up_services, close_http_client, get_hls_service
+from app.utils.video_utils import remove_stale_files
 
 # Configure logging
 logging.basicConfig(
@@ -14,12 +19,52 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+
+async def sweep_tmpfs():
+    """Periodically delete expired intermediates from tmpfs so they don't pin RAM."""
+    ttl = settings.tmpfs_ttl_seconds
+    while True:
+        await asyncio.sleep(max(60, ttl // 4))
+        for directory in (settings.scratch_video_dir, settings.scratch_audio_dir):
+            removed = await asyncio.to_thread(remove_stale_files, directory, ttl)
+            if removed:
+                logger.info(f"Removed {removed} expired files from {directory}")
+
+
+async def sweep_hls_streams():
+    """Periodically drop finished HLS streams and their segments."""
+    ttl = settings.hls_ttl_seconds
+    while True:
+        await asyncio.sleep(max(60, ttl // 4))
+        removed = await get_hls_service().evict_expired(ttl)
+        if removed:
+            logger.info(f"Removed {removed} expired HLS streams")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build services on startup so the first request doesn't pay client init cost."""
+    warm_up_services()
+    logger.info("Services initialized")
+    sweepers = [asyncio.create_task(sweep_hls_streams())]
+    if settings.tmpfs_enabled:
+        logger.info(f"Writing intermediates to tmpfs ({settings.scratch_video_dir}, {settings.scratch_audio_dir})")
+        sweepers.append(asyncio.create_task(sweep_tmpfs()))
+    yield
+    for sweeper in sweepers:
+        sweeper.cancel()
+        with suppress(asyncio.CancelledError):
+            await sweeper
+    close_http_client()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Video Generation API",
     description="Generate synchronized video-audio content from transcripts using Veo 3.1 and ElevenLabs",
     version="1.0.0",
     debug=settings.debug,
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -58,5 +103,8 @@ if __name__ == "__main__":
         host=settings.host,
         port=settings.port,
         reload=settings.debug,
+        # uvloop has no Windows build; there uvicorn runs on the stdlib loop
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
     )
 
@@ -137,3 +137,16 @@ class VideoGenerationFullResponse(BaseModel):
     final_video_path: str = Field(..., description="Final video with audio")
     total_duration: float = Field(..., description="Total duration in seconds")
 
+
+
+class VideoStreamResponse(BaseModel):
+    """Response model for a streamed (HLS) video generation job."""
+    job_id: str = Field(..., description="Pipeline job ID")
+    playlist_url: str = Field(..., description="HLS playlist URL; segments are appended as scenes finish")
+    status: str = Field(..., description="Job status")
+
+
+class JobCancelResponse(BaseModel):
+    """Response model for cancelling a pipeline job."""
+    job_id: str = Field(..., description="Pipeline job ID")
+    status: str = Field(..., description="Job status after the cancel request")
@@ -1,16 +1,24 @@
 """Service for generating audio using Google Cloud Text-to-Speech."""
 
+import asyncio
 import logging
+import re
+import tempfile
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional
 from google.cloud import texttospeech
 from google.api_core import client_options as client_options_lib
 from app.models.schemas import SceneDescription, AudioScene, AudioGenerationResponse
 from app.core.config import settings
-from app.utils.video_utils import ensure_directory, get_output_path
+from app.services.tts_cache import TTSCache
+from app.utils.retry import with_retries
+from app.utils.video_utils import ensure_directory, get_output_path, run_ffmpeg
 
 logger = logging.getLogger(__name__)
 
+# Sentence boundaries: whitespace following ., ! or ?
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
 
 class AudioService:
     """Service for generating audio using Google Cloud Text-to-Speech."""
@@ -24,7 +32,11 @@ class AudioService:
         client_opts = client_options_lib.ClientOptions(api_key=api_key)
         self.client = texttospeech.TextToSpeechClient(client_options=client_opts)
         self.api_key = api_key
-        self.output_dir = settings.audio_output_dir
+        self.output_dir = settings.scratch_audio_dir
+        # Caps in-flight synthesize_speech calls across all scenes/chunks
+        self._tts_semaphore = asyncio.Semaphore(settings.tts_concurrency)
+        # Identical text/voice/config is served from disk instead of re-synthesized
+        self.tts_cache = TTSCache(settings.tts_cache_dir) if settings.tts_cache_dir else None
     
     def _split_text(self, text: str, max_bytes: int = 4500) -> List[str]:
         """
@@ -42,32 +54,104 @@ class AudioService:
             return [text]
         
         # Split by sentences
-        sentences = text.replace('! ', '!|').replace('? ', '?|').replace('. ', '.|').split('|')
+        sentences = _SENTENCE_SPLIT_RE.split(text)
         
         chunks = []
-        current_chunk = ""
+        current_sentences: List[str] = []
+        current_bytes = 0
         
         for sentence in sentences:
             sentence = sentence.strip()
             if not sentence:
                 continue
             
-            # Check if adding this sentence would exceed limit
-            test_chunk = current_chunk + " " + sentence if current_chunk else sentence
-            if len(test_chunk.encode('utf-8')) <= max_bytes:
-                current_chunk = test_chunk
+            # Check if adding this sentence (plus the joining space) would exceed limit
+            sentence_bytes = len(sentence.encode('utf-8'))
+            added_bytes = sentence_bytes + 1 if current_sentences else sentence_bytes
+            if current_bytes + added_bytes <= max_bytes:
+                current_sentences.append(sentence)
+                current_bytes += added_bytes
             else:
                 # Save current chunk and start new one
-                if current_chunk:
-                    chunks.append(current_chunk)
-                current_chunk = sentence
+                if current_sentences:
+                    chunks.append(" ".join(current_sentences))
+                current_sentences = [sentence]
+                current_bytes = sentence_bytes
         
         # Add remaining chunk
-        if current_chunk:
-            chunks.append(current_chunk)
+        if current_sentences:
+            chunks.append(" ".join(current_sentences))
         
         return chunks
     
+    async def _synthesize(
+        self,
+        text: str,
+        voice: texttospeech.VoiceSelectionParams,
+        audio_config: texttospeech.AudioConfig
+    ) -> bytes:
+        """
+        Synthesize one chunk of text, using the TTS cache when enabled.
+        
+        The blocking synthesize_speech call runs in a worker thread, bounded
+        by the semaphore, and is retried on transient errors.
+        """
+        cache_key = None
+        if self.tts_cache is not None:
+            cache_key = TTSCache.make_key(
+                type(voice).serialize(voice),
+                type(audio_config).serialize(audio_config),
+                text
+            )
+            cached = await asyncio.to_thread(self.tts_cache.get, cache_key)
+            if cached is not None:
+                logger.debug(f"TTS cache hit for {cache_key[:12]}")
+                return cached
+        
+        async def request():
+            async with self._tts_semaphore:
+                return await asyncio.to_thread(
+                    self.client.synthesize_speech,
+                    input=texttospeech.SynthesisInput(text=text),
+                    voice=voice,
+                    audio_config=audio_config
+                )
+        
+        # The semaphore is released while backing off so other chunks can proceed
+        response = await with_retries(request, description="Google TTS request")
+        
+        if cache_key is not None:
+            await asyncio.to_thread(self.tts_cache.put, cache_key, response.audio_content)
+        return response.audio_content
+    
+    async def _concat_segments(self, tasks: List[asyncio.Task], output_file: Path):
+        """
+        Join multi-chunk TTS output into one MP3 with ffmpeg's concat demuxer.
+        
+        Each segment is written to a scratch file as soon as it (and every
+        segment before it) is ready, then remuxed without re-encoding, so the
+        output has a single clean header instead of one per chunk.
+        
+        Args:
+            tasks: Synthesis tasks in playback order
+            output_file: Destination MP3
+        """
+        with tempfile.TemporaryDirectory(dir=output_file.parent) as scratch_dir:
+            scratch = Path(scratch_dir)
+            list_lines = []
+            for i, task in enumerate(tasks):
+                chunk_path = scratch / f"chunk_{i}.mp3"
+                chunk_path.write_bytes(await task)
+                list_lines.append(f"file '{chunk_path.name}'")
+                logger.debug(f"Wrote TTS chunk {i+1}/{len(tasks)}")
+            
+            list_path = scratch / "list.txt"
+            list_path.write_text("\n".join(list_lines) + "\n")
+            await run_ffmpeg([
+                "-f", "concat", "-safe", "0", "-i", str(list_path),
+                "-c", "copy", str(output_file)
+            ])
+    
     async def generate_audio(
         self,
         scene: SceneDescription,
@@ -102,45 +186,36 @@ class AudioService:
             if len(text_chunks) > 1:
                 logger.info(f"Text split into {len(text_chunks)} chunks for TTS")
             
-            audio_segments = []
-            
-            for i, chunk in enumerate(text_chunks):
-                logger.debug(f"Generating TTS for chunk {i+1}/{len(text_chunks)}")
-                
-                # Set the text input to be synthesized
-                synthesis_input = texttospeech.SynthesisInput(text=chunk)
-                
-                # Build the voice request
-                voice = texttospeech.VoiceSelectionParams(
-                    language_code="en-US",
-                    name=voice_id
-                )
-                
-                # Configure audio settings for high quality MP3
-                audio_config = texttospeech.AudioConfig(
-                    audio_encoding=texttospeech.AudioEncoding.MP3,
-                    speaking_rate=1.0,
-                    pitch=0.0,
-                    sample_rate_hertz=24000
-                )
-                
-                # Perform the text-to-speech request
-                response = self.client.synthesize_speech(
-                    input=synthesis_input,
-                    voice=voice,
-                    audio_config=audio_config
-                )
-                
-                audio_segments.append(response.audio_content)
+            # Build the voice request
+            voice = texttospeech.VoiceSelectionParams(
+                language_code="en-US",
+                name=voice_id
+            )
+            
+            # Configure audio settings for high quality MP3
+            audio_config = texttospeech.AudioConfig(
+                audio_encoding=texttospeech.AudioEncoding.MP3,
+                speaking_rate=1.0,
+                pitch=0.0,
+                sample_rate_hertz=24000
+            )
             
-            # Concatenate all audio segments
-            audio_data = b''.join(audio_segments)
+            # Synthesize all chunks concurrently (bounded by the TTS semaphore)
+            tasks = [
+                asyncio.create_task(self._synthesize(chunk, voice, audio_config))
+                for chunk in text_chunks
+            ]
             
-            # Save to file
             output_file = Path(output_path)
             output_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(output_file, 'wb') as f:
-                f.write(audio_data)
+            try:
+                if len(tasks) == 1:
+                    output_file.write_bytes(await tasks[0])
+                else:
+                    await self._concat_segments(tasks, output_file)
+            finally:
+                for task in tasks:
+                    task.cancel()
             
             logger.info(f"Audio saved to {output_path}")
             
@@ -162,7 +237,9 @@ class AudioService:
     async def generate_audio_clips(
         self,
         scenes: List[SceneDescription],
-        voice_id: Optional[str] = None
+        voice_id: Optional[str] = None,
+        on_scene_done: Optional[Callable[[AudioScene], None]] = None,
+        filename_prefix: str = ""
     ) -> AudioGenerationResponse:
         """
         Generate audio clips for all scenes.
@@ -170,6 +247,8 @@ class AudioService:
         Args:
             scenes: List of scene descriptions
             voice_id: Google TTS voice name (uses default if not provided)
+            on_scene_done: Optional callback invoked as each clip finishes
+            filename_prefix: Prefix for clip filenames, so concurrent jobs never share a file
             
         Returns:
             AudioGenerationResponse with all generated audio clips
@@ -180,10 +259,35 @@ class AudioService:
             
             logger.info(f"Generating {len(scenes)} audio clips...")
             
-            audio_scenes = []
+            # Scenes are independent TTS requests, so synthesize them concurrently;
+            # scenes with identical text share one synthesis and one file
+            tasks: Dict[str, asyncio.Task] = {}
             for scene in scenes:
-                audio_scene = await self.generate_audio(scene, voice_id)
-                audio_scenes.append(audio_scene)
+                if scene.transcript_text not in tasks:
+                    tasks[scene.transcript_text] = asyncio.create_task(self.generate_audio(
+                        scene,
+                        voice_id,
+                        output_filename=f"{filename_prefix}audio_scene_{scene.scene_number}.mp3"
+                    ))
+            if len(tasks) < len(scenes):
+                logger.info(f"Reusing audio for {len(scenes) - len(tasks)} duplicate scenes")
+            
+            async def generate(scene: SceneDescription) -> AudioScene:
+                audio_scene = await tasks[scene.transcript_text]
+                if audio_scene.scene_number != scene.scene_number:
+                    audio_scene = audio_scene.model_copy(
+                        update={"scene_number": scene.scene_number, "duration": scene.duration}
+                    )
+                if on_scene_done is not None:
+                    on_scene_done(audio_scene)
+                return audio_scene
+            
+            try:
+                audio_scenes = await asyncio.gather(*(generate(scene) for scene in scenes))
+            finally:
+                for task in tasks.values():
+                    task.cancel()
+            audio_scenes = sorted(audio_scenes, key=lambda as_: as_.scene_number)
             
             total_duration = sum(as_.duration for as_ in audio_scenes)
             
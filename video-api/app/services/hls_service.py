@@ -0,0 +1,219 @@
+"""Service for packaging scenes into an HLS playlist as they finish rendering."""
+
+import asyncio
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.utils.video_utils import ensure_directory, probe_duration, run_ffmpeg, video_encoder_args
+
+logger = logging.getLogger(__name__)
+
+# Target segment length in seconds (keyframes are forced on this grid so segments never exceed it)
+HLS_SEGMENT_SECONDS = 2
+
+PLAYLIST_NAME = "playlist.m3u8"
+
+_SEGMENT_NAME_RE = re.compile(r"^scene_\d{3}_\d{3}\.ts$")
+
+
+class HLSStream:
+    """
+    One growing HLS playlist for a pipeline run.
+
+    Scenes can be packaged out of order; they are appended to the playlist in
+    scene order, each one after an #EXT-X-DISCONTINUITY tag.
+    """
+
+    def __init__(self, job_id: str, directory: Path):
+        """Initialize stream state for job_id stored under directory."""
+        self.job_id = job_id
+        self.directory = directory
+        self.playlist_path = directory / PLAYLIST_NAME
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+        # time.monotonic() when the pipeline stopped (completed, failed or cancelled)
+        self.finished_at: Optional[float] = None
+        self._entries: List[str] = []
+        self._pending: Dict[int, List[Tuple[float, str]]] = {}
+        self._next_index = 0
+        self._finished = False
+
+    def file_path(self, filename: str) -> Optional[Path]:
+        """Resolve a playlist or segment filename, or None if it isn't one of ours."""
+        if filename != PLAYLIST_NAME and not _SEGMENT_NAME_RE.match(filename):
+            return None
+        path = self.directory / filename
+        return path if path.exists() else None
+
+    def write_playlist(self):
+        """Rewrite the playlist atomically so players never read a partial file."""
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{HLS_SEGMENT_SECONDS}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+            *self._entries,
+        ]
+        if self._finished:
+            lines.append("#EXT-X-ENDLIST")
+        tmp_path = self.playlist_path.with_suffix(".m3u8.tmp")
+        tmp_path.write_text("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.playlist_path)
+
+    def publish(self, index: int, segments: List[Tuple[float, str]]):
+        """Queue a packaged scene and append every scene that is now next in order."""
+        self._pending[index] = segments
+        while self._next_index in self._pending:
+            if self._next_index > 0:
+                self._entries.append("#EXT-X-DISCONTINUITY")
+            for duration, name in self._pending.pop(self._next_index):
+                self._entries.append(f"#EXTINF:{duration:.3f},")
+                self._entries.append(name)
+            self._next_index += 1
+        self.write_playlist()
+
+    def end(self):
+        """Append #EXT-X-ENDLIST; no more scenes will follow."""
+        self._finished = True
+        self.write_playlist()
+
+
+class HLSService:
+    """Service for serving pipeline output as HLS while later scenes render."""
+
+    def __init__(self):
+        """Initialize HLS service."""
+        self.output_dir = Path(settings.video_output_dir) / "hls"
+        self.streams: Dict[str, HLSStream] = {}
+
+    def create_stream(self) -> HLSStream:
+        """
+        Create a new stream with an empty playlist.
+
+        Returns:
+            HLSStream registered under a fresh job ID
+        """
+        job_id = uuid.uuid4().hex
+        directory = ensure_directory(str(self.output_dir / job_id))
+        stream = HLSStream(job_id, directory)
+        stream.write_playlist()
+        self.streams[job_id] = stream
+        return stream
+
+    def get_stream(self, job_id: str) -> Optional[HLSStream]:
+        """Get a stream by job ID."""
+        return self.streams.get(job_id)
+
+    async def add_scene(
+        self,
+        stream: HLSStream,
+        index: int,
+        video_path: str,
+        audio_path: str
+    ) -> int:
+        """
+        Mux a scene's video and narration into HLS segments and publish them.
+
+        Audio longer than the video is cut; shorter audio is padded with silence.
+
+        Args:
+            stream: Target stream
+            index: Zero-based position of the scene in the final video
+            video_path: Path to the scene's video clip
+            audio_path: Path to the scene's narration
+
+        Returns:
+            Number of segments written for the scene
+        """
+        try:
+            prefix = f"scene_{index:03d}"
+            scene_playlist = stream.directory / f"{prefix}.m3u8"
+
+            clip_duration = await asyncio.to_thread(probe_duration, video_path)
+
+            logger.info(f"Packaging scene {index + 1} into HLS segments...")
+            await run_ffmpeg([
+                "-i", video_path,
+                "-i", audio_path,
+                "-map", "0:v:0", "-map", "1:a:0",
+                "-af", f"apad,atrim=duration={clip_duration:.3f}",
+                *await asyncio.to_thread(video_encoder_args),
+                "-pix_fmt", "yuv420p",
+                "-force_key_frames", f"expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})",
+                "-c:a", "aac", "-b:a", "128k",
+                "-f", "hls",
+                "-hls_time", str(HLS_SEGMENT_SECONDS),
+                "-hls_playlist_type", "vod",
+                "-hls_segment_filename", str(stream.directory / f"{prefix}_%03d.ts"),
+                str(scene_playlist),
+            ])
+
+            segments = []
+            duration = None
+            for line in scene_playlist.read_text().splitlines():
+                if line.startswith("#EXTINF:"):
+                    duration = float(line[len("#EXTINF:"):].split(",", 1)[0])
+                elif line and not line.startswith("#") and duration is not None:
+                    segments.append((duration, line))
+                    duration = None
+            scene_playlist.unlink()
+
+            stream.publish(index, segments)
+            logger.info(f"Published scene {index + 1} to HLS stream {stream.job_id} ({len(segments)} segments)")
+            return len(segments)
+
+        except Exception as e:
+            logger.error(f"Error packaging scene {index + 1} for HLS: {str(e)}")
+            raise
+
+    def finish(self, stream: HLSStream):
+        """Mark the stream complete so players treat it as a finished VOD."""
+        stream.end()
+        stream.status = "completed"
+
+    async def evict_expired(self, ttl_seconds: float) -> int:
+        """
+        Forget streams whose pipeline stopped more than ttl_seconds ago and delete their files.
+
+        Stream directories left over from earlier processes are deleted once
+        they are older than ttl_seconds too.
+
+        Returns:
+            Number of stream directories removed
+        """
+        cutoff = time.monotonic() - ttl_seconds
+        expired = [
+            stream for stream in self.streams.values()
+            if stream.finished_at is not None and stream.finished_at < cutoff
+        ]
+        for stream in expired:
+            del self.streams[stream.job_id]
+        directories = [stream.directory for stream in expired]
+
+        if self.output_dir.is_dir():
+            wall_cutoff = time.time() - ttl_seconds
+            for directory in self.output_dir.iterdir():
+                try:
+                    if (
+                        directory.name not in self.streams
+                        and directory not in directories
+                        and directory.is_dir()
+                        and directory.stat().st_mtime < wall_cutoff
+                    ):
+                        directories.append(directory)
+                except OSError:
+                    pass
+
+        await asyncio.gather(*(
+            asyncio.to_thread(shutil.rmtree, directory, ignore_errors=True)
+            for directory in directories
+        ))
+        return len(directories)
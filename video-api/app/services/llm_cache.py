@@ -0,0 +1,66 @@
+"""Content-addressed on-disk cache for parsed Gemini responses."""
+
+import json
+import logging
+from typing import Any, Dict, Optional
+from app.services.disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCache(DiskCache):
+    """
+    Stores parsed JSON responses keyed by a hash of the whole request.
+
+    The key covers the model, the system instruction, the generation config
+    and the full prompt, so editing a prompt template invalidates its entries.
+    """
+
+    suffix = ".json"
+    label = "LLM"
+
+    @classmethod
+    def make_key(
+        cls,
+        model_name: str,
+        generation_config: Dict[str, Any],
+        prompt: str,
+        system_instruction: str = ""
+    ) -> str:
+        """
+        Build a cache key.
+
+        Args:
+            model_name: Gemini model name
+            generation_config: Generation settings passed to the model
+            prompt: Complete prompt text
+            system_instruction: System instruction the model was built with
+
+        Returns:
+            Hex BLAKE2b digest
+        """
+        payload = json.dumps(
+            {
+                "model": model_name,
+                "system": system_instruction,
+                "config": generation_config,
+                "prompt": prompt,
+            },
+            sort_keys=True
+        )
+        return cls.hash_key(payload.encode("utf-8"))
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response for key, or None on a miss."""
+        data = self.read_bytes(key)
+        if data is None:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError as e:
+            logger.warning(f"Error reading LLM cache entry {key}: {e}")
+            return None
+
+    def put(self, key: str, data: Dict[str, Any]):
+        """Store a response for key."""
+        self.write_bytes(key, json.dumps(data).encode("utf-8"))
@@ -0,0 +1,46 @@
+"""Registry of running pipeline jobs that report progress events."""
+
+import asyncio
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+
+class PipelineJob:
+    """A background pipeline run with an event queue."""
+
+    def __init__(self, job_id: str):
+        """Initialize job state."""
+        self.job_id = job_id
+        self.events: asyncio.Queue[Tuple[str, Dict[str, Any]]] = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+
+    def emit(self, event: str, data: Dict[str, Any]):
+        """Queue a progress event for the client."""
+        self.events.put_nowait((event, data))
+
+    def cancel(self):
+        """Cancel the running task; it is interrupted at its current await."""
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+
+
+class PipelineJobRegistry:
+    """In-memory lookup of running jobs by ID."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self.jobs: Dict[str, PipelineJob] = {}
+
+    def create(self) -> PipelineJob:
+        """Create and register a job with a fresh ID."""
+        job = PipelineJob(uuid.uuid4().hex)
+        self.jobs[job.job_id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[PipelineJob]:
+        """Get a job by ID."""
+        return self.jobs.get(job_id)
+
+    def remove(self, job_id: str):
+        """Forget a finished job."""
+        self.jobs.pop(job_id, None)
@@ -1,74 +1,27 @@
 """Service for generating 8-second scene descriptions for Veo."""
 
+import asyncio
 import logging
-import json
-from typing import List
+from typing import AsyncIterator, List
 import google.generativeai as genai
 from app.models.schemas import Snippet, SceneDescription, SceneGenerationResponse
+from app.core.config import settings
+from app.services.llm_cache import LLMCache
+from app.utils.json_utils import StreamingArrayParser, parse_json_response
+from app.utils.retry import with_retries
 
 logger = logging.getLogger(__name__)
 
-
-class SceneGenerator:
-    """Service for generating scene descriptions from snippets."""
-    
-    def __init__(self, api_key: str):
-        """Initialize scene generator with Gemini API key."""
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
-        self.scene_duration = 8.0  # Veo max duration
-    
-    def _parse_json_response(self, response_text: str) -> dict:
-        """Extract and parse JSON from model response."""
-        if "```json" in response_text:
-            start = response_text.find("```json") + 7
-            end = response_text.find("```", start)
-            json_str = response_text[start:end].strip()
-        elif "```" in response_text:
-            start = response_text.find("```") + 3
-            end = response_text.find("```", start)
-            json_str = response_text[start:end].strip()
-        else:
-            json_str = response_text.strip()
-        
-        try:
-            return json.loads(json_str)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON: {e}\nResponse: {json_str[:500]}")
-            raise ValueError(f"Invalid JSON response from model: {str(e)}")
-    
-    async def generate_scenes(
-        self,
-        snippets: List[Snippet],
-        scene_duration: float = 8.0
-    ) -> SceneGenerationResponse:
-        """
-        Generate 8-second scene descriptions from snippets.
-        
-        Args:
-            snippets: List of extracted snippets
-            scene_duration: Duration for each scene (default 8 seconds)
-            
-        Returns:
-            SceneGenerationResponse with scene descriptions
-        """
-        try:
-            snippets_text = "\n\n".join([
-                f"Snippet {i+1}:\n{snippet.text}\nContext: {snippet.context or 'N/A'}"
-                for i, snippet in enumerate(snippets)
-            ])
-            
-            prompt = f"""
+# Static instructions, sent as the model's system instruction so every request shares
+# the same prefix (eligible for Gemini's implicit context caching); only the tail varies
+_SCENE_PROMPT_HEAD = """
 You are an expert AI Cinematographer and Visual Director. Your goal is to translate podcast transcript snippets into detailed, photorealistic video generation prompts optimized for Google Veo 3.1.
 
-TRANSCRIPT SNIPPETS:
-{snippets_text}
-
 **YOUR OBJECTIVE:**
-Convert each snippet into a detailed visual scene description for video generation. Each scene will be exactly {scene_duration} seconds long and will be SILENT (no audio). The audio will be added separately later.
+Convert each of the transcript snippets in the request into a detailed visual scene description for video generation. Each scene will be exactly the SCENE DURATION given in the request and will be SILENT (no audio). The audio will be added separately later.
 
 **CRITICAL CONSTRAINTS:**
-1. Each scene must be exactly {scene_duration} seconds
+1. Each scene must be exactly the SCENE DURATION given in the request
 2. NO audio, vocals, speech, or sound effects in the video description
 3. NO visible people speaking, singing, or facing the camera
 4. NO lip movement of any kind
@@ -89,6 +42,13 @@ Then add:
 - Specify style: "35mm film grain," "4k sharp digital," "Cinematic documentary style"
 - Translate abstract concepts into visual metaphors
 - Make scenes visually engaging and cinematic
+"""
+
+_SCENE_PROMPT_TAIL = """
+SCENE DURATION: {scene_duration} seconds
+
+TRANSCRIPT SNIPPETS:
+{snippets_text}
 
 **OUTPUT FORMAT (JSON):**
 {{
@@ -105,25 +65,148 @@ Then add:
 
 Return ONLY valid JSON, no additional text.
 """
-            
-            response = self.model.generate_content(
+
+
+class SceneGenerator:
+    """Service for generating scene descriptions from snippets."""
+    
+    def __init__(self, api_key: str):
+        """Initialize scene generator with Gemini API key."""
+        genai.configure(api_key=api_key)
+        self.model_name = 'gemini-2.5-flash'
+        self.model = genai.GenerativeModel(
+            self.model_name,
+            system_instruction=_SCENE_PROMPT_HEAD
+        )
+        self.llm_cache = LLMCache(settings.llm_cache_dir) if settings.llm_cache_dir else None
+        self.scene_duration = 8.0  # Veo max duration
+    
+    def _parse_json_response(self, response_text: str) -> dict:
+        """Extract and parse JSON from model response."""
+        return parse_json_response(response_text)
+    
+    async def _stream_text(self, prompt: str, generation_config: dict) -> AsyncIterator[str]:
+        """Stream the model's reply as text chunks (the blocking SDK iterator runs in worker threads)."""
+        response = await with_retries(
+            lambda: asyncio.to_thread(
+                self.model.generate_content,
                 prompt,
-                generation_config=genai.GenerationConfig(
-                    temperature=0.8,
-                    max_output_tokens=6000,
-                )
-            )
-            
-            result = self._parse_json_response(response.text)
-            
-            scenes = [
-                SceneDescription(**scene) for scene in result.get('scenes', [])
-            ]
+                generation_config=genai.GenerationConfig(**generation_config),
+                stream=True
+            ),
+            description="Gemini scene generation"
+        )
+        chunks = iter(response)
+        while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+            yield chunk.text
+    
+    def _to_scene(self, data: dict, scene_duration: float) -> SceneDescription:
+        """Build a scene from the model's JSON, forcing the requested duration."""
+        scene = SceneDescription(**data)
+        scene.duration = scene_duration
+        return scene
+    
+    async def iter_scenes(
+        self,
+        snippets: List[Snippet],
+        scene_duration: float = 8.0
+    ) -> AsyncIterator[SceneDescription]:
+        """
+        Generate scene descriptions, yielding each one as soon as the model has written it.
+        
+        The reply is streamed and parsed incrementally, so callers can start
+        rendering the first scene while later ones are still being generated.
+        
+        Args:
+            snippets: List of extracted snippets
+            scene_duration: Duration for each scene (default 8 seconds)
             
-            # Ensure all scenes have correct duration
-            for scene in scenes:
-                scene.duration = scene_duration
+        Yields:
+            SceneDescription for each scene, in order
+        """
+        snippets_text = "\n\n".join([
+            f"Snippet {i+1}:\n{snippet.text}\nContext: {snippet.context or 'N/A'}"
+            for i, snippet in enumerate(snippets)
+        ])
+        
+        prompt = _SCENE_PROMPT_TAIL.format(
+            scene_duration=scene_duration,
+            snippets_text=snippets_text
+        )
+        # Constrained to the scene schema, so the streamed reply is bare JSON
+        generation_config = {
+            "temperature": 0.8,
+            "max_output_tokens": 6000,
+            "response_mime_type": "application/json",
+            "response_schema": {
+                "type": "object",
+                "properties": {
+                    "scenes": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "scene_number": {"type": "integer"},
+                                "transcript_text": {"type": "string"},
+                                "visual_prompt": {"type": "string"},
+                                "duration": {"type": "number"},
+                                "start_time": {"type": "number"}
+                            },
+                            "required": ["scene_number", "transcript_text", "visual_prompt", "duration"]
+                        }
+                    }
+                },
+                "required": ["scenes"]
+            }
+        }
+        
+        cache_key = None
+        if self.llm_cache is not None:
+            cache_key = LLMCache.make_key(
+                self.model_name, generation_config, prompt, _SCENE_PROMPT_HEAD
+            )
+            cached = await asyncio.to_thread(self.llm_cache.get, cache_key)
+            if cached is not None:
+                logger.info("LLM cache hit for Gemini scene generation")
+                for data in cached.get('scenes', []):
+                    yield self._to_scene(data, scene_duration)
+                return
+        
+        parser = StreamingArrayParser("scenes")
+        chunks = []
+        yielded = 0
+        async for text in self._stream_text(prompt, generation_config):
+            chunks.append(text)
+            for data in parser.feed(text):
+                yield self._to_scene(data, scene_duration)
+                yielded += 1
+        
+        # The full reply is parsed too: it is what gets cached, and it catches any
+        # scenes the incremental parser could not pick out
+        result = self._parse_json_response("".join(chunks))
+        for data in result.get('scenes', [])[yielded:]:
+            yield self._to_scene(data, scene_duration)
+        
+        if cache_key is not None:
+            await asyncio.to_thread(self.llm_cache.put, cache_key, result)
+    
+    async def generate_scenes(
+        self,
+        snippets: List[Snippet],
+        scene_duration: float = 8.0
+    ) -> SceneGenerationResponse:
+        """
+        Generate 8-second scene descriptions from snippets.
+        
+        Args:
+            snippets: List of extracted snippets
+            scene_duration: Duration for each scene (default 8 seconds)
             
+        Returns:
+            SceneGenerationResponse with scene descriptions
+        """
+        try:
+            scenes = [scene async for scene in self.iter_scenes(snippets, scene_duration)]
             total_duration = len(scenes) * scene_duration
             
             logger.info(f"Generated {len(scenes)} scene descriptions")
@@ -135,4 +218,3 @@ Return ONLY valid JSON, no additional text.
         except Exception as e:
             logger.error(f"Error generating scenes: {str(e)}")
             raise
-
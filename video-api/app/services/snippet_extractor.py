@@ -1,13 +1,51 @@
 """Service for extracting interesting snippets from transcripts."""
 
+import asyncio
 import logging
-import json
+import math
 from typing import List, Union
 import google.generativeai as genai
 from app.models.schemas import TranscriptInput, Snippet, SnippetExtractionResponse
+from app.core.config import settings
+from app.services.llm_cache import LLMCache
+from app.utils.json_utils import parse_json_response
+from app.utils.retry import with_retries
 
 logger = logging.getLogger(__name__)
 
+# Transcripts longer than this are split into windows handled by concurrent calls
+CHUNK_WINDOW_CHARS = 8000
+CHUNK_OVERLAP_CHARS = 500
+
+# Static instructions, sent as the model's system instruction so every call shares the
+# same prefix (eligible for Gemini's implicit context caching); only the transcript varies.
+_SNIPPET_SYSTEM_INSTRUCTION = """
+You are selecting interesting, engaging snippets from a podcast transcript for use in video generation.
+
+SELECTION CRITERIA:
+1. Choose snippets that are visually interesting and action-oriented
+2. Prioritize descriptive content that can be visualized
+3. Select moments with emotional impact or key insights
+4. Each snippet should be approximately 8 seconds of spoken content
+5. Snippets should be continuous (no skipping around within a snippet)
+6. Replace speaker names with generic labels (e.g., "Person 1", "Person 2")
+
+OUTPUT FORMAT (JSON):
+{
+  "snippets": [
+    {
+      "text": "exact transcript text",
+      "start_time": 0.0,
+      "end_time": 8.0,
+      "context": "brief context about this snippet",
+      "reason": "why this snippet was selected"
+    }
+  ]
+}
+
+Return ONLY valid JSON, no additional text.
+"""
+
 
 class SnippetExtractor:
     """Service for extracting interesting snippets from transcripts."""
@@ -15,7 +53,13 @@ class SnippetExtractor:
     def __init__(self, api_key: str):
         """Initialize snippet extractor with Gemini API key."""
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model_name = 'gemini-2.5-flash'
+        self.model = genai.GenerativeModel(
+            self.model_name,
+            system_instruction=_SNIPPET_SYSTEM_INSTRUCTION
+        )
+        self._llm_semaphore = asyncio.Semaphore(settings.llm_concurrency)
+        self.llm_cache = LLMCache(settings.llm_cache_dir) if settings.llm_cache_dir else None
     
     def _parse_transcript_text(self, transcript_input: TranscriptInput) -> str:
         """Convert transcript input to plain text."""
@@ -29,23 +73,102 @@ class SnippetExtractor:
     
     def _parse_json_response(self, response_text: str) -> dict:
         """Extract and parse JSON from model response."""
-        # Try to find JSON in code blocks first
-        if "```json" in response_text:
-            start = response_text.find("```json") + 7
-            end = response_text.find("```", start)
-            json_str = response_text[start:end].strip()
-        elif "```" in response_text:
-            start = response_text.find("```") + 3
-            end = response_text.find("```", start)
-            json_str = response_text[start:end].strip()
-        else:
-            json_str = response_text.strip()
+        return parse_json_response(response_text)
+    
+    async def _generate_json(self, prompt: str, generation_config: dict, description: str) -> dict:
+        """Call Gemini and parse its JSON reply, using the LLM cache when enabled."""
+        cache_key = None
+        if self.llm_cache is not None:
+            cache_key = LLMCache.make_key(
+                self.model_name, generation_config, prompt, _SNIPPET_SYSTEM_INSTRUCTION
+            )
+            cached = await asyncio.to_thread(self.llm_cache.get, cache_key)
+            if cached is not None:
+                logger.info(f"LLM cache hit for {description}")
+                return cached
         
-        try:
-            return json.loads(json_str)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON: {e}\nResponse: {json_str[:500]}")
-            raise ValueError(f"Invalid JSON response from model: {str(e)}")
+        async def request():
+            async with self._llm_semaphore:
+                return await asyncio.to_thread(
+                    self.model.generate_content,
+                    prompt,
+                    generation_config=genai.GenerationConfig(**generation_config)
+                )
+        
+        # The semaphore is released while backing off so other windows can proceed
+        response = await with_retries(request, description=description)
+        result = self._parse_json_response(response.text)
+        
+        if cache_key is not None:
+            await asyncio.to_thread(self.llm_cache.put, cache_key, result)
+        return result
+    
+    def _build_prompt(self, transcript_text: str, max_snippets: int) -> str:
+        """Build the per-call part of the prompt for a transcript (or one window of it)."""
+        return f"""
+SOURCE TRANSCRIPT:
+\"\"\"{transcript_text}\"\"\"
+
+TASK:
+Extract {max_snippets} compelling, continuous snippets from the transcript that would make excellent visual scenes for video generation.
+"""
+    
+    @staticmethod
+    def _chunk_transcript(
+        text: str,
+        window_chars: int = CHUNK_WINDOW_CHARS,
+        overlap: int = CHUNK_OVERLAP_CHARS
+    ) -> List[str]:
+        """
+        Split a long transcript into overlapping windows, breaking at whitespace.
+        
+        Args:
+            text: Transcript text
+            window_chars: Maximum characters per window
+            overlap: Characters shared by consecutive windows, so a snippet
+                spanning a boundary is fully inside at least one of them
+            
+        Returns:
+            List of windows (just [text] when it fits in one)
+        """
+        if len(text) <= window_chars:
+            return [text]
+        
+        chunks = []
+        start = 0
+        while start < len(text):
+            end = min(start + window_chars, len(text))
+            if end < len(text):
+                # Prefer to break between words
+                space = text.rfind(" ", start + window_chars // 2, end)
+                if space != -1:
+                    end = space
+            chunks.append(text[start:end].strip())
+            if end >= len(text):
+                break
+            # Start the next window on a word boundary inside the overlap
+            space = text.find(" ", max(end - overlap, start + 1), end)
+            start = space + 1 if space != -1 else max(end - overlap, start + 1)
+        return chunks
+    
+    @staticmethod
+    def _merge_snippets(per_chunk: List[List[dict]], max_snippets: int) -> List[dict]:
+        """
+        Pick up to max_snippets across windows, round-robin so every part of
+        the transcript is represented, and return them in transcript order.
+        """
+        seen = set()
+        candidates = []
+        for chunk_index, snippets in enumerate(per_chunk):
+            for rank, snippet in enumerate(snippets):
+                key = " ".join(str(snippet.get("text", "")).split()).lower()
+                if key in seen:
+                    continue  # Same passage picked from the overlap of two windows
+                seen.add(key)
+                candidates.append((rank, chunk_index, snippet))
+        
+        selected = sorted(candidates, key=lambda c: (c[0], c[1]))[:max_snippets]
+        return [snippet for _, _, snippet in sorted(selected, key=lambda c: (c[1], c[0]))]
     
     async def extract_snippets(
         self,
@@ -65,51 +188,56 @@ class SnippetExtractor:
         try:
             transcript_text = self._parse_transcript_text(transcript_input)
             
-            prompt = f"""
-You are selecting interesting, engaging snippets from a podcast transcript for use in video generation.
-
-SOURCE TRANSCRIPT:
-\"\"\"{transcript_text}\"\"\"
-
-TASK:
-Extract {max_snippets} compelling, continuous snippets from the transcript that would make excellent visual scenes for video generation.
-
-SELECTION CRITERIA:
-1. Choose snippets that are visually interesting and action-oriented
-2. Prioritize descriptive content that can be visualized
-3. Select moments with emotional impact or key insights
-4. Each snippet should be approximately 8 seconds of spoken content
-5. Snippets should be continuous (no skipping around within a snippet)
-6. Replace speaker names with generic labels (e.g., "Person 1", "Person 2")
-
-OUTPUT FORMAT (JSON):
-{{
-  "snippets": [
-    {{
-      "text": "exact transcript text",
-      "start_time": 0.0,
-      "end_time": 8.0,
-      "context": "brief context about this snippet",
-      "reason": "why this snippet was selected"
-    }}
-  ]
-}}
-
-Return ONLY valid JSON, no additional text.
-"""
+            # Long transcripts are split into windows that are processed concurrently
+            # (at most settings.llm_concurrency Gemini requests in flight)
+            chunks = self._chunk_transcript(transcript_text)
+            per_chunk = math.ceil(max_snippets / len(chunks))
+            if len(chunks) > 1:
+                logger.info(f"Transcript split into {len(chunks)} windows, extracting up to {per_chunk} snippets from each")
             
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=4000,
+            results = await asyncio.gather(*(
+                self._generate_json(
+                    self._build_prompt(chunk, per_chunk),
+                    {
+                        "temperature": 0.7,
+                        "max_output_tokens": 4000,
+                        "response_mime_type": "application/json",
+                        "response_schema": {
+                            "type": "object",
+                            "properties": {
+                                "snippets": {
+                                    "type": "array",
+                                    "items": {
+                                        "type": "object",
+                                        "properties": {
+                                            "text": {"type": "string"},
+                                            "start_time": {"type": "number"},
+                                            "end_time": {"type": "number"},
+                                            "context": {"type": "string"},
+                                            "reason": {"type": "string"}
+                                        },
+                                        "required": ["text", "start_time", "end_time", "context", "reason"]
+                                    }
+                                }
+                            },
+                            "required": ["snippets"]
+                        }
+                    },
+                    description="Gemini snippet extraction"
                 )
-            )
+                for chunk in chunks
+            ))
             
-            result = self._parse_json_response(response.text)
+            if len(results) == 1:
+                raw_snippets = results[0].get('snippets', [])
+            else:
+                raw_snippets = self._merge_snippets(
+                    [result.get('snippets', []) for result in results],
+                    max_snippets
+                )
             
             snippets = [
-                Snippet(**snippet) for snippet in result.get('snippets', [])
+                Snippet(**snippet) for snippet in raw_snippets
             ]
             
             logger.info(f"Extracted {len(snippets)} snippets from transcript")
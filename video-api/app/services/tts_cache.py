@@ -0,0 +1,34 @@
+"""Content-addressed on-disk cache for synthesized speech."""
+
+from typing import Optional
+from app.services.disk_cache import DiskCache
+
+
+class TTSCache(DiskCache):
+    """Stores raw TTS audio keyed by a hash of everything that affects it."""
+
+    suffix = ".mp3"
+    label = "TTS"
+
+    @classmethod
+    def make_key(cls, voice: bytes, audio_config: bytes, text: str) -> str:
+        """
+        Build a cache key.
+
+        Args:
+            voice: Serialized voice selection (language code, voice name)
+            audio_config: Serialized audio config (encoding, rate, pitch, sample rate)
+            text: Text being synthesized
+
+        Returns:
+            Hex BLAKE2b digest
+        """
+        return cls.hash_key(voice, audio_config, text.encode("utf-8"))
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return cached audio for key, or None on a miss."""
+        return self.read_bytes(key)
+
+    def put(self, key: str, data: bytes):
+        """Store audio for key."""
+        self.write_bytes(key, data)
@@ -1,13 +1,18 @@
 """Service for generating videos using Veo 3.1."""
 
 import logging
+import os
 import time
 import asyncio
 from pathlib import Path
-from typing import List
+from typing import AsyncIterable, AsyncIterator, Callable, Dict, Iterable, List, Optional, Union
+import httpx
 from google import genai
+from google.genai import types
 from app.models.schemas import SceneDescription, VideoScene, VideoGenerationResponse
 from app.core.config import settings
+from app.services.video_cache import VideoCache
+from app.utils.retry import is_submit_retryable, with_retries
 from app.utils.video_utils import ensure_directory, get_output_path
 
 logger = logging.getLogger(__name__)
@@ -16,16 +21,33 @@ logger = logging.getLogger(__name__)
 class VeoService:
     """Service for generating videos using Veo 3.1."""
     
-    def __init__(self, api_key: str):
-        """Initialize Veo service with API key."""
-        self.client = genai.Client(api_key=api_key)
+    def __init__(self, api_key: str, http_client: Optional[httpx.Client] = None):
+        """
+        Initialize Veo service with API key.
+        
+        Args:
+            api_key: Gemini API key
+            http_client: Optional shared httpx client (connection pool) for API calls
+        """
+        if http_client is not None:
+            self.client = genai.Client(
+                api_key=api_key,
+                http_options=types.HttpOptions(httpx_client=http_client)
+            )
+        else:
+            self.client = genai.Client(api_key=api_key)
         self.model_name = "veo-3.1-generate-preview"
-        self.output_dir = settings.video_output_dir
+        self.output_dir = settings.scratch_video_dir
+        # Shared by every request using this (singleton) service
+        self._render_semaphore = asyncio.Semaphore(settings.veo_concurrency)
+        self.video_cache = VideoCache(settings.veo_cache_dir) if settings.veo_cache_dir else None
     
-    def _poll_operation(self, operation, max_wait_time: int = 600) -> genai.types.Operation:
+    async def _poll_operation(self, operation, max_wait_time: int = 600) -> genai.types.Operation:
         """
         Poll operation until complete.
         
+        The interval backs off from 5s to 30s, since renders are rarely done early.
+        
         Args:
             operation: Veo operation object
             max_wait_time: Maximum time to wait in seconds
@@ -33,17 +55,21 @@ class VeoService:
         Returns:
             Completed operation
         """
-        start_time = time.time()
-        poll_interval = 10  # seconds
+        start_time = time.monotonic()
+        poll_interval = 5.0  # seconds
         
         while not operation.done:
-            elapsed = time.time() - start_time
+            elapsed = time.monotonic() - start_time
             if elapsed > max_wait_time:
                 raise TimeoutError(f"Video generation timed out after {max_wait_time} seconds")
             
             logger.info(f"Waiting for video generation... ({elapsed:.0f}s elapsed)")
-            time.sleep(poll_interval)
-            operation = self.client.operations.get(operation)
+            await asyncio.sleep(poll_interval)
+            operation = await with_retries(
+                lambda: asyncio.to_thread(self.client.operations.get, operation),
+                description="Veo polling"
+            )
+            poll_interval = min(poll_interval * 1.5, 30.0)
         
         return operation
     
@@ -67,21 +93,55 @@ class VeoService:
             
             generated_video = operation.response.generated_videos[0]
             
-            # Download the video file
-            video_file = self.client.files.download(file=generated_video.video)
-            
-            # Save to output path
             output_file = Path(output_path)
             output_file.parent.mkdir(parents=True, exist_ok=True)
-            video_file.save(str(output_file))
             
-            logger.info(f"Video saved to {output_path}")
+            # Stream to a temp file in chunks instead of holding the whole clip in memory;
+            # the rename means a failed download never leaves a truncated clip behind
+            part_file = output_file.with_name(output_file.name + ".part")
+            try:
+                self.client.files.download(file=generated_video.video, destination=str(part_file))
+                os.replace(part_file, output_file)
+            except BaseException:
+                part_file.unlink(missing_ok=True)
+                raise
+            
+            logger.info(f"Video saved to {output_path} ({output_file.stat().st_size} bytes)")
             return str(output_file)
             
         except Exception as e:
             logger.error(f"Error downloading video: {str(e)}")
             raise
     
+    async def _render(self, scene: SceneDescription, veo_prompt: str, output_path: str) -> str:
+        """Submit a Veo render, wait for it and download the clip to output_path."""
+        logger.info(f"Generating video for scene {scene.scene_number}...")
+        
+        # Generate video (this is a blocking call, so it runs in a worker thread);
+        # each step is retried on transient API errors. Submitting is not
+        # idempotent, so it is only retried when the request never reached Veo
+        # (rate limits, connect errors). A render slot is held from submission
+        # until the operation completes.
+        async with self._render_semaphore:
+            operation = await with_retries(
+                lambda: asyncio.to_thread(
+                    self.client.models.generate_videos,
+                    model=self.model_name,
+                    prompt=veo_prompt,
+                ),
+                retry_if=is_submit_retryable,
+                description=f"Veo request for scene {scene.scene_number}"
+            )
+            
+            # Poll for completion
+            operation = await self._poll_operation(operation)
+        
+        # Download video
+        return await with_retries(
+            lambda: asyncio.to_thread(self._download_video, operation, output_path),
+            description=f"Veo download for scene {scene.scene_number}"
+        )
+    
     async def generate_video(
         self,
         scene: SceneDescription,
@@ -146,29 +206,19 @@ OUTPUT REQUIREMENT:
 - The video must align temporally with the transcript audio when the audio is added externally.
 """
             
-            logger.info(f"Generating video for scene {scene.scene_number}...")
-            
-            # Generate video (this is a blocking operation, so we run it in executor)
-            loop = asyncio.get_event_loop()
-            operation = await loop.run_in_executor(
-                None,
-                lambda: self.client.models.generate_videos(
-                    model=self.model_name,
-                    prompt=veo_prompt,
-                )
-            )
-            
-            # Poll for completion
-            operation = await loop.run_in_executor(
-                None,
-                lambda: self._poll_operation(operation)
-            )
+            # Identical prompts reuse an earlier render instead of calling Veo again
+            cache_key = None
+            video_path = None
+            if self.video_cache is not None:
+                cache_key = VideoCache.make_key(self.model_name, veo_prompt)
+                if await asyncio.to_thread(self.video_cache.fetch, cache_key, output_path):
+                    logger.info(f"Veo cache hit for scene {scene.scene_number}")
+                    video_path = output_path
             
-            # Download video
-            video_path = await loop.run_in_executor(
-                None,
-                lambda: self._download_video(operation, output_path)
-            )
+            if video_path is None:
+                video_path = await self._render(scene, veo_prompt, output_path)
+                if cache_key is not None:
+                    await asyncio.to_thread(self.video_cache.put, cache_key, video_path)
             
             # Get actual video duration (we'll use the expected duration for now)
             video_scene = VideoScene(
@@ -185,15 +235,84 @@ OUTPUT REQUIREMENT:
             logger.error(f"Error generating video for scene {scene.scene_number}: {str(e)}")
             raise
     
+    async def iter_completed(
+        self,
+        scenes: Union[Iterable[SceneDescription], AsyncIterable[SceneDescription]],
+        filename_prefix: str = ""
+    ) -> AsyncIterator[VideoScene]:
+        """
+        Render all scenes concurrently and yield each clip, in scene order, as soon as it is ready.
+        
+        Scenes may arrive from an async iterator (e.g. SceneGenerator.iter_scenes);
+        each is submitted to Veo as soon as it arrives instead of after the whole
+        list is known. Renders are bounded by the service's render semaphore. A
+        scene whose prompt inputs match an earlier one reuses that clip instead
+        of re-rendering.
+        
+        Args:
+            scenes: Scene descriptions, as a list or an async iterator
+            filename_prefix: Prefix for clip filenames, so concurrent jobs never share a file
+            
+        Yields:
+            VideoScene for each scene, in order
+        """
+        tasks: Dict[tuple, asyncio.Task] = {}
+        # Submitted scenes in order, ending with None once the source is exhausted
+        submitted: asyncio.Queue = asyncio.Queue()
+        
+        def submit(scene: SceneDescription):
+            key = (scene.visual_prompt, scene.transcript_text, scene.duration)
+            if key in tasks:
+                logger.info(f"Scene {scene.scene_number} duplicates an earlier scene, reusing its video")
+            else:
+                tasks[key] = asyncio.create_task(self.generate_video(
+                    scene,
+                    output_filename=f"{filename_prefix}scene_{scene.scene_number}.mp4"
+                ))
+            submitted.put_nowait((scene, key))
+        
+        async def feed():
+            try:
+                if isinstance(scenes, AsyncIterable):
+                    async for scene in scenes:
+                        submit(scene)
+                else:
+                    for scene in scenes:
+                        submit(scene)
+            finally:
+                submitted.put_nowait(None)
+        
+        feeder = asyncio.create_task(feed())
+        try:
+            while (item := await submitted.get()) is not None:
+                scene, key = item
+                render = tasks[key]
+                # Fail fast if the scene source errors while this clip renders
+                await asyncio.wait([render, feeder], return_when=asyncio.FIRST_COMPLETED)
+                if feeder.done():
+                    await feeder
+                video_scene = await render
+                if video_scene.scene_number != scene.scene_number:
+                    video_scene = video_scene.model_copy(update={"scene_number": scene.scene_number})
+                yield video_scene
+            # Surface errors raised by the scene source
+            await feeder
+        finally:
+            feeder.cancel()
+            for task in tasks.values():
+                task.cancel()
+    
     async def generate_videos(
         self,
-        scenes: List[SceneDescription]
+        scenes: List[SceneDescription],
+        on_scene_done: Optional[Callable[[VideoScene], None]] = None
     ) -> VideoGenerationResponse:
         """
         Generate videos for all scenes.
         
         Args:
             scenes: List of scene descriptions
+            on_scene_done: Optional callback invoked as each clip is ready (in scene order)
             
         Returns:
             VideoGenerationResponse with all generated videos
@@ -201,11 +320,11 @@ OUTPUT REQUIREMENT:
         try:
             logger.info(f"Generating {len(scenes)} video clips...")
             
-            # Generate videos sequentially (Veo API may have rate limits)
             video_scenes = []
-            for scene in scenes:
-                video_scene = await self.generate_video(scene)
+            async for video_scene in self.iter_completed(scenes):
                 video_scenes.append(video_scene)
+                if on_scene_done is not None:
+                    on_scene_done(video_scene)
             
             total_duration = sum(vs.duration for vs in video_scenes)
             
@@ -218,4 +337,3 @@ OUTPUT REQUIREMENT:
         except Exception as e:
             logger.error(f"Error generating videos: {str(e)}")
             raise
-
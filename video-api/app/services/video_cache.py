@@ -0,0 +1,37 @@
+"""Content-addressed on-disk cache for rendered Veo clips."""
+
+from app.services.disk_cache import DiskCache
+
+
+class VideoCache(DiskCache):
+    """
+    Stores rendered clips keyed by a hash of the model and the full Veo prompt.
+
+    Entries are hard links to the rendered clips where possible, so a hit
+    costs no copy.
+    """
+
+    suffix = ".mp4"
+    label = "Veo"
+
+    @classmethod
+    def make_key(cls, model_name: str, prompt: str) -> str:
+        """
+        Build a cache key.
+
+        Args:
+            model_name: Veo model name
+            prompt: Complete Veo prompt
+
+        Returns:
+            Hex BLAKE2b digest
+        """
+        return cls.hash_key(model_name.encode("utf-8"), prompt.encode("utf-8"))
+
+    def fetch(self, key: str, output_path: str) -> bool:
+        """Place the cached clip for key at output_path; returns False on a miss."""
+        return self.fetch_file(key, output_path)
+
+    def put(self, key: str, video_path: str):
+        """Store a rendered clip for key."""
+        self.store_file(key, video_path)
@@ -1,22 +1,52 @@
 """Service for stitching video clips together."""
 
+import asyncio
 import logging
+import shutil
+import tempfile
 from pathlib import Path
 from typing import List
-from moviepy import VideoFileClip, concatenate_videoclips
 from app.models.schemas import VideoStitchRequest, VideoStitchResponse
 from app.core.config import settings
-from app.utils.video_utils import ensure_directory, get_output_path
+from app.utils.video_utils import (
+    VERTICAL_VIDEO_FILTER,
+    ensure_directory,
+    get_output_path,
+    probe_duration,
+    run_ffmpeg,
+    video_encoder_args,
+)
 
 logger = logging.getLogger(__name__)
 
 
+class StitchSession:
+    """
+    A video being stitched one clip at a time.
+    
+    Each appended clip is normalized into a segment with identical encoding
+    parameters, so the final join is a lossless concat with no re-encode.
+    """
+    
+    def __init__(self, work_dir: Path):
+        """Initialize an empty session storing segments in work_dir."""
+        self.work_dir = work_dir
+        self.segments: List[str] = []
+        self.duration = 0.0
+    
+    def write_concat_list(self) -> str:
+        """Write the concat demuxer list for the segments so far and return its path."""
+        list_path = self.work_dir / "segments.txt"
+        list_path.write_text("".join(f"file '{Path(segment).name}'\n" for segment in self.segments))
+        return str(list_path)
+
+
 class VideoStitcher:
     """Service for stitching video clips together."""
     
     def __init__(self):
         """Initialize video stitcher."""
-        self.output_dir = settings.video_output_dir
+        self.output_dir = settings.scratch_video_dir
     
     async def stitch_videos(
         self,
@@ -42,7 +72,12 @@ class VideoStitcher:
             
             logger.info(f"Stitching {len(video_paths)} video clips...")
             
-            # Load all video clips
+            # Imported here: MoviePy is slow to load and only this path needs it
+            from moviepy import VideoFileClip, concatenate_videoclips
+            
+            # Load all video clips. A path listed more than once (a reused scene)
+            # gets its own reader: MoviePy readers keep their own seek position, so
+            # one shared reader would render the wrong frames for later positions
             clips = []
             for i, video_path in enumerate(video_paths):
                 if not Path(video_path).exists():
@@ -77,8 +112,9 @@ class VideoStitcher:
                 codec='libx264',
                 audio_codec='aac',
                 fps=30,
-                preset='medium',
-                threads=4
+                preset=settings.encoder_preset,
+                threads=4,
+                ffmpeg_params=["-crf", "23", "-movflags", "+faststart"]
             )
             
             # Get actual duration
@@ -99,4 +135,53 @@ class VideoStitcher:
         except Exception as e:
             logger.error(f"Error stitching videos: {str(e)}")
             raise
-
+    
+    def start_session(self) -> StitchSession:
+        """Start an incremental stitch in a fresh scratch directory."""
+        work_dir = tempfile.mkdtemp(prefix="stitch_", dir=ensure_directory(self.output_dir))
+        return StitchSession(Path(work_dir))
+    
+    async def append(self, session: StitchSession, video_path: str) -> str:
+        """
+        Normalize a clip to 1080x1920 30 fps and add it to the session.
+        
+        Meant to be called as each clip arrives, so encoding overlaps with
+        the rendering of later clips.
+        
+        Args:
+            session: Session to append to
+            video_path: Path to the clip
+            
+        Returns:
+            Path to the encoded segment
+        """
+        try:
+            if not Path(video_path).exists():
+                raise FileNotFoundError(f"Video file not found: {video_path}")
+            
+            segment_path = str(session.work_dir / f"segment_{len(session.segments):03d}.mp4")
+            logger.info(f"Encoding stitch segment {len(session.segments) + 1} from {video_path}...")
+            
+            encoder_args, duration = await asyncio.gather(
+                asyncio.to_thread(video_encoder_args),
+                asyncio.to_thread(probe_duration, video_path)
+            )
+            await run_ffmpeg([
+                "-i", video_path,
+                "-an",
+                "-vf", VERTICAL_VIDEO_FILTER,
+                *encoder_args,
+                segment_path,
+            ])
+            
+            session.segments.append(segment_path)
+            session.duration += duration
+            return segment_path
+            
+        except Exception as e:
+            logger.error(f"Error appending clip to stitch: {str(e)}")
+            raise
+    
+    def close_session(self, session: StitchSession):
+        """Delete the session's segments."""
+        shutil.rmtree(session.work_dir, ignore_errors=True)
@@ -0,0 +1,103 @@
+"""Helpers for parsing JSON out of LLM responses."""
+
+import json
+import logging
+import re
+from typing import Any, List, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# First fenced code block (```json ... ``` or ``` ... ```)
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+_DECODER = json.JSONDecoder()
+
+
+def extract_json_text(response_text: str) -> str:
+    """Return the contents of the first code fence, or the whole response if there is none."""
+    match = _FENCE_RE.search(response_text)
+    return (match.group(1) if match else response_text).strip()
+
+
+def parse_json_response(response_text: str) -> Any:
+    """
+    Extract and parse JSON from a model response.
+
+    Parsed with orjson when it's installed. Text after the JSON value
+    (e.g. trailing prose) is ignored.
+
+    Raises:
+        ValueError: If the response does not start with valid JSON
+    """
+    if orjson is not None:
+        # Schema-constrained replies are bare JSON; parse them without looking for
+        # fences (which a string value could legitimately contain)
+        try:
+            return orjson.loads(response_text)
+        except orjson.JSONDecodeError:
+            pass
+    json_str = extract_json_text(response_text)
+    if orjson is not None:
+        try:
+            return orjson.loads(json_str)
+        except orjson.JSONDecodeError:
+            pass  # Possibly trailing prose; raw_decode stops at the end of the value
+    try:
+        result, _ = _DECODER.raw_decode(json_str)
+        return result
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse JSON: {e}\nResponse: {json_str[:500]}")
+        raise ValueError(f"Invalid JSON response from model: {str(e)}")
+
+
+class StreamingArrayParser:
+    """
+    Incrementally parse the elements of one array in a JSON response that arrives in chunks.
+
+    Feed each chunk of text as it streams in; every element of the array under
+    ``key`` is returned as soon as its closing bracket has arrived. Elements that
+    are still incomplete stay buffered until the next chunk.
+    """
+
+    def __init__(self, key: str):
+        """Initialize a parser for the array stored under key."""
+        self._key_re = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._buffer = ""
+        self._pos: Optional[int] = None  # Just past the last parsed element, once the array is found
+        self._closed = False
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Add a chunk of response text and return the array elements it completed."""
+        self._buffer += chunk
+        if self._closed:
+            return []
+        if self._pos is None:
+            match = self._key_re.search(self._buffer)
+            if match is None:
+                return []
+            self._pos = match.end()
+
+        items = []
+        while True:
+            pos = self._pos
+            while pos < len(self._buffer) and self._buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(self._buffer):
+                break
+            if self._buffer[pos] == "]":
+                self._closed = True
+                break
+            try:
+                item, end = _DECODER.raw_decode(self._buffer, pos)
+            except json.JSONDecodeError:
+                break  # Element not complete yet
+            if end >= len(self._buffer) and not isinstance(item, (dict, list)):
+                break  # A scalar at the end of the buffer may still be growing
+            items.append(item)
+            self._pos = end
+        return items
@@ -1,12 +1,25 @@
 """Video processing utilities."""
 
+import asyncio
 import os
+import re
+import shutil
+import subprocess
+import time
+from functools import lru_cache
 from pathlib import Path
 from typing import List
 import logging
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Scale/crop any clip to the 1080x1920 (9:16) 30 fps output format
+VERTICAL_VIDEO_FILTER = (
+    "scale=1080:1920:force_original_aspect_ratio=increase,"
+    "crop=1080:1920,setsar=1,fps=30,format=yuv420p"
+)
+
 
 def ensure_directory(path: str) -> Path:
     """Ensure directory exists, create if it doesn't."""
@@ -32,3 +45,138 @@ def get_output_path(output_dir: str, filename: str, ensure_exists: bool = True)
         ensure_directory(output_dir)
     return str(Path(output_dir) / filename)
 
+
+
+def remove_stale_files(directory: str, max_age_seconds: float) -> int:
+    """
+    Delete files under directory last modified more than max_age_seconds ago.
+
+    Returns:
+        Number of files removed
+    """
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for path in Path(directory).rglob("*"):
+        try:
+            if path.is_file() and path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Failed to clean up {path}: {e}")
+    return removed
+
+
+def get_ffmpeg_binary() -> str:
+    """Get the ffmpeg executable used by MoviePy (bundled with imageio-ffmpeg)."""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return "ffmpeg"
+
+
+def get_ffprobe_binary() -> str:
+    """Get the ffprobe executable (imageio-ffmpeg does not bundle one)."""
+    return shutil.which("ffprobe") or "ffprobe"
+
+
+@lru_cache(maxsize=1)
+def nvenc_available() -> bool:
+    """
+    Check whether ffmpeg can encode with NVIDIA NVENC (h264_nvenc).
+
+    The encoder being compiled in is not enough (there may be no GPU), so a
+    tiny test encode is run. The result is cached for the process lifetime.
+    """
+    cmd = [
+        get_ffmpeg_binary(), "-hide_banner", "-loglevel", "error",
+        "-f", "lavfi", "-i", "color=black:s=256x256:d=0.1",
+        "-c:v", "h264_nvenc", "-f", "null", "-",
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, timeout=15)
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.debug(f"NVENC probe failed: {e}")
+        return False
+    available = result.returncode == 0
+    logger.info(f"NVENC hardware encoding {'available' if available else 'not available'}")
+    return available
+
+
+def video_encoder_args() -> List[str]:
+    """ffmpeg H.264 encoder arguments, preferring NVENC when enabled and available."""
+    if settings.hw_accel and nvenc_available():
+        return ["-c:v", "h264_nvenc", "-preset", "p4", "-rc", "vbr", "-cq", "23", "-b:v", "0"]
+    return ["-c:v", "libx264", "-preset", settings.encoder_preset, "-crf", "23"]
+
+
+# "Duration: 00:01:02.35" in ffmpeg's header dump
+_DURATION_RE = re.compile(rb"Duration: (\d+):(\d{2}):(\d{2}(?:\.\d+)?)")
+
+
+@lru_cache(maxsize=512)
+def _probe_duration(path: str, mtime_ns: int, size: int) -> float:
+    try:
+        output = subprocess.check_output(
+            [
+                get_ffprobe_binary(), "-v", "error",
+                "-show_entries", "format=duration",
+                "-of", "csv=p=0", path,
+            ],
+            timeout=30,
+        )
+        return float(output)
+    except (OSError, subprocess.SubprocessError, ValueError) as e:
+        logger.debug(f"Could not probe {path} with ffprobe, parsing ffmpeg output: {e}")
+    # ffmpeg with no output file prints the header dump and exits non-zero
+    result = subprocess.run(
+        [get_ffmpeg_binary(), "-hide_banner", "-i", path],
+        capture_output=True,
+        timeout=30,
+    )
+    match = _DURATION_RE.search(result.stderr)
+    if match is None:
+        raise ValueError(f"Could not determine duration of {path}")
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def probe_duration(path: str) -> float:
+    """
+    Get a media file's duration in seconds from its container header.
+
+    Uses ffprobe when installed, otherwise the duration line of ffmpeg's
+    header dump. No decoder is set up. Results are cached per file version
+    (path, mtime, size), so re-probing an unchanged clip is free.
+    """
+    stat = os.stat(path)
+    return _probe_duration(path, stat.st_mtime_ns, stat.st_size)
+
+
+async def run_ffmpeg(args: List[str]) -> None:
+    """
+    Run ffmpeg with the given arguments without blocking the event loop.
+
+    If the awaiting task is cancelled, the ffmpeg process is killed before
+    the cancellation propagates, so no encode outlives its job.
+
+    Raises:
+        RuntimeError: If ffmpeg exits with a non-zero status
+    """
+    process = await asyncio.create_subprocess_exec(
+        get_ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-y", *args,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        _, stderr = await process.communicate()
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+    if process.returncode != 0:
+        message = stderr.decode(errors="replace").strip()[-2000:]
+        raise RuntimeError(f"ffmpeg exited with status {process.returncode}: {message}")
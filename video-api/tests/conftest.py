@@ -1,7 +1,13 @@
 """Pytest configuration and fixtures."""
 
+import httpx
 import pytest
-from unittest.mock import Mock, AsyncMock, MagicMock
+from typing import Tuple
+from pydantic import TypeAdapter
+from unittest.mock import Mock
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.config import settings
 from app.models.schemas import (
     TranscriptInput,
     TranscriptSegment,
@@ -9,8 +15,34 @@ from app.models.schemas import (
     SceneDescription,
 )
 
+_SNIPPETS_ADAPTER = TypeAdapter(Tuple[Snippet, ...])
+_SCENES_ADAPTER = TypeAdapter(Tuple[SceneDescription, ...])
 
-@pytest.fixture
+
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path, monkeypatch):
+    """Point the on-disk caches at per-test directories so tests never share cached results."""
+    monkeypatch.setattr(settings, "tts_cache_dir", str(tmp_path / "tts_cache"))
+    monkeypatch.setattr(settings, "llm_cache_dir", str(tmp_path / "llm_cache"))
+    monkeypatch.setattr(settings, "veo_cache_dir", str(tmp_path / "veo_cache"))
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Test client shared by the whole session, so the app's lifespan runs once."""
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+async def aclient():
+    """Async client that calls the app in-process on the session's event loop (no lifespan)."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+        yield async_client
+
+
+@pytest.fixture(scope="session")
 def sample_transcript_text():
     """Sample transcript text for testing."""
     return """
@@ -22,20 +54,32 @@ def sample_transcript_text():
     """
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_transcript_segments():
-    """Sample transcript segments with timestamps."""
-    return [
+    """Sample transcript segments with timestamps (shared by every test, so a tuple)."""
+    return (
         TranscriptSegment(text="Welcome to the podcast.", start=0.0, duration=2.0),
         TranscriptSegment(text="Today we're talking about AI.", start=2.0, duration=3.0),
         TranscriptSegment(text="AI is transforming the world.", start=5.0, duration=3.0),
-    ]
+    )
+
+
+@pytest.fixture(scope="session")
+def transcript_input_plain(sample_transcript_text):
+    """Validated plain-text TranscriptInput (shared by every test)."""
+    return TranscriptInput(transcript=sample_transcript_text, format="plain")
+
+
+@pytest.fixture(scope="session")
+def transcript_input_json(sample_transcript_segments):
+    """Validated JSON-format TranscriptInput (shared by every test)."""
+    return TranscriptInput(transcript=sample_transcript_segments, format="json")
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_snippets():
-    """Sample extracted snippets."""
-    return [
+    """Sample extracted snippets (shared by every test, so a tuple)."""
+    return (
         Snippet(
             text="AI is really transforming the world right now.",
             start_time=5.0,
@@ -50,13 +94,13 @@ def sample_snippets():
             context="Technical discussion",
             reason="Important technical detail"
         ),
-    ]
+    )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_scenes():
-    """Sample scene descriptions."""
-    return [
+    """Sample scene descriptions (shared by every test, so a tuple)."""
+    return (
         SceneDescription(
             scene_number=1,
             transcript_text="AI is really transforming the world right now.",
@@ -71,12 +115,24 @@ def sample_scenes():
             duration=8.0,
             start_time=15.0
         ),
-    ]
+    )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def sample_snippets_body(sample_snippets):
+    """JSON request body (bytes) for sample_snippets, serialized once per session."""
+    return _SNIPPETS_ADAPTER.dump_json(sample_snippets)
+
+
+@pytest.fixture(scope="session")
+def sample_scenes_body(sample_scenes):
+    """JSON request body (bytes) for sample_scenes, serialized once per session."""
+    return _SCENES_ADAPTER.dump_json(sample_scenes)
+
+
+@pytest.fixture(scope="session")
 def mock_gemini_response():
-    """Mock Gemini API response."""
+    """Mock Gemini API response (shared by every test; only its text is read)."""
     mock_response = Mock()
     mock_response.text = """
     {
@@ -92,33 +148,3 @@ def mock_gemini_response():
     }
     """
     return mock_response
-
-
-@pytest.fixture
-def mock_gemini_model(mock_gemini_response):
-    """Mock Gemini model."""
-    mock_model = Mock()
-    mock_model.generate_content = Mock(return_value=mock_gemini_response)
-    return mock_model
-
-
-@pytest.fixture
-def mock_veo_operation():
-    """Mock Veo operation."""
-    mock_op = Mock()
-    mock_op.done = True
-    mock_op.response = Mock()
-    mock_op.response.generated_videos = [Mock()]
-    mock_op.response.generated_videos[0].video = Mock()
-    return mock_op
-
-
-@pytest.fixture
-def mock_elevenlabs_client():
-    """Mock ElevenLabs client."""
-    mock_client = Mock()
-    mock_generator = iter([b'audio_chunk_1', b'audio_chunk_2'])
-    mock_client.text_to_speech = Mock()
-    mock_client.text_to_speech.convert = Mock(return_value=mock_generator)
-    return mock_client
-
@@ -7,9 +7,19 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import pytest
-from fastapi.testclient import TestClient
-from unittest.mock import patch, AsyncMock
+from types import SimpleNamespace
+from unittest.mock import ANY, Mock, AsyncMock
+from fastapi import HTTPException
 from app.main import app
+from app.api.v1 import deps
+from app.core.config import settings
+from app.services.hls_service import HLSService
+from app.api.v1.video import (
+    _run_pipeline,
+    _run_video_stream,
+    extract_snippets as extract_snippets_handler,
+    generate_video as generate_video_handler,
+)
 from app.models.schemas import (
     TranscriptInput,
     Snippet,
@@ -18,13 +28,42 @@ from app.models.schemas import (
     SceneGenerationResponse,
     VideoGenerationResponse,
     AudioGenerationResponse,
+    AudioScene,
+    AudioSyncResponse,
+    VideoGenerationRequest,
+    VideoGenerationFullResponse,
+    VideoScene,
 )
 
 
+def async_return(value):
+    """Build a stand-in coroutine function that returns value; much cheaper to create than AsyncMock."""
+    async def _return(*args, **kwargs):
+        return value
+    return _return
+
+
 @pytest.fixture
-def client():
-    """Test client."""
-    return TestClient(app)
+def services():
+    """Replace every service dependency with a plain Mock; tests install the methods they call."""
+    mocks = SimpleNamespace(
+        snippet_extractor=Mock(),
+        scene_generator=Mock(),
+        veo_service=Mock(),
+        audio_service=Mock(),
+        video_stitcher=Mock(),
+        audio_sync=Mock(),
+    )
+    app.dependency_overrides.update({
+        deps.get_snippet_extractor: lambda: mocks.snippet_extractor,
+        deps.get_scene_generator: lambda: mocks.scene_generator,
+        deps.get_veo_service: lambda: mocks.veo_service,
+        deps.get_audio_service: lambda: mocks.audio_service,
+        deps.get_video_stitcher: lambda: mocks.video_stitcher,
+        deps.get_audio_sync: lambda: mocks.audio_sync,
+    })
+    yield mocks
+    app.dependency_overrides.clear()
 
 
 def test_health_check(client):
@@ -43,8 +82,7 @@ def test_root_endpoint(client):
     assert "version" in data
 
 
-@pytest.mark.asyncio
-async def test_extract_snippets_endpoint(client, sample_transcript_text):
+async def test_extract_snippets_endpoint(aclient, services, sample_transcript_text):
     """Test extract snippets endpoint."""
     mock_response = SnippetExtractionResponse(
         snippets=[
@@ -57,28 +95,54 @@ async def test_extract_snippets_endpoint(client, sample_transcript_text):
         total_snippets=1
     )
     
-    with patch('app.api.v1.video.snippet_extractor.extract_snippets', new_callable=AsyncMock) as mock_extract:
-        mock_extract.return_value = mock_response
-        
-        response = client.post(
-            "/api/v1/extract-snippets",
-            json={
-                "transcript": sample_transcript_text,
-                "format": "plain"
-            },
-            params={"max_snippets": 5}
+    services.snippet_extractor.extract_snippets = async_return(mock_response)
+    
+    response = await aclient.post(
+        "/api/v1/extract-snippets",
+        json={
+            "transcript": sample_transcript_text,
+            "format": "plain"
+        },
+        params={"max_snippets": 5}
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_snippets"] == 1
+    assert len(data["snippets"]) == 1
+
+
+async def test_extract_snippets_handler(transcript_input_plain):
+    """Test that the handler, called directly, forwards its arguments to the extractor."""
+    mock_response = SnippetExtractionResponse(snippets=[], total_snippets=0)
+    extractor = Mock(extract_snippets=AsyncMock(return_value=mock_response))
+    
+    result = await extract_snippets_handler(transcript_input_plain, max_snippets=3, snippet_extractor=extractor)
+    
+    assert result is mock_response
+    extractor.extract_snippets.assert_awaited_once_with(transcript_input_plain, max_snippets=3)
+
+
+async def test_extract_snippets_handler_reports_errors():
+    """Test that service errors surface as HTTP 500 with the error message."""
+    extractor = Mock(extract_snippets=Mock(side_effect=RuntimeError("boom")))
+    
+    with pytest.raises(HTTPException) as exc_info:
+        await extract_snippets_handler(
+            TranscriptInput(transcript="Test", format="plain"),
+            snippet_extractor=extractor
         )
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert data["total_snippets"] == 1
-        assert len(data["snippets"]) == 1
+    
+    assert exc_info.value.status_code == 500
+    assert exc_info.value.detail == "boom"
+
 
+# Request bodies are pre-serialized bytes, so they are posted as content
+_JSON_HEADERS = {"content-type": "application/json"}
 
-@pytest.mark.asyncio
-async def test_generate_scenes_endpoint(client, sample_snippets):
-    """Test generate scenes endpoint."""
-    mock_response = SceneGenerationResponse(
+# One canned response per single-stage endpoint, built once at import
+_STAGE_RESPONSES = {
+    "scenes": SceneGenerationResponse(
         scenes=[
             SceneDescription(
                 scene_number=1,
@@ -88,28 +152,8 @@ async def test_generate_scenes_endpoint(client, sample_snippets):
             )
         ],
         total_duration=8.0
-    )
-    
-    with patch('app.api.v1.video.scene_generator.generate_scenes', new_callable=AsyncMock) as mock_generate:
-        mock_generate.return_value = mock_response
-        
-        response = client.post(
-            "/api/v1/generate-scenes",
-            json=[snippet.model_dump() for snippet in sample_snippets]
-        )
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert len(data["scenes"]) == 1
-        assert data["total_duration"] == 8.0
-
-
-@pytest.mark.asyncio
-async def test_generate_videos_endpoint(client, sample_scenes):
-    """Test generate videos endpoint."""
-    from app.models.schemas import VideoScene
-    
-    mock_response = VideoGenerationResponse(
+    ),
+    "videos": VideoGenerationResponse(
         video_scenes=[
             VideoScene(
                 scene_number=1,
@@ -119,27 +163,8 @@ async def test_generate_videos_endpoint(client, sample_scenes):
             )
         ],
         total_duration=8.0
-    )
-    
-    with patch('app.api.v1.video.veo_service.generate_videos', new_callable=AsyncMock) as mock_generate:
-        mock_generate.return_value = mock_response
-        
-        response = client.post(
-            "/api/v1/generate-videos",
-            json=[scene.model_dump() for scene in sample_scenes]
-        )
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert len(data["video_scenes"]) == 1
-
-
-@pytest.mark.asyncio
-async def test_generate_audio_endpoint(client, sample_scenes):
-    """Test generate audio endpoint."""
-    from app.models.schemas import AudioScene
-    
-    mock_response = AudioGenerationResponse(
+    ),
+    "audio": AudioGenerationResponse(
         audio_scenes=[
             AudioScene(
                 scene_number=1,
@@ -150,102 +175,241 @@ async def test_generate_audio_endpoint(client, sample_scenes):
         ],
         total_duration=8.0,
         voice_id="test_voice"
+    ),
+}
+
+
+@pytest.mark.parametrize(
+    "stage, route, service, method, payload_fixture, key",
+    [
+        ("scenes", "/api/v1/generate-scenes", "scene_generator", "generate_scenes", "sample_snippets_body", "scenes"),
+        ("videos", "/api/v1/generate-videos", "veo_service", "generate_videos", "sample_scenes_body", "video_scenes"),
+        ("audio", "/api/v1/generate-audio", "audio_service", "generate_audio_clips", "sample_scenes_body", "audio_scenes"),
+    ],
+    ids=["scenes", "videos", "audio"]
+)
+async def test_generate_stage_endpoint(aclient, services, request, stage, route, service, method, payload_fixture, key):
+    """Test the generate-scenes, generate-videos and generate-audio endpoints."""
+    setattr(getattr(services, service), method, async_return(_STAGE_RESPONSES[stage]))
+    
+    response = await aclient.post(route, content=request.getfixturevalue(payload_fixture), headers=_JSON_HEADERS)
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data[key]) == 1
+    assert data["total_duration"] == 8.0
+
+
+# Canned output of every pipeline stage, built once at import.
+_PIPELINE_RESPONSE = VideoGenerationFullResponse(
+    snippets=[Snippet(text="Test", start_time=0.0, end_time=8.0)],
+    scenes=[SceneDescription(
+        scene_number=1,
+        transcript_text="Test",
+        visual_prompt="Test prompt",
+        duration=8.0
+    )],
+    video_scenes=[VideoScene(
+        scene_number=1,
+        file_path="/tmp/video.mp4",
+        duration=8.0,
+        transcript_text="Test"
+    )],
+    audio_scenes=[AudioScene(
+        scene_number=1,
+        file_path="/tmp/audio.mp3",
+        duration=8.0,
+        transcript_text="Test"
+    )],
+    stitched_video_path="/tmp/stitched.mp4",
+    final_video_path="/tmp/final.mp4",
+    total_duration=8.0
+)
+
+# (service, method, response) for the pipeline's one-shot awaited calls.
+_PIPELINE_STUBS = (
+    ("snippet_extractor", "extract_snippets", SnippetExtractionResponse(
+        snippets=_PIPELINE_RESPONSE.snippets,
+        total_snippets=1
+    )),
+    ("audio_service", "generate_audio_clips", AudioGenerationResponse(
+        audio_scenes=_PIPELINE_RESPONSE.audio_scenes,
+        total_duration=8.0,
+        voice_id="test"
+    )),
+)
+
+
+@pytest.fixture
+def pipeline_services(services):
+    """Services stubbed to run the full pipeline once over _PIPELINE_RESPONSE."""
+    for service, method, response in _PIPELINE_STUBS:
+        setattr(getattr(services, service), method, async_return(response))
+    
+    async def iter_scenes(snippets):
+        for scene in _PIPELINE_RESPONSE.scenes:
+            yield scene
+    
+    async def iter_completed(scenes, filename_prefix=""):
+        async for _ in scenes:
+            pass
+        for video_scene in _PIPELINE_RESPONSE.video_scenes:
+            yield video_scene
+    
+    services.scene_generator.iter_scenes.side_effect = iter_scenes
+    services.veo_service.iter_completed.side_effect = iter_completed
+    # AsyncMocks only where tests assert on the awaits
+    services.video_stitcher.append = AsyncMock()
+    services.audio_sync.assemble_session = AsyncMock(return_value=AudioSyncResponse(
+        final_video_path=_PIPELINE_RESPONSE.final_video_path,
+        duration=8.0
+    ))
+    return services
+
+
+async def test_generate_video_full_pipeline(aclient, pipeline_services, sample_transcript_text):
+    """Test the full pipeline endpoint end to end through the app."""
+    response = await aclient.post(
+        "/api/v1/generate-video",
+        json={
+            "transcript": sample_transcript_text,
+            "transcript_format": "plain",
+            "max_snippets": 5
+        }
     )
     
-    with patch('app.api.v1.video.audio_service.generate_audio_clips', new_callable=AsyncMock) as mock_generate:
-        mock_generate.return_value = mock_response
-        
-        response = client.post(
-            "/api/v1/generate-audio",
-            json=[scene.model_dump() for scene in sample_scenes]
-        )
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert len(data["audio_scenes"]) == 1
-
-
-@pytest.mark.asyncio
-async def test_generate_video_full_pipeline(client, sample_transcript_text):
-    """Test full pipeline endpoint."""
-    from app.models.schemas import (
-        VideoScene,
-        AudioScene,
-        VideoGenerationFullResponse
+    assert response.status_code == 200
+    data = response.json()
+    assert "final_video_path" in data
+    assert "snippets" in data
+    assert "scenes" in data
+
+
+async def test_generate_video_handler_stitches_clips_as_they_finish(pipeline_services, sample_transcript_text):
+    """Test that the pipeline handler, called directly, appends each clip to one stitch session."""
+    result = await generate_video_handler(
+        VideoGenerationRequest(transcript=sample_transcript_text, max_snippets=5),
+        pipeline_services.snippet_extractor,
+        pipeline_services.scene_generator,
+        pipeline_services.veo_service,
+        pipeline_services.audio_service,
+        pipeline_services.video_stitcher,
+        pipeline_services.audio_sync
+    )
+    
+    assert result.final_video_path == _PIPELINE_RESPONSE.final_video_path
+    session = pipeline_services.video_stitcher.start_session.return_value
+    pipeline_services.video_stitcher.append.assert_awaited_once_with(session, "/tmp/video.mp4")
+    pipeline_services.audio_sync.assemble_session.assert_awaited_once_with(
+        session, ["/tmp/audio.mp3"], filename_prefix=ANY
+    )
+    pipeline_services.video_stitcher.close_session.assert_called_once_with(session)
+    pipeline_services.video_stitcher.stitch_videos.assert_not_called()
+
+
+async def test_run_pipeline_prefixes_outputs_with_run_id(pipeline_services, sample_transcript_text):
+    """Test that every file a pipeline run writes is named after its run ID."""
+    await _run_pipeline(
+        VideoGenerationRequest(transcript=sample_transcript_text),
+        pipeline_services.snippet_extractor,
+        pipeline_services.scene_generator,
+        pipeline_services.veo_service,
+        pipeline_services.audio_service,
+        pipeline_services.video_stitcher,
+        pipeline_services.audio_sync,
+        run_id="job1"
+    )
+    
+    assert pipeline_services.veo_service.iter_completed.call_args.kwargs["filename_prefix"] == "job1_"
+    assert pipeline_services.audio_sync.assemble_session.call_args.kwargs["filename_prefix"] == "job1_"
+
+
+async def test_run_video_stream_renders_through_iter_completed(pipeline_services, sample_transcript_text):
+    """Test that the HLS pipeline renders concurrently via iter_completed and packages scenes in order."""
+    stream = SimpleNamespace(job_id="job1", status="pending", error=None, finished_at=None)
+    hls_service = Mock(add_scene=AsyncMock())
+    pipeline_services.audio_service.generate_audio = async_return(_PIPELINE_RESPONSE.audio_scenes[0])
+    
+    await _run_video_stream(
+        VideoGenerationRequest(transcript=sample_transcript_text),
+        stream,
+        pipeline_services.snippet_extractor,
+        pipeline_services.scene_generator,
+        pipeline_services.veo_service,
+        pipeline_services.audio_service,
+        hls_service
+    )
+    
+    assert pipeline_services.veo_service.iter_completed.call_args.kwargs["filename_prefix"] == "job1_"
+    hls_service.add_scene.assert_awaited_once_with(stream, 0, "/tmp/video.mp4", "/tmp/audio.mp3")
+    hls_service.finish.assert_called_once_with(stream)
+    assert stream.finished_at is not None
+
+
+def test_service_dependencies_are_shared():
+    """Test that dependency providers build each service once and reuse it."""
+    assert deps.get_video_stitcher() is deps.get_video_stitcher()
+    assert deps.get_audio_sync() is deps.get_audio_sync()
+
+
+def test_generate_video_stream_endpoint(client, services, tmp_path, monkeypatch):
+    """Test that the stream endpoint returns a playlist URL before the pipeline finishes."""
+    monkeypatch.setattr(settings, "video_output_dir", str(tmp_path))
+    hls_service = HLSService()
+    app.dependency_overrides[deps.get_hls_service] = lambda: hls_service
+    services.snippet_extractor.extract_snippets.side_effect = RuntimeError("boom")
+    
+    response = client.post(
+        "/api/v1/generate-video/stream",
+        json={"transcript": "Test transcript", "transcript_format": "plain"}
     )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["playlist_url"].endswith(f"/generate-video/stream/{data['job_id']}/playlist.m3u8")
+    
+    playlist = client.get(data["playlist_url"])
+    assert playlist.status_code == 200
+    assert playlist.text.startswith("#EXTM3U")
+    
+    stream = hls_service.get_stream(data["job_id"])
     
-    mock_full_response = VideoGenerationFullResponse(
+    async def wait_for_pipeline():
+        await stream.task
+    
+    client.portal.call(wait_for_pipeline)
+    assert stream.status == "failed"
+    
+    assert client.get(f"/api/v1/generate-video/stream/{data['job_id']}/notes.txt").status_code == 404
+    assert client.get("/api/v1/generate-video/stream/missing/playlist.m3u8").status_code == 404
+
+
+def test_generate_video_events_endpoint(client, services):
+    """Test that the SSE endpoint streams stage events and ends with the error."""
+    services.snippet_extractor.extract_snippets = async_return(SnippetExtractionResponse(
         snippets=[Snippet(text="Test", start_time=0.0, end_time=8.0)],
-        scenes=[SceneDescription(
-            scene_number=1,
-            transcript_text="Test",
-            visual_prompt="Test prompt",
-            duration=8.0
-        )],
-        video_scenes=[VideoScene(
-            scene_number=1,
-            file_path="/tmp/video.mp4",
-            duration=8.0,
-            transcript_text="Test"
-        )],
-        audio_scenes=[AudioScene(
-            scene_number=1,
-            file_path="/tmp/audio.mp3",
-            duration=8.0,
-            transcript_text="Test"
-        )],
-        stitched_video_path="/tmp/stitched.mp4",
-        final_video_path="/tmp/final.mp4",
-        total_duration=8.0
+        total_snippets=1
+    ))
+    services.scene_generator.iter_scenes.side_effect = RuntimeError("boom")
+    
+    async def iter_completed(scenes, filename_prefix=""):
+        async for _ in scenes:
+            yield
+    
+    services.veo_service.iter_completed.side_effect = iter_completed
+    
+    response = client.post(
+        "/api/v1/generate-video/events",
+        json={"transcript": "Test transcript", "transcript_format": "plain"}
     )
     
-    with patch('app.api.v1.video.snippet_extractor.extract_snippets', new_callable=AsyncMock) as mock_extract, \
-         patch('app.api.v1.video.scene_generator.generate_scenes', new_callable=AsyncMock) as mock_scenes, \
-         patch('app.api.v1.video.veo_service.generate_videos', new_callable=AsyncMock) as mock_videos, \
-         patch('app.api.v1.video.audio_service.generate_audio_clips', new_callable=AsyncMock) as mock_audio, \
-         patch('app.api.v1.video.video_stitcher.stitch_videos', new_callable=AsyncMock) as mock_stitch, \
-         patch('app.api.v1.video.audio_sync.sync_multiple_audio', new_callable=AsyncMock) as mock_sync:
-        
-        # Set up mocks
-        mock_extract.return_value = SnippetExtractionResponse(
-            snippets=mock_full_response.snippets,
-            total_snippets=1
-        )
-        mock_scenes.return_value = SceneGenerationResponse(
-            scenes=mock_full_response.scenes,
-            total_duration=8.0
-        )
-        mock_videos.return_value = VideoGenerationResponse(
-            video_scenes=mock_full_response.video_scenes,
-            total_duration=8.0
-        )
-        mock_audio.return_value = AudioGenerationResponse(
-            audio_scenes=mock_full_response.audio_scenes,
-            total_duration=8.0,
-            voice_id="test"
-        )
-        from app.models.schemas import VideoStitchResponse, AudioSyncResponse
-        mock_stitch.return_value = VideoStitchResponse(
-            stitched_video_path=mock_full_response.stitched_video_path,
-            duration=8.0
-        )
-        mock_sync.return_value = AudioSyncResponse(
-            final_video_path=mock_full_response.final_video_path,
-            duration=8.0
-        )
-        
-        response = client.post(
-            "/api/v1/generate-video",
-            json={
-                "transcript": sample_transcript_text,
-                "transcript_format": "plain",
-                "max_snippets": 5
-            }
-        )
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert "final_video_path" in data
-        assert "snippets" in data
-        assert "scenes" in data
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [line.split(": ", 1)[1] for line in response.text.splitlines() if line.startswith("event: ")]
+    assert events == ["job", "snippets_ready", "error"]
+    assert '"detail": "boom"' in response.text
+
 
+def test_cancel_unknown_job(client):
+    """Test cancelling a job that does not exist."""
+    response = client.post("/api/v1/generate-video/cancel/missing")
+    assert response.status_code == 404
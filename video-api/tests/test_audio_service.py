@@ -1,9 +1,9 @@
 """Tests for audio service."""
 
 import pytest
+from google.cloud import texttospeech
 from unittest.mock import Mock, patch, AsyncMock
 from pathlib import Path
-import tempfile
 from app.services.audio_service import AudioService
 from app.models.schemas import SceneDescription
 
@@ -19,68 +19,93 @@ def sample_scene():
     )
 
 
-@pytest.mark.asyncio
-async def test_generate_audio(sample_scene):
+def _mock_tts_client(audio_content=b'audio_chunk'):
+    """Google TTS client whose synthesize_speech returns fixed MP3 bytes."""
+    mock_client = Mock()
+    mock_client.synthesize_speech = Mock(return_value=Mock(audio_content=audio_content))
+    return mock_client
+
+
+@pytest.fixture
+def audio_service(fs):
+    """AudioService on a mocked TTS client, writing to pyfakefs's in-memory filesystem; yields (service, mock_client)."""
+    mock_client = _mock_tts_client()
+    with patch.object(texttospeech, 'TextToSpeechClient', return_value=mock_client):
+        service = AudioService(api_key="test_key")
+    service.output_dir = str(fs.create_dir("/output").path)
+    yield service, mock_client
+
+
+async def test_generate_audio(sample_scene, audio_service):
     """Test audio generation for a single scene."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        with patch('app.services.audio_service.ElevenLabs') as mock_elevenlabs:
-            mock_client = Mock()
-            mock_generator = iter([b'audio_chunk_1', b'audio_chunk_2', b'audio_chunk_3'])
-            mock_client.text_to_speech = Mock()
-            mock_client.text_to_speech.convert = Mock(return_value=mock_generator)
-            mock_elevenlabs.return_value = mock_client
-            
-            service = AudioService(api_key="test_key")
-            service.output_dir = tmpdir
-            
-            result = await service.generate_audio(sample_scene)
-            
-            assert result.scene_number == 1
-            assert result.duration == 8.0
-            assert result.transcript_text == sample_scene.transcript_text
-            assert Path(result.file_path).exists()
-
-
-@pytest.mark.asyncio
-async def test_generate_audio_clips_multiple(sample_scenes):
+    service, mock_client = audio_service
+    
+    result = await service.generate_audio(sample_scene)
+    
+    assert result.scene_number == 1
+    assert result.duration == 8.0
+    assert result.transcript_text == sample_scene.transcript_text
+    assert Path(result.file_path).exists()
+    assert Path(result.file_path).read_bytes() == b'audio_chunk'
+
+
+async def test_generate_audio_clips_multiple(sample_scenes, audio_service):
     """Test audio generation for multiple scenes."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        with patch('app.services.audio_service.ElevenLabs') as mock_elevenlabs:
-            mock_client = Mock()
-            mock_generator = iter([b'audio_chunk'])
-            mock_client.text_to_speech = Mock()
-            mock_client.text_to_speech.convert = Mock(return_value=mock_generator)
-            mock_elevenlabs.return_value = mock_client
-            
-            service = AudioService(api_key="test_key")
-            service.output_dir = tmpdir
-            
-            result = await service.generate_audio_clips(sample_scenes)
-            
-            assert len(result.audio_scenes) == len(sample_scenes)
-            assert result.total_duration == sum(s.duration for s in sample_scenes)
-            assert result.voice_id == AudioService.DEFAULT_VOICE_ID
-
-
-@pytest.mark.asyncio
-async def test_generate_audio_custom_voice(sample_scene):
+    service, mock_client = audio_service
+    
+    result = await service.generate_audio_clips(sample_scenes)
+    
+    assert len(result.audio_scenes) == len(sample_scenes)
+    assert [a.scene_number for a in result.audio_scenes] == [s.scene_number for s in sample_scenes]
+    assert result.total_duration == sum(s.duration for s in sample_scenes)
+    assert result.voice_id == AudioService.DEFAULT_VOICE_ID
+    assert mock_client.synthesize_speech.call_count == len(sample_scenes)
+
+
+async def test_generate_audio_clips_reuses_duplicate_text(sample_scenes, audio_service):
+    """Test that scenes with identical text are synthesized once."""
+    duplicate = sample_scenes[0].model_copy(update={"scene_number": 3})
+    service, mock_client = audio_service
+    
+    result = await service.generate_audio_clips([*sample_scenes, duplicate])
+    
+    assert [a.scene_number for a in result.audio_scenes] == [1, 2, 3]
+    assert result.audio_scenes[2].file_path == result.audio_scenes[0].file_path
+    assert mock_client.synthesize_speech.call_count == len(sample_scenes)
+
+
+async def test_generate_audio_custom_voice(sample_scene, audio_service):
     """Test audio generation with custom voice ID."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        with patch('app.services.audio_service.ElevenLabs') as mock_elevenlabs:
-            mock_client = Mock()
-            mock_generator = iter([b'audio_chunk'])
-            mock_client.text_to_speech = Mock()
-            mock_client.text_to_speech.convert = Mock(return_value=mock_generator)
-            mock_elevenlabs.return_value = mock_client
-            
-            service = AudioService(api_key="test_key")
-            service.output_dir = tmpdir
-            
-            custom_voice_id = "custom_voice_123"
-            result = await service.generate_audio(sample_scene, voice_id=custom_voice_id)
-            
-            # Verify custom voice was used
-            mock_client.text_to_speech.convert.assert_called_once()
-            call_args = mock_client.text_to_speech.convert.call_args
-            assert call_args.kwargs['voice_id'] == custom_voice_id
+    service, mock_client = audio_service
+    
+    custom_voice_id = "en-US-Neural2-D"
+    result = await service.generate_audio(sample_scene, voice_id=custom_voice_id)
+    
+    # Verify custom voice was used
+    mock_client.synthesize_speech.assert_called_once()
+    call_args = mock_client.synthesize_speech.call_args
+    assert call_args.kwargs['voice'].name == custom_voice_id
+
+
+async def test_generate_audio_uses_tts_cache(sample_scene, audio_service):
+    """Test that re-synthesizing the same text and voice is served from the cache."""
+    service, mock_client = audio_service
+    
+    await service.generate_audio(sample_scene)
+    result = await service.generate_audio(sample_scene, output_filename="again.mp3")
+    
+    mock_client.synthesize_speech.assert_called_once()
+    assert Path(result.file_path).read_bytes() == b'audio_chunk'
+
 
+def test_split_text_respects_byte_limit():
+    """Test that long text is split on sentence boundaries under the byte limit."""
+    with patch.object(texttospeech, 'TextToSpeechClient'):
+        service = AudioService(api_key="test_key")
+    
+    text = "First sentence here. Second one! Third? Fourth sentence é."
+    chunks = service._split_text(text, max_bytes=24)
+    
+    assert chunks == ["First sentence here.", "Second one! Third?", "Fourth sentence é."]
+    assert all(len(chunk.encode('utf-8')) <= 24 for chunk in chunks)
+    assert service._split_text("Short text.", max_bytes=32) == ["Short text."]
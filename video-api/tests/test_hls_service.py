@@ -0,0 +1,63 @@
+"""Tests for HLS packaging."""
+
+import os
+import time
+import pytest
+from app.core.config import settings
+from app.services.hls_service import HLSService
+from app.utils.video_utils import run_ffmpeg
+
+
+@pytest.fixture
+def hls_service(tmp_path, monkeypatch):
+    """HLS service writing under a temporary output directory."""
+    monkeypatch.setattr(settings, "video_output_dir", str(tmp_path))
+    return HLSService()
+
+
+@pytest.fixture
+async def scene_media(tmp_path):
+    """A 3-second test video and 1-second narration clip."""
+    video_path = str(tmp_path / "scene.mp4")
+    audio_path = str(tmp_path / "scene.mp3")
+    await run_ffmpeg(["-f", "lavfi", "-i", "testsrc=size=160x120:rate=12:duration=3", video_path])
+    await run_ffmpeg(["-f", "lavfi", "-i", "sine=duration=1", audio_path])
+    return video_path, audio_path
+
+
+async def test_scenes_are_published_in_order(hls_service, scene_media):
+    """Test that scenes finishing out of order are appended in scene order."""
+    video_path, audio_path = scene_media
+    stream = hls_service.create_stream()
+    
+    await hls_service.add_scene(stream, 1, video_path, audio_path)
+    assert "scene_001" not in stream.playlist_path.read_text()
+    
+    segments = await hls_service.add_scene(stream, 0, video_path, audio_path)
+    hls_service.finish(stream)
+    
+    playlist = stream.playlist_path.read_text()
+    assert segments == 2
+    assert playlist.index("scene_000_001.ts") < playlist.index("#EXT-X-DISCONTINUITY") < playlist.index("scene_001_000.ts")
+    assert playlist.rstrip().endswith("#EXT-X-ENDLIST")
+    assert stream.status == "completed"
+    assert stream.file_path("scene_001_001.ts") is not None
+
+
+async def test_evict_expired_drops_finished_streams(hls_service):
+    """Test that streams finished longer ago than the TTL are forgotten and deleted."""
+    finished = hls_service.create_stream()
+    finished.finished_at = time.monotonic() - 120
+    running = hls_service.create_stream()
+    orphan = hls_service.output_dir / "orphan"
+    orphan.mkdir()
+    os.utime(orphan, (time.time() - 120, time.time() - 120))
+    
+    removed = await hls_service.evict_expired(60)
+    
+    assert removed == 2
+    assert hls_service.get_stream(finished.job_id) is None
+    assert not finished.directory.exists()
+    assert not orphan.exists()
+    assert hls_service.get_stream(running.job_id) is running
+    assert running.directory.exists()
@@ -0,0 +1,42 @@
+"""Tests for LLM JSON parsing helpers."""
+
+import pytest
+from app.utils.json_utils import StreamingArrayParser, parse_json_response
+
+
+def test_parse_json_response_ignores_trailing_prose():
+    """Test that text after the JSON value is ignored."""
+    response_text = '```json\n{"scenes": []}\n```\nLet me know if you need more scenes!'
+    
+    assert parse_json_response(response_text) == {"scenes": []}
+    assert parse_json_response('{"scenes": []} Hope this helps.') == {"scenes": []}
+
+
+def test_parse_json_response_unlabelled_fence():
+    """Test parsing a code fence without a language tag."""
+    assert parse_json_response('Here you go:\n```\n[1, 2]\n```') == [1, 2]
+
+
+def test_parse_json_response_bare_json_with_fence_in_value():
+    """Test that bare (schema-constrained) JSON is parsed whole, even if a value contains a fence."""
+    response_text = '{"snippets": [{"text": "type ```json``` to start"}]}'
+    
+    assert parse_json_response(response_text) == {"snippets": [{"text": "type ```json``` to start"}]}
+
+
+def test_parse_json_response_invalid():
+    """Test that invalid JSON raises ValueError."""
+    with pytest.raises(ValueError):
+        parse_json_response("```json\n{not json}\n```")
+
+
+def test_streaming_array_parser_yields_complete_elements():
+    """Test that array elements are returned once complete, across chunk boundaries."""
+    text = '```json\n{"scenes": [{"n": 1, "s": "a]}"}, {"n": 2}]}\n```'
+    parser = StreamingArrayParser("scenes")
+    
+    items = []
+    for i in range(0, len(text), 4):
+        items += parser.feed(text[i:i + 4])
+    
+    assert items == [{"n": 1, "s": "a]}"}, {"n": 2}]
@@ -0,0 +1,59 @@
+"""Tests for the retry helper."""
+
+import httpx
+import pytest
+from unittest.mock import AsyncMock
+from google.api_core import exceptions as api_exceptions
+from app.utils.retry import is_submit_retryable, with_retries
+
+
+async def test_with_retries_recovers_from_transient_error():
+    """Test that a transient error is retried until the call succeeds."""
+    fn = AsyncMock(side_effect=[api_exceptions.ServiceUnavailable("down"), "ok"])
+    
+    result = await with_retries(fn, base_delay=0)
+    
+    assert result == "ok"
+    assert fn.call_count == 2
+
+
+async def test_with_retries_gives_up_after_retries():
+    """Test that the last transient error is raised once retries run out."""
+    fn = AsyncMock(side_effect=api_exceptions.TooManyRequests("slow down"))
+    
+    with pytest.raises(api_exceptions.TooManyRequests):
+        await with_retries(fn, retries=2, base_delay=0)
+    
+    assert fn.call_count == 3
+
+
+async def test_with_retries_does_not_retry_permanent_error():
+    """Test that non-transient errors are raised immediately."""
+    fn = AsyncMock(side_effect=ValueError("bad input"))
+    
+    with pytest.raises(ValueError):
+        await with_retries(fn, base_delay=0)
+    
+    assert fn.call_count == 1
+
+
+async def test_with_retries_uses_retry_if_predicate():
+    """Test that a custom predicate narrows which errors are retried."""
+    fn = AsyncMock(side_effect=api_exceptions.ServiceUnavailable("down"))
+    
+    with pytest.raises(api_exceptions.ServiceUnavailable):
+        await with_retries(fn, base_delay=0, retry_if=is_submit_retryable)
+    
+    assert fn.call_count == 1
+
+
+@pytest.mark.parametrize("error, expected", [
+    (api_exceptions.TooManyRequests("slow down"), True),
+    (httpx.ConnectError("refused"), True),
+    (api_exceptions.ServiceUnavailable("down"), False),
+    (httpx.ReadTimeout("no response"), False),
+    (ConnectionResetError("reset"), False),
+])
+def test_is_submit_retryable_only_allows_unsent_requests(error, expected):
+    """Test that only rate limits and connect-phase errors are safe to resubmit."""
+    assert is_submit_retryable(error) is expected
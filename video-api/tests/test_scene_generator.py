@@ -1,81 +1,95 @@
 """Tests for scene generator service."""
 
+import json
+import google.generativeai as genai
 import pytest
 from unittest.mock import Mock, patch
 from app.services.scene_generator import SceneGenerator
 from app.models.schemas import Snippet
 
 
-@pytest.mark.asyncio
-async def test_generate_scenes(sample_snippets):
-    """Test scene generation from snippets."""
-    mock_response = Mock()
-    mock_response.text = """
-    {
-        "scenes": [
-            {
-                "scene_number": 1,
-                "transcript_text": "AI is really transforming the world right now.",
-                "visual_prompt": "Cinematic lighting, photorealistic 4k, vertical 9:16 aspect ratio. Futuristic cityscape.",
-                "duration": 8.0,
-                "start_time": 5.0
-            }
-        ]
+@pytest.fixture(autouse=True, scope="module")
+def mock_genai():
+    """Patch GenerativeModel once for the module; tests install a fresh model via return_value."""
+    with patch.object(genai, 'GenerativeModel') as mock_model_class:
+        yield mock_model_class
+
+
+def _scene_payload(scene_number, transcript_text, start_time):
+    return {
+        "scene_number": scene_number,
+        "transcript_text": transcript_text,
+        "visual_prompt": f"Cinematic lighting, photorealistic 4k, vertical 9:16 aspect ratio. Scene {scene_number}.",
+        "duration": 8.0,
+        "start_time": start_time,
     }
-    """
+
+
+# Canned Gemini replies, keyed by the ids of the parametrized tests below
+_SCENE_RESPONSES = {
+    "single": {"scenes": [
+        _scene_payload(1, "AI is really transforming the world right now.", 5.0),
+    ]},
+    "multiple": {"scenes": [
+        _scene_payload(1, "AI is really transforming the world right now.", 5.0),
+        _scene_payload(2, "Large language models can understand and generate human-like text.", 15.0),
+    ]},
+}
+
+
+@pytest.fixture(scope="module")
+def scene_response_json(request):
+    """Reply text for one of _SCENE_RESPONSES, serialized once per module."""
+    return json.dumps(_SCENE_RESPONSES[request.param])
+
+
+@pytest.mark.parametrize(
+    "scene_response_json, expected_scenes",
+    [("single", 1), ("multiple", 2)],
+    indirect=["scene_response_json"],
+    ids=["single", "multiple"]
+)
+async def test_generate_scenes(sample_snippets, mock_genai, scene_response_json, expected_scenes):
+    """Test scene generation from snippets."""
+    mock_model = Mock()
+    mock_model.generate_content = Mock(return_value=[Mock(text=scene_response_json)])
+    mock_genai.return_value = mock_model
     
-    with patch('app.services.scene_generator.genai.GenerativeModel') as mock_model_class:
-        mock_model = Mock()
-        mock_model.generate_content = Mock(return_value=mock_response)
-        mock_model_class.return_value = mock_model
-        
-        generator = SceneGenerator(api_key="test_key")
-        result = await generator.generate_scenes(sample_snippets)
-        
-        assert len(result.scenes) == 1
-        assert result.scenes[0].scene_number == 1
-        assert result.scenes[0].duration == 8.0
-        assert "Cinematic lighting" in result.scenes[0].visual_prompt
-        assert result.total_duration == 8.0
-        mock_model.generate_content.assert_called_once()
-
-
-@pytest.mark.asyncio
-async def test_generate_scenes_multiple(sample_snippets):
-    """Test scene generation with multiple snippets."""
-    mock_response = Mock()
-    mock_response.text = """
-    {
-        "scenes": [
-            {
-                "scene_number": 1,
-                "transcript_text": "AI is really transforming the world right now.",
-                "visual_prompt": "Cinematic lighting, photorealistic 4k, vertical 9:16 aspect ratio. Scene 1.",
-                "duration": 8.0,
-                "start_time": 5.0
-            },
-            {
-                "scene_number": 2,
-                "transcript_text": "Large language models can understand and generate human-like text.",
-                "visual_prompt": "Cinematic lighting, photorealistic 4k, vertical 9:16 aspect ratio. Scene 2.",
-                "duration": 8.0,
-                "start_time": 15.0
-            }
-        ]
-    }
-    """
+    generator = SceneGenerator(api_key="test_key")
+    result = await generator.generate_scenes(sample_snippets)
+    
+    assert [scene.scene_number for scene in result.scenes] == list(range(1, expected_scenes + 1))
+    assert all(scene.duration == 8.0 for scene in result.scenes)
+    assert all("Cinematic lighting" in scene.visual_prompt for scene in result.scenes)
+    assert result.total_duration == 8.0 * expected_scenes
+    mock_model.generate_content.assert_called_once()
+
+
+async def test_iter_scenes_yields_before_stream_ends(sample_snippets, mock_genai):
+    """Test that each scene is yielded as soon as its JSON object has streamed in."""
+    text = (
+        '{"scenes": [{"scene_number": 1, "transcript_text": "one", "visual_prompt": "first", "duration": 8.0}, '
+        '{"scene_number": 2, "transcript_text": "two", "visual_prompt": "second", "duration": 8.0}]}'
+    )
+    split = text.index('{"scene_number": 2')
+    chunks_sent = []
+    
+    def stream():
+        for part in (text[:split], text[split:]):
+            chunks_sent.append(part)
+            yield Mock(text=part)
+    
+    mock_model = Mock()
+    mock_model.generate_content = Mock(return_value=stream())
+    mock_genai.return_value = mock_model
+    
+    generator = SceneGenerator(api_key="test_key")
+    seen = []
+    async for scene in generator.iter_scenes(sample_snippets):
+        seen.append((scene.scene_number, len(chunks_sent)))
     
-    with patch('app.services.scene_generator.genai.GenerativeModel') as mock_model_class:
-        mock_model = Mock()
-        mock_model.generate_content = Mock(return_value=mock_response)
-        mock_model_class.return_value = mock_model
-        
-        generator = SceneGenerator(api_key="test_key")
-        result = await generator.generate_scenes(sample_snippets)
-        
-        assert len(result.scenes) == 2
-        assert result.total_duration == 16.0
-        assert all(scene.duration == 8.0 for scene in result.scenes)
+    assert seen == [(1, 1), (2, 2)]
+    assert mock_model.generate_content.call_args.kwargs["stream"] is True
 
 
 def test_parse_json_response_with_code_block():
@@ -1,69 +1,152 @@
 """Tests for snippet extractor service."""
 
+import json
+import threading
+import time
+import google.generativeai as genai
 import pytest
 from unittest.mock import Mock, patch, AsyncMock
+from app.core.config import settings
 from app.services.snippet_extractor import SnippetExtractor
 from app.models.schemas import TranscriptInput, TranscriptSegment
 
 
-@pytest.mark.asyncio
-async def test_extract_snippets_plain_text(sample_transcript_text, mock_gemini_response):
+@pytest.fixture(autouse=True, scope="module")
+def mock_genai():
+    """Patch GenerativeModel once for the module; tests install a fresh model via return_value."""
+    with patch.object(genai, 'GenerativeModel') as mock_model_class:
+        yield mock_model_class
+
+
+async def test_extract_snippets_plain_text(transcript_input_plain, mock_gemini_response, mock_genai):
     """Test snippet extraction with plain text transcript."""
-    with patch('app.services.snippet_extractor.genai.GenerativeModel') as mock_model_class:
-        mock_model = Mock()
-        mock_model.generate_content = Mock(return_value=mock_gemini_response)
-        mock_model_class.return_value = mock_model
-        
-        extractor = SnippetExtractor(api_key="test_key")
-        transcript_input = TranscriptInput(
-            transcript=sample_transcript_text,
-            format="plain"
-        )
-        
-        result = await extractor.extract_snippets(transcript_input, max_snippets=5)
-        
-        assert result.total_snippets == 1
-        assert len(result.snippets) == 1
-        assert result.snippets[0].text == "AI is really transforming the world right now."
-        mock_model.generate_content.assert_called_once()
-
-
-@pytest.mark.asyncio
-async def test_extract_snippets_json_format(sample_transcript_segments, mock_gemini_response):
+    mock_model = Mock()
+    mock_model.generate_content = Mock(return_value=mock_gemini_response)
+    mock_genai.return_value = mock_model
+    
+    extractor = SnippetExtractor(api_key="test_key")
+    result = await extractor.extract_snippets(transcript_input_plain, max_snippets=5)
+    
+    assert result.total_snippets == 1
+    assert len(result.snippets) == 1
+    assert result.snippets[0].text == "AI is really transforming the world right now."
+    mock_model.generate_content.assert_called_once()
+
+
+async def test_extract_snippets_json_format(transcript_input_json, mock_gemini_response, mock_genai):
     """Test snippet extraction with JSON format transcript."""
-    with patch('app.services.snippet_extractor.genai.GenerativeModel') as mock_model_class:
-        mock_model = Mock()
-        mock_model.generate_content = Mock(return_value=mock_gemini_response)
-        mock_model_class.return_value = mock_model
-        
-        extractor = SnippetExtractor(api_key="test_key")
-        transcript_input = TranscriptInput(
-            transcript=sample_transcript_segments,
-            format="json"
-        )
-        
-        result = await extractor.extract_snippets(transcript_input, max_snippets=5)
-        
-        assert result.total_snippets == 1
-        assert len(result.snippets) == 1
-        mock_model.generate_content.assert_called_once()
-
-
-def test_parse_transcript_text_plain():
+    mock_model = Mock()
+    mock_model.generate_content = Mock(return_value=mock_gemini_response)
+    mock_genai.return_value = mock_model
+    
+    extractor = SnippetExtractor(api_key="test_key")
+    result = await extractor.extract_snippets(transcript_input_json, max_snippets=5)
+    
+    assert result.total_snippets == 1
+    assert len(result.snippets) == 1
+    mock_model.generate_content.assert_called_once()
+
+
+async def test_extract_snippets_uses_llm_cache(transcript_input_plain, mock_gemini_response, mock_genai):
+    """Test that a repeated extraction is served from the LLM cache."""
+    mock_model = Mock()
+    mock_model.generate_content = Mock(return_value=mock_gemini_response)
+    mock_genai.return_value = mock_model
+    
+    extractor = SnippetExtractor(api_key="test_key")
+    first = await extractor.extract_snippets(transcript_input_plain, max_snippets=5)
+    second = await extractor.extract_snippets(transcript_input_plain, max_snippets=5)
+    await extractor.extract_snippets(transcript_input_plain, max_snippets=3)
+    
+    assert second == first
+    assert mock_model.generate_content.call_count == 2
+
+
+async def test_extract_snippets_long_transcript_is_chunked(mock_genai):
+    """Test that a long transcript is split into windows and the picks are merged in order."""
+    def fake_generate_content(prompt, generation_config=None):
+        window = prompt.split('"""')[1]
+        words = window.split()
+        picks = [" ".join(words[:5]), " ".join(words[-5:])]
+        return Mock(text=json.dumps({"snippets": [
+            {"text": text, "start_time": 0.0, "end_time": 8.0} for text in picks
+        ]}))
+    
+    mock_model = Mock()
+    mock_model.generate_content = Mock(side_effect=fake_generate_content)
+    mock_genai.return_value = mock_model
+    
+    extractor = SnippetExtractor(api_key="test_key")
+    transcript = " ".join(f"word{i}" for i in range(5000))
+    chunks = extractor._chunk_transcript(transcript)
+    
+    result = await extractor.extract_snippets(
+        TranscriptInput(transcript=transcript, format="plain"),
+        max_snippets=len(chunks)
+    )
+    
+    assert len(chunks) > 1
+    assert mock_model.generate_content.call_count == len(chunks)
+    assert result.total_snippets == len(chunks)
+    # One pick from each window, in transcript order
+    assert [s.text for s in result.snippets] == [" ".join(c.split()[:5]) for c in chunks]
+
+
+
+async def test_extract_snippets_limits_concurrent_requests(mock_genai, monkeypatch):
+    """Test that transcript windows never have more than llm_concurrency requests in flight."""
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+    
+    def fake_generate_content(prompt, generation_config=None):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+        return Mock(text=json.dumps({"snippets": []}))
+    
+    mock_model = Mock()
+    mock_model.generate_content = Mock(side_effect=fake_generate_content)
+    mock_genai.return_value = mock_model
+    monkeypatch.setattr(settings, "llm_concurrency", 2)
+    monkeypatch.setattr(settings, "llm_cache_dir", "")
+    
+    extractor = SnippetExtractor(api_key="test_key")
+    transcript = " ".join(f"word{i}" for i in range(10000))
+    await extractor.extract_snippets(TranscriptInput(transcript=transcript, format="plain"))
+    
+    assert mock_model.generate_content.call_count > 2
+    assert peak == 2
+
+def test_chunk_transcript_overlaps_windows():
+    """Test that windows cover the whole transcript and overlap at the seams."""
+    text = " ".join(f"word{i}" for i in range(5000))
+    chunks = SnippetExtractor._chunk_transcript(text, window_chars=2000, overlap=200)
+    
+    assert all(len(chunk) <= 2000 for chunk in chunks)
+    assert chunks[0].startswith("word0 ") and chunks[-1].endswith("word4999")
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.split()[0] in previous.split()
+    assert SnippetExtractor._chunk_transcript("short") == ["short"]
+
+
+def test_parse_transcript_text_plain(transcript_input_plain, sample_transcript_text):
     """Test parsing plain text transcript."""
     extractor = SnippetExtractor(api_key="test_key")
-    transcript_input = TranscriptInput(transcript="Hello world", format="plain")
     
-    result = extractor._parse_transcript_text(transcript_input)
-    assert result == "Hello world"
+    result = extractor._parse_transcript_text(transcript_input_plain)
+    assert result == sample_transcript_text
 
 
-def test_parse_transcript_text_json(sample_transcript_segments):
+def test_parse_transcript_text_json(transcript_input_json):
     """Test parsing JSON format transcript."""
     extractor = SnippetExtractor(api_key="test_key")
-    transcript_input = TranscriptInput(transcript=sample_transcript_segments, format="json")
     
-    result = extractor._parse_transcript_text(transcript_input)
+    result = extractor._parse_transcript_text(transcript_input_json)
     assert "Welcome to the podcast" in result
     assert "Today we're talking about AI" in result
 
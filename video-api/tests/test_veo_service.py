@@ -1,11 +1,36 @@
 """Tests for Veo service."""
 
+import asyncio
+import httpx
 import pytest
+from google import genai
 from unittest.mock import Mock, patch, AsyncMock
 from pathlib import Path
-import tempfile
 from app.services.veo_service import VeoService
-from app.models.schemas import SceneDescription
+from app.models.schemas import SceneDescription, VideoScene
+
+
+_VIDEO_URI = "https://generativelanguage.googleapis.com/v1beta/files/clip:download?alt=media"
+
+
+def _veo_api(requests):
+    """httpx handler standing in for the Gemini API: renders finish at once and download as b"fake video"."""
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path.endswith(":predictLongRunning"):
+            return httpx.Response(200, json={
+                "name": "operations/render",
+                "done": True,
+                "response": {"generateVideoResponse": {"generatedSamples": [{"video": {"uri": _VIDEO_URI}}]}},
+            })
+        if request.url.path.endswith("/files/clip:download"):
+            return httpx.Response(200, content=b"fake video")
+        return httpx.Response(404, json={"error": {"code": 404, "message": "not stubbed"}})
+    return handle
+
+
+def _render_count(requests):
+    return sum(request.url.path.endswith(":predictLongRunning") for request in requests)
 
 
 @pytest.fixture
@@ -19,74 +44,99 @@ def sample_scene():
     )
 
 
-@pytest.mark.asyncio
-async def test_generate_video(sample_scene):
+@pytest.fixture
+def veo_service(fs):
+    """VeoService whose SDK client sends its HTTP requests to _veo_api; yields (service, requests).
+    
+    Clips are written to pyfakefs's in-memory filesystem.
+    """
+    requests = []
+    http_client = httpx.Client(transport=httpx.MockTransport(_veo_api(requests)))
+    service = VeoService(api_key="test_key", http_client=http_client)
+    service.output_dir = str(fs.create_dir("/output").path)
+    yield service, requests
+    http_client.close()
+
+
+async def test_generate_video(sample_scene, veo_service):
     """Test video generation for a single scene."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        with patch('app.services.veo_service.genai.Client') as mock_client_class:
-            mock_client = Mock()
-            mock_operation = Mock()
-            mock_operation.done = True
-            mock_operation.response = Mock()
-            mock_operation.response.generated_videos = [Mock()]
-            mock_operation.response.generated_videos[0].video = Mock()
-            
-            mock_file = Mock()
-            mock_file.save = Mock()
-            mock_client.files.download = Mock(return_value=mock_file)
-            mock_client.models.generate_videos = Mock(return_value=mock_operation)
-            mock_client.operations.get = Mock(return_value=mock_operation)
-            mock_client_class.return_value = mock_client
-            
-            service = VeoService(api_key="test_key")
-            service.output_dir = tmpdir
-            
-            result = await service.generate_video(sample_scene)
-            
-            assert result.scene_number == 1
-            assert result.duration == 8.0
-            assert result.transcript_text == sample_scene.transcript_text
-            assert Path(result.file_path).exists() or mock_file.save.called
-
-
-@pytest.mark.asyncio
-async def test_generate_videos_multiple(sample_scenes):
+    service, requests = veo_service
+    
+    result = await service.generate_video(sample_scene)
+    
+    assert result.scene_number == 1
+    assert result.duration == 8.0
+    assert result.transcript_text == sample_scene.transcript_text
+    assert Path(result.file_path).read_bytes() == b"fake video"
+    assert not Path(result.file_path + ".part").exists()
+    assert _render_count(requests) == 1
+
+
+async def test_generate_video_reuses_cached_render(sample_scene, veo_service):
+    """Test that a second render of the same prompt is served from the Veo cache."""
+    service, requests = veo_service
+    
+    first = await service.generate_video(sample_scene, output_filename="first.mp4")
+    second = await service.generate_video(sample_scene, output_filename="second.mp4")
+    
+    assert _render_count(requests) == 1
+    assert second.file_path != first.file_path
+    assert Path(second.file_path).read_bytes() == b"fake video"
+
+
+async def test_generate_videos_multiple(sample_scenes, veo_service):
     """Test video generation for multiple scenes."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        with patch('app.services.veo_service.genai.Client') as mock_client_class:
-            mock_client = Mock()
-            mock_operation = Mock()
-            mock_operation.done = True
-            mock_operation.response = Mock()
-            mock_operation.response.generated_videos = [Mock()]
-            mock_operation.response.generated_videos[0].video = Mock()
-            
-            mock_file = Mock()
-            mock_file.save = Mock()
-            mock_client.files.download = Mock(return_value=mock_file)
-            mock_client.models.generate_videos = Mock(return_value=mock_operation)
-            mock_client.operations.get = Mock(return_value=mock_operation)
-            mock_client_class.return_value = mock_client
-            
-            service = VeoService(api_key="test_key")
-            service.output_dir = tmpdir
-            
-            result = await service.generate_videos(sample_scenes)
-            
-            assert len(result.video_scenes) == len(sample_scenes)
-            assert result.total_duration == sum(s.duration for s in sample_scenes)
-
-
-def test_poll_operation_complete():
+    service, requests = veo_service
+    
+    result = await service.generate_videos(sample_scenes)
+    
+    assert len(result.video_scenes) == len(sample_scenes)
+    assert result.total_duration == sum(s.duration for s in sample_scenes)
+
+
+async def test_generate_videos_reuses_duplicate_scene(sample_scenes, veo_service):
+    """Test that a scene identical to an earlier one is rendered once."""
+    service, requests = veo_service
+    duplicate = sample_scenes[0].model_copy(update={"scene_number": 3})
+    
+    result = await service.generate_videos([*sample_scenes, duplicate])
+    
+    assert [vs.scene_number for vs in result.video_scenes] == [1, 2, 3]
+    assert result.video_scenes[2].file_path == result.video_scenes[0].file_path
+    assert _render_count(requests) == len(sample_scenes)
+
+
+async def test_iter_completed_yields_in_scene_order(sample_scenes):
+    """Test that clips render concurrently but are yielded in scene order."""
+    async def fake_generate_video(scene, output_filename=None):
+        # Later scenes finish first
+        await asyncio.sleep(0.01 * (len(sample_scenes) - scene.scene_number))
+        return VideoScene(
+            scene_number=scene.scene_number,
+            file_path=f"/tmp/scene_{scene.scene_number}.mp4",
+            duration=scene.duration,
+            transcript_text=scene.transcript_text
+        )
+    
+    with patch.object(genai, 'Client'):
+        service = VeoService(api_key="test_key")
+        service.generate_video = fake_generate_video
+        
+        result = [vs.scene_number async for vs in service.iter_completed(sample_scenes)]
+        
+        assert result == [s.scene_number for s in sample_scenes]
+
+
+async def test_poll_operation_complete():
     """Test polling operation that's already complete."""
-    with patch('app.services.veo_service.genai.Client') as mock_client_class:
+    with patch.object(genai, 'Client') as mock_client_class:
         mock_client = Mock()
         mock_operation = Mock()
         mock_operation.done = True
         mock_client_class.return_value = mock_client
         
         service = VeoService(api_key="test_key")
-        result = service._poll_operation(mock_operation)
+        result = await service._poll_operation(mock_operation)
         
         assert result.done is True
 
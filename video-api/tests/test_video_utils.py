@@ -1,10 +1,12 @@
 """Tests for video utilities."""
 
+import asyncio
 import pytest
 from pathlib import Path
 import tempfile
 import os
-from app.utils.video_utils import ensure_directory, clean_temp_files, get_output_path
+import wave
+from app.utils.video_utils import ensure_directory, clean_temp_files, get_output_path, probe_duration, run_ffmpeg
 
 
 def test_ensure_directory():
@@ -37,16 +39,13 @@ def test_clean_temp_files():
         file1 = os.path.join(tmpdir, "test1.txt")
         file2 = os.path.join(tmpdir, "test2.txt")
         
-        Path(file1).touch()
-        Path(file2).touch()
-        
-        assert Path(file1).exists()
-        assert Path(file2).exists()
+        open(file1, "w").close()
+        open(file2, "w").close()
         
         clean_temp_files([file1, file2])
         
-        assert not Path(file1).exists()
-        assert not Path(file2).exists()
+        assert not os.path.exists(file1)
+        assert not os.path.exists(file2)
 
 
 def test_clean_temp_files_nonexistent():
@@ -70,3 +69,40 @@ def test_get_output_path_no_create():
         
         assert result == str(Path(tmpdir) / "test.mp4")
 
+
+def test_probe_duration_tracks_file_changes(tmp_path):
+    """Test that probed durations are cached per file version."""
+    def write_silence(path, seconds):
+        with wave.open(str(path), "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(8000)
+            f.writeframes(b"\x00\x00" * int(8000 * seconds))
+    
+    audio_path = tmp_path / "silence.wav"
+    write_silence(audio_path, 1)
+    assert probe_duration(str(audio_path)) == pytest.approx(1.0, abs=0.05)
+    
+    write_silence(audio_path, 2)
+    assert probe_duration(str(audio_path)) == pytest.approx(2.0, abs=0.05)
+
+
+async def test_run_ffmpeg_kills_process_on_cancel(monkeypatch):
+    """Test that cancelling run_ffmpeg kills the ffmpeg process instead of leaving it running."""
+    processes = []
+    create_subprocess_exec = asyncio.create_subprocess_exec
+    
+    async def recording_exec(*args, **kwargs):
+        process = await create_subprocess_exec(*args, **kwargs)
+        processes.append(process)
+        return process
+    
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", recording_exec)
+    # Real-time encode of a minute of silence, so it is still running when cancelled
+    task = asyncio.create_task(run_ffmpeg(["-re", "-f", "lavfi", "-i", "anullsrc", "-t", "60", "-f", "null", "-"]))
+    await asyncio.sleep(0.5)
+    task.cancel()
+    
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert processes[0].returncode is not None